@@ -36,7 +36,10 @@ export const GameProvider = ({ children }) => {
   const [trainingRounds, setTrainingRounds] = useState(100);
   const [isConnected, setIsConnected] = useState(false);
   const [evaluationResult, setEvaluationResult] = useState(null);
+  const [evaluationProgress, setEvaluationProgress] = useState(null);
   const [modelSaveInfo, setModelSaveInfo] = useState(null);
+  const [models, setModels] = useState([]);
+  const [activeModel, setActiveModel] = useState(null);
 
   useEffect(() => {
     // Connect to WebSocket
@@ -46,8 +49,29 @@ export const GameProvider = ({ children }) => {
     WebSocketService.onMessage((data) => {
       if (data.type === "evaluation_result") {
         setEvaluationResult(data);
+        setEvaluationProgress(null);
+      } else if (data.type === "job") {
+        setEvaluationProgress({ job_id: data.job_id, done: 0, total: data.total });
+      } else if (data.type === "job_progress") {
+        setEvaluationProgress(data);
+      } else if (data.type === "job_failed") {
+        console.error("Evaluation failed:", data.error);
+        setEvaluationProgress(null);
+      } else if (data.type === "models") {
+        setModels(data.models);
+        setActiveModel(data.active);
+      } else if (data.type === "model_loaded") {
+        if (data.action !== "preload_model") {
+          setActiveModel(data.model);
+        }
+      } else if (data.type === "model_error") {
+        console.error(`Model ${data.action} failed:`, data.error);
+      } else if (data.type === "speed") {
+        console.log("Session speed:", data.speed);
       } else if (data.type === "save_model") {
         setModelSaveInfo(data);
+      } else if (data.type === "session") {
+        console.log("Joined game session:", data.session_id);
       } else {
         console.log("Received game state:", data);
         setGameState(data);
@@ -112,6 +136,18 @@ export const GameProvider = ({ children }) => {
     WebSocketService.saveModel();
   };
 
+  const listModels = () => {
+    WebSocketService.listModels();
+  };
+
+  const loadModel = (model, preloadOnly = false) => {
+    WebSocketService.loadModel(model, preloadOnly);
+  };
+
+  const activateModel = () => {
+    WebSocketService.activateModel();
+  };
+
   const evaluateModel = (episodes = 20) => {
     WebSocketService.evaluateModel(episodes);
   };
@@ -133,7 +169,13 @@ export const GameProvider = ({ children }) => {
     saveModel,
     evaluateModel,
     evaluationResult,
+    evaluationProgress,
     modelSaveInfo,
+    models,
+    activeModel,
+    listModels,
+    loadModel,
+    activateModel,
   };
 
   return <GameContext.Provider value={value}>{children}</GameContext.Provider>;
@@ -0,0 +1,97 @@
+// Decoder for the backend's "delta1" state protocol (see src/server/protocol.py).
+// Keyframes arrive as JSON text; deltas as little-endian binary frames.
+
+export const PROTOCOL_DELTA = "delta1";
+
+const MSG_DELTA = 2;
+const F_HEAD = 0x01;
+const F_TAIL_REMOVED = 0x02;
+const F_FOOD = 0x04;
+const F_COUNTERS = 0x08;
+const F_STATUS = 0x10;
+const F_STATS = 0x20;
+const F_NEW_SCORES = 0x40;
+const F_THROUGHPUT = 0x80;
+
+const MODES = ["manual", "ai", "training"];
+const STATUS_TRAINING = 0x01;
+const STATUS_GAME_OVER = 0x02;
+const MAX_RECENT_SCORES = 50;
+
+// Returns the seq of a delta frame without applying it
+export function deltaSeq(buffer) {
+  return new DataView(buffer).getUint32(2, true);
+}
+
+// Apply a binary delta to the previous state; returns a new state object
+export function applyDelta(prev, buffer) {
+  const view = new DataView(buffer);
+  let offset = 0;
+  const msgType = view.getUint8(offset);
+  offset += 2; // type + version
+  if (msgType !== MSG_DELTA) {
+    throw new Error(`Unexpected message type ${msgType}`);
+  }
+  offset += 4; // seq
+  const flags = view.getUint16(offset, true);
+  offset += 2;
+
+  const state = { ...prev, stats: { ...prev.stats } };
+
+  if (flags & F_HEAD) {
+    const head = [view.getInt16(offset, true), view.getInt16(offset + 2, true)];
+    offset += 4;
+    const snake = [head, ...prev.snake];
+    if (flags & F_TAIL_REMOVED) {
+      snake.pop();
+    }
+    state.snake = snake;
+  }
+  if (flags & F_FOOD) {
+    state.food = [view.getInt16(offset, true), view.getInt16(offset + 2, true)];
+    offset += 4;
+  }
+  if (flags & F_COUNTERS) {
+    state.score = view.getUint32(offset, true);
+    state.steps = view.getUint32(offset + 4, true);
+    offset += 8;
+  }
+  if (flags & F_STATUS) {
+    state.mode = MODES[view.getUint8(offset)];
+    const bits = view.getUint8(offset + 1);
+    state.training = Boolean(bits & STATUS_TRAINING);
+    state.game_over = Boolean(bits & STATUS_GAME_OVER);
+    state.current_episode = view.getUint32(offset + 2, true);
+    state.target_episodes = view.getUint32(offset + 6, true);
+    offset += 10;
+  }
+  if (flags & F_STATS) {
+    state.stats.epsilon = view.getFloat32(offset, true);
+    state.stats.avg = view.getFloat32(offset + 4, true);
+    state.stats.best = view.getInt32(offset + 8, true);
+    state.stats.last = view.getInt32(offset + 12, true);
+    offset += 16;
+  }
+  if (flags & F_NEW_SCORES) {
+    const count = view.getUint16(offset, true);
+    offset += 2;
+    const scores = [];
+    for (let i = 0; i < count; i++) {
+      scores.push(view.getInt32(offset, true));
+      offset += 4;
+    }
+    state.stats.all_scores = [...prev.stats.all_scores, ...scores].slice(
+      -MAX_RECENT_SCORES
+    );
+    state.stats.score_count = prev.stats.score_count + count;
+  }
+  if (flags & F_THROUGHPUT) {
+    state.headless = Boolean(view.getUint8(offset));
+    state.throughput = {
+      env_steps_per_sec: view.getFloat32(offset + 1, true),
+      updates_per_sec: view.getFloat32(offset + 5, true),
+    };
+    offset += 9;
+  }
+  return state;
+}
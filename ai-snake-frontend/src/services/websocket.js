@@ -1,15 +1,30 @@
+import { PROTOCOL_DELTA, applyDelta, deltaSeq } from "./deltaProtocol";
+
 class WebSocketService {
-  constructor() {
+  // protocol: "delta1" for keyframe + binary delta frames, "json" for full
+  // JSON state on every tick
+  constructor(protocol = PROTOCOL_DELTA) {
     this.ws = null;
     this.isConnected = false;
     this.onMessageCallback = null;
     this.reconnectAttempts = 0;
     this.maxReconnectAttempts = 5;
+    this.protocol = protocol;
+    this.deltaState = null;
+    this.deltaSeq = 0;
+    this.resyncPending = false;
+    this.sessionId = null;
   }
 
   connect() {
     try {
-      this.ws = new WebSocket("ws://127.0.0.1:8000/ws");
+      // Rejoin our own game session after a reconnect
+      const session = this.sessionId ? `&session=${this.sessionId}` : "";
+      this.ws = new WebSocket(
+        `ws://127.0.0.1:8000/ws?protocol=${this.protocol}${session}`
+      );
+      this.ws.binaryType = "arraybuffer";
+      this.deltaState = null;
 
       this.ws.onopen = () => {
         console.log("WebSocket connected");
@@ -19,8 +34,8 @@ class WebSocketService {
 
       this.ws.onmessage = (event) => {
         try {
-          const data = JSON.parse(event.data);
-          if (this.onMessageCallback) {
+          const data = this.decodeMessage(event.data);
+          if (data && this.onMessageCallback) {
             this.onMessageCallback(data);
           }
         } catch (error) {
@@ -43,6 +58,37 @@ class WebSocketService {
     }
   }
 
+  // Turn a raw message into a full state (or command reply) object
+  decodeMessage(raw) {
+    if (raw instanceof ArrayBuffer) {
+      const seq = deltaSeq(raw);
+      if (!this.deltaState || seq !== this.deltaSeq + 1) {
+        // Missed a frame; ask once for a fresh keyframe
+        this.deltaState = null;
+        if (!this.resyncPending) {
+          this.resyncPending = true;
+          this.sendCommand({ action: "resync" });
+        }
+        return null;
+      }
+      this.deltaState = applyDelta(this.deltaState, raw);
+      this.deltaSeq = seq;
+      return this.deltaState;
+    }
+    const data = JSON.parse(raw);
+    if (data.type === "session") {
+      this.sessionId = data.session_id;
+      return data;
+    }
+    if (data.type === "keyframe") {
+      this.deltaState = data.state;
+      this.deltaSeq = data.seq;
+      this.resyncPending = false;
+      return data.state;
+    }
+    return data;
+  }
+
   attemptReconnect() {
     if (this.reconnectAttempts < this.maxReconnectAttempts) {
       this.reconnectAttempts++;
@@ -85,8 +131,9 @@ class WebSocketService {
     this.sendCommand({ action: "set_mode", mode });
   }
 
-  startTraining() {
-    this.sendCommand({ action: "start_training" });
+  // headless: train at full speed on the server and stream sampled frames
+  startTraining(headless = false) {
+    this.sendCommand({ action: "start_training", headless });
   }
 
   pauseTraining() {
@@ -105,6 +152,11 @@ class WebSocketService {
     this.sendCommand({ action: "set_training_rounds", rounds });
   }
 
+  // speed: "slow" | "normal" | "turbo"
+  setSpeed(speed) {
+    this.sendCommand({ action: "set_speed", speed });
+  }
+
   sendDirection(direction) {
     this.sendCommand({ action: "manual_direction", direction });
   }
@@ -117,6 +169,19 @@ class WebSocketService {
     this.sendCommand({ action: "save_model" });
   }
 
+  listModels() {
+    this.sendCommand({ action: "list_models" });
+  }
+
+  // preloadOnly: load into the warm standby slot without swapping it in
+  loadModel(model, preloadOnly = false) {
+    this.sendCommand({ action: preloadOnly ? "preload_model" : "load_model", model });
+  }
+
+  activateModel() {
+    this.sendCommand({ action: "activate_model" });
+  }
+
   evaluateModel(episodes = 20) {
     this.sendCommand({ action: "evaluate_model", episodes });
   }
@@ -11,10 +11,24 @@ pip install fastapi uvicorn websockets
 """
 import asyncio
 import json
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+import os
+import time
+import yaml
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+import numpy as np
 from fastapi.middleware.cors import CORSMiddleware
-from src.game.game_engine import GameEngine
+from src.game.game_engine import GameEngine, STATE_FEATURE_NAMES
 from src.ai.agent import DQNAgent
+from src.ai.checkpoint_writer import CheckpointWriter
+from src.ai.dataset import TransitionExporter
+from src.ai.model_catalog import ModelCatalog, ModelLoader
+from src.server.compute import ComputeExecutor
+from src.server.inference import MicroBatcher, encode_binary
+from src.server.protocol import PROTOCOL_DELTA, PROTOCOL_JSON
+from src.server.scheduler import TickScheduler
+from src.server.sessions import SessionManager
+from src.utils.log import configure_logging, get_logger
+from src.utils.metrics import REGISTRY
 
 app = FastAPI()
 
@@ -27,13 +41,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-clients = set()
+# --- Configuration ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(BASE_DIR, 'config.yaml')
+with open(CONFIG_PATH) as f:
+    config = yaml.safe_load(f)
+training_config = config['training']
+server_config = config.get('server', {})
+
+# SNAKE_LOG_FORMAT=json switches to one JSON object per line
+configure_logging(os.environ.get('SNAKE_LOG_FORMAT', server_config.get('log_format', 'text')),
+                  os.environ.get('SNAKE_LOG_LEVEL', server_config.get('log_level', 'INFO')))
+log = get_logger('backend')
 
 # --- Game Setup ---
 GRID_W, GRID_H, CELL_SIZE = 15, 17, 20
 DEFAULT_TRAINING_ROUNDS = 100
+SESSION_IDLE_TIMEOUT = 60.0  # Seconds a session survives with no clients
+MAX_SESSIONS = 5000
 
-game_engine = GameEngine(GRID_W, GRID_H, CELL_SIZE)
 agent_config = {
     'state_size': 11,
     'action_size': 4,
@@ -47,259 +73,413 @@ agent_config = {
     'target_update_frequency': 100
 }
 agent = DQNAgent(11, 4, agent_config)
+checkpoint_writer = CheckpointWriter(
+    training_config.get('model_dir', 'models'),
+    keep_last=training_config.get('keep_last_checkpoints', 5),
+    keep_best=training_config.get('keep_best_checkpoints', 3),
+)
+# Checkpoints in the model directory and next to this file can be loaded
+model_catalog = ModelCatalog([training_config.get('model_dir', 'models'), BASE_DIR])
+model_loader = ModelLoader(agent, model_catalog)
 
-# Game state
-ai_mode = False
-training_mode = False
-target_episodes = DEFAULT_TRAINING_ROUNDS
-current_episode = 0
-episode_scores = []
-training_stats = {
-    'scores': [],
-    'avg_score': 0,
-    'best_score': 0,
-    'epsilon': agent.epsilon
-}
-all_scores = []
-manual_direction = 'RIGHT'  # Default direction
+# Every transition from training sessions is optionally streamed to disk
+if training_config.get('dataset_dir'):
+    agent.exporter = TransitionExporter(
+        training_config['dataset_dir'], agent.state_size, STATE_FEATURE_NAMES,
+        shard_size=training_config.get('dataset_shard_size', 50000),
+        fmt=training_config.get('dataset_format', 'npz'),
+        metadata={'source': 'backend_server'},
+    )
 
-# --- Game State Serialization ---
+# Policy queries from other services, micro-batched into shared forward passes
+inference = MicroBatcher(
+    agent,
+    max_batch=server_config.get('inference_max_batch', 256),
+    max_latency_ms=server_config.get('inference_max_latency_ms', 5),
+)
 
-def get_game_state():
-    mode = 'training' if training_mode else ('ai' if ai_mode else 'manual')
-    return {
-        'snake': game_engine.snake.get_body_positions(),
-        'food': game_engine.food.get_position(),
-        'score': game_engine.score,
-        'steps': game_engine.steps,
-        'grid_width': game_engine.grid_width,
-        'grid_height': game_engine.grid_height,
-        'mode': mode,
-        'training': training_mode,
-        'current_episode': current_episode,
-        'target_episodes': target_episodes,
-        'game_over': game_engine.is_game_over(),
-        'stats': {
-            'all_scores': all_scores,
-            'best': max(all_scores) if all_scores else 0,
-            'avg': sum(all_scores) / len(all_scores) if all_scores else 0,
-            'last': all_scores[-1] if all_scores else 0,
-            'epsilon': agent.epsilon
-        }
-    }
+# Replay updates run on a torch thread, evaluations in a process pool
+compute = ComputeExecutor(agent, process_workers=training_config.get('eval_workers', 2))
+
+
+def on_episode_complete(session):
+    """Periodic checkpointing driven by training.save_frequency."""
+    save_frequency = training_config.get('save_frequency', 0)
+    if save_frequency and session.current_episode % save_frequency == 0:
+        # Sessions count episodes independently, so names carry the session id;
+        # the recent mean score lets keep_best retain the strongest saves
+        checkpoint_writer.save(
+            agent, f'dqn_snake_{session.id}_ep{session.current_episode}.pth',
+            score=session.score_stats.window_mean,
+            metadata={'episode': session.current_episode,
+                      'session': session.id, 'source': 'periodic'}
+        )
+
+
+# One GameEngine per session; all AI sessions share the agent
+sessions = SessionManager(
+    agent, GRID_W, GRID_H, CELL_SIZE, DEFAULT_TRAINING_ROUNDS,
+    idle_timeout=SESSION_IDLE_TIMEOUT, max_sessions=MAX_SESSIONS,
+    on_episode_complete=on_episode_complete,
+    learn=compute.request_update,
+)
+
+# --- Metrics ---
+# Hot-path counters and histograms live next to the code they measure;
+# these gauges are read from the live objects at scrape time only
+
+def _session_throughput(key):
+    return sum(s.get_throughput()[key] for s in sessions.sessions.values())
+
+REGISTRY.gauge('snake_sessions', 'Live game sessions', fn=lambda: len(sessions.sessions))
+REGISTRY.gauge('snake_ws_clients', 'Connected WebSocket clients',
+               fn=lambda: sum(len(s.broadcaster.channels) for s in sessions.sessions.values()))
+REGISTRY.gauge('snake_env_steps_per_second', 'Environment steps per second across sessions',
+               fn=lambda: _session_throughput('env_steps_per_sec'))
+REGISTRY.gauge('snake_learner_updates_per_second', 'Replay updates per second across sessions',
+               fn=lambda: _session_throughput('updates_per_sec'))
+REGISTRY.gauge('snake_replay_size', 'Transitions in the replay buffer', fn=lambda: len(agent.memory))
+REGISTRY.gauge('snake_epsilon', 'Exploration rate of the live agent', fn=lambda: agent.epsilon)
+REGISTRY.gauge('snake_learner_updates_pending', 'Replay updates queued on the torch thread',
+               fn=lambda: compute.pending_updates)
 
 # --- Command Handling ---
 
-async def handle_command(cmd, ws=None):
-    global ai_mode, training_mode, target_episodes, current_episode
-    global episode_scores, manual_direction, game_engine, all_scores
+async def handle_command(session, cmd, ws=None):
     action = cmd.get('action')
-    print(f"Received command: {action}")
+    log.debug("command %s", action, extra={'session': session.id, 'action': action})
+    if action in ('toggle_mode', 'set_mode', 'start_training', 'pause_training',
+                  'start_round', 'set_grid', 'reset'):
+        # Any mode or game change takes the session back from a headless run
+        session.stop_headless()
     if action == 'toggle_mode':
         # Toggle between manual and AI modes (training is separate)
-        if training_mode:
+        if session.training_mode:
             # If in training, stop training and go to manual
-            training_mode = False
-            ai_mode = False
-        elif ai_mode:
+            session.training_mode = False
+            session.ai_mode = False
+        elif session.ai_mode:
             # If in AI mode, go to manual
-            ai_mode = False
+            session.ai_mode = False
         else:
             # If in manual, go to AI mode
-            ai_mode = True
-        print(f"Mode changed - AI: {ai_mode}, Training: {training_mode}")
+            session.ai_mode = True
+        log.info("mode changed to %s", session.mode, extra={'session': session.id})
     elif action == 'set_mode':
         # Set mode directly
         mode = cmd.get('mode', 'manual')
-        print(f"Setting mode to: {mode}")
         if mode == 'training':
-            training_mode = True
-            ai_mode = True
-            current_episode = 0
-            episode_scores = []
-            game_engine.reset()  # Start training immediately
-            print("Started training mode")
+            session.training_mode = True
+            session.ai_mode = True
+            session.current_episode = 0
+            session.episode_scores = []
+            session.game_engine.reset()  # Start training immediately
         elif mode == 'ai':
-            training_mode = False
-            ai_mode = True
-            print("Set to AI mode")
+            session.training_mode = False
+            session.ai_mode = True
         elif mode == 'manual':
-            training_mode = False
-            ai_mode = False
-            print("Set to manual mode")
-        print(f"Mode set to: {mode} - AI: {ai_mode}, Training: {training_mode}")
+            session.training_mode = False
+            session.ai_mode = False
+        log.info("mode set to %s", session.mode, extra={'session': session.id})
     elif action == 'start_training':
-        training_mode = True
-        ai_mode = True
-        current_episode = 0
-        episode_scores = []
-        game_engine.reset()  # Start training immediately
-        print("Started training mode")
+        if cmd.get('headless'):
+            # Train as fast as possible on a worker; clients get sampled frames
+            session.start_headless(agent)
+            log.info("started headless training", extra={'session': session.id})
+        else:
+            session.training_mode = True
+            session.ai_mode = True
+            session.current_episode = 0
+            session.episode_scores = []
+            session.game_engine.reset()  # Start training immediately
+            log.info("started training", extra={'session': session.id})
     elif action == 'pause_training':
-        training_mode = False
-        ai_mode = False
-        print("Paused training mode")
+        session.training_mode = False
+        session.ai_mode = False
+        log.info("paused training", extra={'session': session.id})
     elif action == 'start_round':
         # Start a new round in current mode
-        game_engine.reset()
-        manual_direction = 'RIGHT'  # Reset to default
-        mode_str = ('training' if training_mode else
-                   ('ai' if ai_mode else 'manual'))
-        print(f"Started round in mode: {mode_str}")
+        session.game_engine.reset()
+        session.manual_direction = 'RIGHT'  # Reset to default
+        log.debug("started round in mode %s", session.mode, extra={'session': session.id})
     elif action == 'set_grid':
         w = int(cmd.get('width', 15))
         h = int(cmd.get('height', 17))
         if w > 3 and h > 3:
-            game_engine = GameEngine(w, h, CELL_SIZE)
+            session.game_engine = GameEngine(w, h, CELL_SIZE)
             # Ensure game is stopped after grid change
-            game_engine.game_over = True
-            current_episode = 0
-            episode_scores = []
-            all_scores = []
-            print(f"Set grid to {w}x{h}")
+            session.game_engine.game_over = True
+            session.current_episode = 0
+            session.episode_scores = []
+            session.score_stats.reset()
+            log.info("set grid to %dx%d", w, h, extra={'session': session.id})
     elif action == 'set_training_rounds':
-        target_episodes = int(cmd.get('rounds', DEFAULT_TRAINING_ROUNDS))
-        print(f"Set training rounds to {target_episodes}")
+        session.target_episodes = int(cmd.get('rounds', DEFAULT_TRAINING_ROUNDS))
+        log.info("set training rounds to %d", session.target_episodes,
+                 extra={'session': session.id})
+    elif action == 'set_speed':
+        # 'slow' / 'normal' / 'turbo', or an explicit tick_rate in Hz (0 = turbo)
+        if session.set_speed(cmd.get('speed'), cmd.get('tick_rate')):
+            log.info("set speed to %s", session.speed, extra={'session': session.id})
+        if ws:
+            await session.broadcaster.send(ws, json.dumps({
+                "type": "speed",
+                "speed": session.speed,
+                "tick_rate": 1.0 / session.tick_interval if session.tick_interval else 0.0
+            }))
     elif action == 'manual_direction':
         d = cmd.get('direction')
         if d in ['UP', 'DOWN', 'LEFT', 'RIGHT']:
-            manual_direction = d
-            print(f"Set manual direction to {d}")
+            session.manual_direction = d
+            log.debug("set manual direction to %s", d, extra={'session': session.id})
     elif action == 'reset':
-        all_scores.append(game_engine.score)
-        game_engine.reset()
-        current_episode = 0
-        print("Reset game")
+        session.score_stats.append(session.game_engine.score)
+        session.game_engine.reset()
+        session.current_episode = 0
+        log.info("reset game", extra={'session': session.id})
+    elif action == 'resync':
+        # Delta client detected a sequence gap; resend the current keyframe
+        keyframe = session.delta_encoder.current_keyframe()
+        if ws and keyframe is not None:
+            await session.broadcaster.send(ws, keyframe)
     elif action == 'save_model':
         # Save model with episode info
-        filename = f'dqn_snake_ep{current_episode}.pth'
-        agent.save_model(filename)
-        print(f"Model saved as {filename}")
+        # Snapshot now, write on the checkpoint thread; manual saves are pinned
+        # and named apart from periodic ones so those can never replace them
+        filename = f'manual_{session.id}_ep{session.current_episode}.pth'
+        future = checkpoint_writer.save(
+            agent, filename, score=session.score_stats.window_mean, pinned=True,
+            metadata={'episode': session.current_episode,
+                      'session': session.id, 'source': 'manual'}
+        )
+        entry = await asyncio.wrap_future(future)
+        log.info("model saved as %s", filename,
+                 extra={'bytes': entry['bytes'], 'write_ms': entry['write_ms']})
         if ws:
-            await ws.send_text(json.dumps({
+            await session.broadcaster.send(ws, json.dumps({
                 "type": "save_model",
-                "filename": filename
+                "filename": filename,
+                "bytes": entry['bytes'],
+                "write_ms": entry['write_ms']
             }))
-    elif action == 'evaluate_model':
-        # Evaluate model for 20 episodes with epsilon=0
-        eval_episodes = int(cmd.get('episodes', 20))
-        scores = []
-        orig_epsilon = agent.epsilon
-        for _ in range(eval_episodes):
-            game_engine.reset()
-            while not game_engine.is_game_over():
-                state = game_engine.get_state_for_ai()
-                action = agent.act(state, epsilon=0.0)
-                directions = ['UP', 'DOWN', 'LEFT', 'RIGHT']
-                direction = directions[action]
-                game_engine.change_direction(direction)
-                game_engine.move_snake()
-                if game_engine.check_food_collision():
-                    game_engine.eat_food()
-                    game_engine.spawn_food()
-            scores.append(game_engine.score)
-        agent.epsilon = orig_epsilon
-        avg_score = sum(scores) / len(scores) if scores else 0
-        print(f"Evaluation complete. Avg score: {avg_score}")
+    elif action == 'list_models':
+        models = await asyncio.to_thread(model_catalog.scan)
         if ws:
-            await ws.send_text(json.dumps({
-                "type": "evaluation_result",
-                "avg_score": avg_score,
-                "scores": scores
+            await session.broadcaster.send(ws, json.dumps({
+                "type": "models", "models": models, "active": model_loader.active
             }))
+    elif action in ('load_model', 'preload_model', 'activate_model'):
+        # Load on the loader thread; load_model also swaps it in between ticks
+        try:
+            result = await load_model(cmd.get('model'), action)
+            reply = {"type": "model_loaded", "action": action, "model": result}
+        except Exception as e:
+            log.warning("model %s failed: %s", action, e)
+            reply = {"type": "model_error", "action": action, "error": str(e)}
+        if ws:
+            await session.broadcaster.send(ws, json.dumps(reply))
+    elif action == 'evaluate_model':
+        # Greedy evaluation runs in the process pool; reply with a job id
+        # now, then stream progress and the result to the requesting client
+        eval_episodes = int(cmd.get('episodes', 20))
+        max_steps = int(cmd.get('max_steps', 1000))
+        engine = session.game_engine
+
+        async def send(payload):
+            if ws and ws in session.broadcaster.channels:
+                await session.broadcaster.send(ws, json.dumps(payload))
+
+        async def on_progress(job):
+            await send({"type": "job_progress", "job_id": job['id'],
+                        "done": job['done'], "total": job['total']})
+
+        async def on_done(job):
+            result = job['result']
+            if job['status'] != 'done':
+                log.warning("evaluation job %d failed: %s", job['id'], result['error'])
+                await send({"type": "job_failed", "job_id": job['id'],
+                            "error": result['error']})
+                return
+            log.info("evaluation job %d complete", job['id'],
+                     extra={'avg_score': result['avg_score'], 'elapsed_s': job['elapsed']})
+            await send({"type": "evaluation_result", "job_id": job['id'],
+                        "avg_score": result['avg_score'], "scores": result['scores']})
+
+        job = compute.submit_evaluation(
+            (engine.grid_width, engine.grid_height, CELL_SIZE), eval_episodes,
+            max_steps=max_steps, on_progress=on_progress, on_done=on_done,
+        )
+        await send({"type": "job", "job_id": job['id'], "kind": job['kind'],
+                    "total": job['total']})
     # Add more commands as needed
 
+# Preload and activate share ModelLoader's single standby slot; one
+# request at a time so a load always activates the model it preloaded
+model_swap_lock = asyncio.Lock()
+
+async def load_model(model_id, action='load_model'):
+    """Preload and/or activate a catalog model without blocking the loop."""
+    entry = None
+    async with model_swap_lock:
+        if action in ('load_model', 'preload_model'):
+            if not model_id:
+                raise ValueError("No model given")
+            entry = await asyncio.wrap_future(model_loader.preload(model_id))
+            log.info("preloaded %s", entry.get('id'), extra={'load_ms': entry['load_ms']})
+        if action in ('load_model', 'activate_model'):
+            # On the torch thread, so the swap waits for any in-flight update
+            entry = await asyncio.wrap_future(compute.run_torch(model_loader.activate))
+            log.info("activated %s", entry.get('id'), extra={'swap_us': entry['swap_us']})
+    return entry
+
 # --- Game Loop ---
 
-async def game_loop():
-    global ai_mode, training_mode, current_episode, episode_scores
-    global manual_direction, all_scores
-    while True:
-        # Determine if we should move the snake
-        should_move = False
-        
-        if training_mode:
-            # Training mode: always move, auto-restart on game over
-            should_move = True
-        elif ai_mode and not game_engine.is_game_over():
-            # AI mode: move only if game is not over
-            should_move = True
-        elif (not ai_mode and not training_mode and
-              not game_engine.is_game_over()):
-            # Manual mode: move only if game is not over
-            should_move = True
-            
-        if should_move:
-            if ai_mode or training_mode:
-                # AI/Training mode logic
-                state = game_engine.get_state_for_ai()
-                action = agent.act(state)
-                directions = ['UP', 'DOWN', 'LEFT', 'RIGHT']
-                direction = directions[action]
-                game_engine.change_direction(direction)
-                game_engine.move_snake()
-                if game_engine.check_food_collision():
-                    game_engine.eat_food()
-                    game_engine.spawn_food()
-                if game_engine.is_game_over():
-                    reward = -10
-                    next_state = game_engine.get_state_for_ai()
-                    agent.remember(state, action, reward, next_state, True)
-                    if len(agent.memory) > 32:
-                        agent.replay()
-                    all_scores.append(game_engine.score)
-                    if training_mode:
-                        episode_scores.append(game_engine.score)
-                        current_episode += 1
-                        if current_episode >= target_episodes:
-                            training_mode = False
-                            ai_mode = False
-                            print("Training completed!")
-                        else:
-                            # Auto-restart in training mode
-                            game_engine.reset()
-                    # In AI mode, do NOT reset - let game stay over until
-                    # user clicks start
-                else:
-                    reward = 1 if game_engine.check_food_collision() else 0
-                    next_state = game_engine.get_state_for_ai()
-                    agent.remember(state, action, reward, next_state, False)
-            else:
-                # Manual mode logic
-                game_engine.change_direction(manual_direction)
-                game_engine.move_snake()
-                if game_engine.check_food_collision():
-                    game_engine.eat_food()
-                    game_engine.spawn_food()
-                if game_engine.is_game_over():
-                    all_scores.append(game_engine.score)
-                    # Do NOT reset in manual mode - let game stay over until
-                    # user clicks start
-                    
-        # Broadcast state to all clients
-        state_json = json.dumps(get_game_state())
-        for ws in set(clients):
-            try:
-                await ws.send_text(state_json)
-            except Exception:
-                clients.remove(ws)
-        await asyncio.sleep(0.1)
+# Steps each session on its own deadline (one batched forward pass for all
+# due AI sessions) and queues its state for its clients
+scheduler = TickScheduler(sessions.tick)
 
 @app.on_event("startup")
 async def startup_event():
-    asyncio.create_task(game_loop())
+    asyncio.create_task(scheduler.run())
+    compute.warm_up()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    scheduler.stop()
+    compute.close()
+    model_loader.close()
+    inference.close()
+    if agent.exporter is not None:
+        agent.exporter.close()
+
+@app.get("/models")
+async def list_models():
+    models = await asyncio.to_thread(model_catalog.scan)
+    return {"models": models, "active": model_loader.active,
+            "standby": model_loader.standby[0] if model_loader.standby else None}
+
+@app.post("/models/load")
+async def load_model_endpoint(model: str, preload_only: bool = False):
+    try:
+        entry = await load_model(model, 'preload_model' if preload_only else 'load_model')
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"model": entry}
+
+@app.post("/models/activate")
+async def activate_model_endpoint():
+    try:
+        return {"model": await load_model(None, 'activate_model')}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/metrics/models")
+async def model_metrics():
+    metrics = model_loader.get_metrics()
+    metrics['checkpoint_writes'] = checkpoint_writer.get_metrics()
+    return metrics
+
+@app.post("/inference")
+async def inference_endpoint(request: Request, format: str = 'json'):
+    """
+    Greedy actions and Q-values for observation vectors.
+
+    Body: JSON {"observations": [[...], ...]} (or {"observation": [...]}),
+    or raw little-endian float32 rows with Content-Type
+    application/octet-stream. Add ?format=binary for a binary response
+    (see src/server/inference.py for the layout).
+    """
+    try:
+        if request.headers.get('content-type', '').startswith('application/octet-stream'):
+            states = np.frombuffer(await request.body(), dtype='<f4')
+            states = states.reshape(-1, agent.state_size)
+        else:
+            body = await request.json()
+            observations = body['observations'] if 'observations' in body else [body['observation']]
+            states = np.asarray(observations, dtype=np.float32)
+        actions, q_values = await inference.infer(states)
+    except (ValueError, KeyError, TypeError) as e:
+        return Response(json.dumps({"error": str(e)}), status_code=400,
+                        media_type='application/json')
+
+    if format == 'binary':
+        return Response(encode_binary(actions, q_values), media_type='application/octet-stream')
+    return {
+        "actions": actions.tolist(),
+        "directions": [['UP', 'DOWN', 'LEFT', 'RIGHT'][a] for a in actions],
+        "q_values": q_values.tolist(),
+    }
+
+@app.get("/metrics/inference")
+async def inference_metrics():
+    return inference.get_metrics()
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: int):
+    return compute.job_info(job_id) or {"error": "unknown job"}
+
+@app.get("/metrics/compute")
+async def compute_metrics():
+    return compute.get_metrics()
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return Response(REGISTRY.render(), media_type='text/plain; version=0.0.4')
+
+@app.get("/metrics/broadcast")
+async def broadcast_metrics():
+    channels = [s.broadcaster.get_metrics() for s in sessions.sessions.values()]
+    totals = {}
+    for metrics in channels:
+        for key, value in metrics.items():
+            if key == 'queue_depth_max':
+                totals[key] = max(totals.get(key, 0), value)
+            else:
+                totals[key] = totals.get(key, 0) + value
+    return totals
+
+@app.get("/metrics/sessions")
+async def session_metrics():
+    metrics = sessions.get_metrics()
+    metrics['scheduler'] = scheduler.get_metrics()
+    return metrics
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
-    clients.add(websocket)
+    # Clients opt into delta frames with /ws?protocol=delta1; JSON otherwise
+    protocol = websocket.query_params.get('protocol', PROTOCOL_JSON)
+    if protocol not in (PROTOCOL_JSON, PROTOCOL_DELTA):
+        protocol = PROTOCOL_JSON
+    # Join an existing game with /ws?session=<id>; otherwise start a new one
+    session = sessions.get(websocket.query_params.get('session'))
+    if session is None:
+        session = sessions.create()
+        if session is None:
+            await websocket.close(code=1013)  # Try again later
+            return
+    broadcaster = session.broadcaster
+    broadcaster.add(websocket, protocol)
+    await broadcaster.send(websocket, json.dumps({
+        "type": "session",
+        "session_id": session.id
+    }))
+    if protocol == PROTOCOL_DELTA:
+        keyframe = session.delta_encoder.current_keyframe()
+        if keyframe is not None:
+            await broadcaster.send(websocket, keyframe)
     try:
         while True:
             data = await websocket.receive_text()
             try:
                 cmd = json.loads(data)
-                await handle_command(cmd, ws=websocket)
+                await handle_command(session, cmd, ws=websocket)
             except Exception as e:
-                print(f"Error handling command: {e}")
+                log.exception("error handling command: %s", e, extra={'session': session.id})
     except WebSocketDisconnect:
-        clients.remove(websocket) 
\ No newline at end of file
+        pass
+    finally:
+        broadcaster.remove(websocket)
+        session.last_active = time.monotonic()
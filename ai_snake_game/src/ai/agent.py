@@ -1,14 +1,21 @@
 import torch
 import torch.nn as nn
 import torch.optim as optim
+import copy
 import random
+import threading
 import numpy as np
+from contextlib import nullcontext
 from typing import Optional, List, Dict, Any
 
-from .network import FeatureDQN
+from .network import ConvGridDQN, FeatureDQN
 from .memory import ReplayMemory
 
 
+# config['network_type'] values DQNAgent can build
+NETWORK_TYPES = ('FeatureDQN', 'ConvGridDQN')
+
+
 class DQNAgent:
     """
     Deep Q-Network agent for learning Snake gameplay.
@@ -27,6 +34,11 @@ class DQNAgent:
     - memory: Experience replay buffer
     - q_network: Main neural network
     - target_network: Target network for stability
+
+    ``config['network_type']`` picks the network: ``FeatureDQN`` (default)
+    takes flat observation vectors of ``state_size`` values, ``ConvGridDQN``
+    takes 2-D grid observations of any size (``state_size`` is then only
+    recorded, and may be 0 for an uncropped grid).
     """
 
     def __init__(self, state_size: int, action_size: int, config: Dict[str, Any]):
@@ -35,6 +47,7 @@ class DQNAgent:
         self.action_size = action_size
         self.memory = ReplayMemory(config['memory_size'])
         self.epsilon = config['epsilon_start']
+        self.epsilon_start = config['epsilon_start']
         self.epsilon_min = config['epsilon_end']
         self.epsilon_decay = config['epsilon_decay']
         self.learning_rate = config['learning_rate']
@@ -43,9 +56,10 @@ class DQNAgent:
         self.step_count = 0
 
         # Neural networks
-        hidden_sizes = config['hidden_layers']
-        self.q_network = FeatureDQN(state_size, hidden_sizes)
-        self.target_network = FeatureDQN(state_size, hidden_sizes)
+        self.network_type = config.get('network_type', 'FeatureDQN')
+        self.hidden_layers = list(config['hidden_layers'])
+        self.q_network = self._build_network()
+        self.target_network = self._build_network()
         self.optimizer = optim.Adam(self.q_network.parameters(), lr=self.learning_rate)
 
         # Copy weights to target network
@@ -55,6 +69,31 @@ class DQNAgent:
         self.last_q_values = None
         self.last_action_probs = None
 
+        # Optional utils.profiler.Profiler, attached by AITrainer
+        self.profiler = None
+        # Optional dataset.TransitionExporter receiving every remembered transition
+        self.exporter = None
+
+        # Held while weights are read for acting or written by the optimizer,
+        # so replay can run on a worker thread while the game loop acts
+        self.update_lock = threading.Lock()
+        # Serializes whole replay calls when several threads train the agent
+        self.replay_lock = threading.Lock()
+
+    def _build_network(self) -> nn.Module:
+        if self.network_type == 'FeatureDQN':
+            return FeatureDQN(self.state_size, self.hidden_layers)
+        if self.network_type == 'ConvGridDQN':
+            return ConvGridDQN(self.hidden_layers)
+        raise ValueError(f"Unsupported network_type {self.network_type!r}; "
+                         f"expected one of {NETWORK_TYPES}")
+
+    def _section(self, name: str):
+        """Return a profiler section, or a no-op when no profiler is attached."""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.section(name)
+
     def act(self, state: np.ndarray, epsilon: Optional[float] = None) -> int:
         """Choose action using epsilon-greedy policy."""
         if epsilon is None:
@@ -64,7 +103,8 @@ class DQNAgent:
             return random.choice(range(self.action_size))
 
         state_tensor = torch.FloatTensor(state).unsqueeze(0)
-        q_values = self.q_network(state_tensor)
+        with self.update_lock:
+            q_values = self.q_network(state_tensor)
         
         # Store for visualization
         self.last_q_values = q_values.detach().numpy().flatten()
@@ -75,32 +115,57 @@ class DQNAgent:
         
         return q_values.argmax().item()
 
+    def act_batch(self, states: np.ndarray, epsilon: Optional[float] = None) -> np.ndarray:
+        """Choose actions for a batch of states with one forward pass."""
+        if epsilon is None:
+            epsilon = self.epsilon
+
+        with torch.no_grad(), self.update_lock:
+            q_values = self.q_network(torch.as_tensor(states, dtype=torch.float32))
+        actions = q_values.argmax(dim=1).numpy()
+
+        # Epsilon-greedy per row
+        explore = np.random.random(len(actions)) <= epsilon
+        if explore.any():
+            actions[explore] = np.random.randint(0, self.action_size, explore.sum())
+        return actions
+
     def remember(self, state: np.ndarray, action: int, reward: float,
                 next_state: np.ndarray, done: bool) -> None:
         """Store experience in replay buffer."""
         self.memory.push(state, action, reward, next_state, done)
+        if self.exporter is not None:
+            self.exporter.add(state, action, reward, next_state, done)
 
     def replay(self) -> Optional[float]:
         """Train the network on a batch of experiences."""
         if len(self.memory) < self.batch_size:
             return None
-
-        batch = self.memory.sample(self.batch_size)
-        states = torch.FloatTensor([e[0] for e in batch])
-        actions = torch.LongTensor([e[1] for e in batch])
-        rewards = torch.FloatTensor([e[2] for e in batch])
-        next_states = torch.FloatTensor([e[3] for e in batch])
-        dones = torch.BoolTensor([e[4] for e in batch])
-
-        current_q_values = self.q_network(states).gather(1, actions.unsqueeze(1))
-        next_q_values = self.target_network(next_states).max(1)[0].detach()
-        target_q_values = rewards + (0.99 * next_q_values * ~dones)
-
-        loss = nn.MSELoss()(current_q_values.squeeze(), target_q_values)
-
-        self.optimizer.zero_grad()
-        loss.backward()
-        self.optimizer.step()
+        with self.replay_lock:
+            return self._replay()
+
+    def _replay(self) -> float:
+        with self._section('replay_sample'):
+            batch = self.memory.sample(self.batch_size)
+        with self._section('replay_tensors'):
+            states = torch.FloatTensor([e[0] for e in batch])
+            actions = torch.LongTensor([e[1] for e in batch])
+            rewards = torch.FloatTensor([e[2] for e in batch])
+            next_states = torch.FloatTensor([e[3] for e in batch])
+            dones = torch.BoolTensor([e[4] for e in batch])
+
+        with self._section('replay_forward'):
+            current_q_values = self.q_network(states).gather(1, actions.unsqueeze(1))
+            next_q_values = self.target_network(next_states).max(1)[0].detach()
+            target_q_values = rewards + (0.99 * next_q_values * ~dones)
+
+            loss = nn.MSELoss()(current_q_values.squeeze(), target_q_values)
+
+        with self._section('replay_backward'):
+            self.optimizer.zero_grad()
+            loss.backward()
+            with self.update_lock:
+                self.optimizer.step()
 
         # Update epsilon
         if self.epsilon > self.epsilon_min:
@@ -109,7 +174,8 @@ class DQNAgent:
         # Update target network
         self.step_count += 1
         if self.step_count % self.target_update_freq == 0:
-            self.update_target_network()
+            with self._section('target_sync'), self.update_lock:
+                self.update_target_network()
 
         return loss.item()
 
@@ -119,35 +185,57 @@ class DQNAgent:
 
     def load_model(self, filepath: str) -> None:
         """Load trained model from file."""
-        checkpoint = torch.load(filepath)
-        self.q_network.load_state_dict(checkpoint['q_network_state_dict'])
-        self.target_network.load_state_dict(checkpoint['target_network_state_dict'])
-        self.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
-        self.epsilon = checkpoint.get('epsilon', self.epsilon)
-        self.step_count = checkpoint.get('step_count', 0)
+        self.load_checkpoint_dict(torch.load(filepath))
 
     def save_model(self, filepath: str) -> None:
         """Save current model to file."""
-        checkpoint = {
-            'q_network_state_dict': self.q_network.state_dict(),
-            'target_network_state_dict': self.target_network.state_dict(),
-            'optimizer_state_dict': self.optimizer.state_dict(),
+        torch.save(self.checkpoint_dict(), filepath)
+
+    def checkpoint_dict(self, snapshot: bool = False) -> Dict[str, Any]:
+        """
+        Build the checkpoint dict written by save_model.
+
+        Args:
+            snapshot: Copy tensors and optimizer state so the dict stays
+                valid while training continues (for background writers)
+        """
+        q_state = self.q_network.state_dict()
+        target_state = self.target_network.state_dict()
+        optimizer_state = self.optimizer.state_dict()
+        if snapshot:
+            with self.update_lock:
+                q_state = {k: v.detach().clone() for k, v in q_state.items()}
+                target_state = {k: v.detach().clone() for k, v in target_state.items()}
+                optimizer_state = copy.deepcopy(optimizer_state)
+        return {
+            'q_network_state_dict': q_state,
+            'target_network_state_dict': target_state,
+            'optimizer_state_dict': optimizer_state,
             'epsilon': self.epsilon,
             'step_count': self.step_count,
             'config': {
                 'state_size': self.state_size,
                 'action_size': self.action_size,
-                'hidden_layers': [256, 128],  # Default config
+                'network_type': self.network_type,
+                'hidden_layers': list(self.hidden_layers),
                 'learning_rate': self.learning_rate,
                 'batch_size': self.batch_size,
                 'memory_size': self.memory.capacity,
-                'epsilon_start': 1.0,
+                'epsilon_start': self.epsilon_start,
                 'epsilon_end': self.epsilon_min,
                 'epsilon_decay': self.epsilon_decay,
                 'target_update_frequency': self.target_update_freq
             }
         }
-        torch.save(checkpoint, filepath)
+
+    def load_checkpoint_dict(self, checkpoint: Dict[str, Any]) -> None:
+        """Restore networks, optimizer and schedule from a checkpoint dict."""
+        with self.update_lock:
+            self.q_network.load_state_dict(checkpoint['q_network_state_dict'])
+            self.target_network.load_state_dict(checkpoint['target_network_state_dict'])
+            self.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
+        self.epsilon = checkpoint.get('epsilon', self.epsilon)
+        self.step_count = checkpoint.get('step_count', 0)
 
     def get_action_values(self, state: np.ndarray) -> np.ndarray:
         """Get Q-values for all actions in a given state."""
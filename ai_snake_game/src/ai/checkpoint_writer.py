@@ -0,0 +1,178 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import torch
+
+from ..utils.metrics import REGISTRY
+from ..utils.stats import MetricSeries
+
+
+MANIFEST_FILE = 'checkpoints.json'
+
+WRITE_SECONDS = REGISTRY.histogram('snake_checkpoint_write_seconds',
+                                   'Checkpoint serialize + fsync + publish time')
+WRITE_BYTES = REGISTRY.counter('snake_checkpoint_bytes_written', 'Checkpoint bytes written')
+WRITE_FAILURES = REGISTRY.counter('snake_checkpoint_write_failures', 'Failed checkpoint writes')
+
+
+class CheckpointWriter:
+    """
+    Background checkpoint writer with atomic publish and retention.
+
+    ``save`` snapshots the agent on the calling thread and returns a
+    Future immediately. A single worker thread serializes to a temporary
+    file, fsyncs it, publishes it with an atomic rename and then applies
+    retention: the newest ``keep_last`` checkpoints and the ``keep_best``
+    highest-scoring ones are kept, pinned checkpoints are never deleted
+    and only another pinned save may overwrite one. A JSON manifest next
+    to the files records each checkpoint's metadata.
+    """
+
+    def __init__(self, directory: str, keep_last: int = 5, keep_best: int = 3):
+        """Initialize writer for ``directory`` (created if missing)."""
+        self.directory = directory
+        self.keep_last = keep_last
+        self.keep_best = keep_best
+        os.makedirs(directory, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='checkpoint')
+        self._lock = threading.Lock()
+        self.entries: List[Dict[str, Any]] = self._load_manifest()
+
+        # Metrics
+        self.write_latency_ms = MetricSeries(window=100)
+        self.bytes_written = 0
+        self.writes = 0
+        self.failures = 0
+
+    def save(self, agent, filename: str, score: Optional[float] = None,
+             pinned: bool = False, metadata: Optional[Dict[str, Any]] = None) -> Future:
+        """Snapshot an agent and queue it for writing."""
+        return self.submit(agent.checkpoint_dict(snapshot=True), filename,
+                           score=score, pinned=pinned, metadata=metadata)
+
+    def submit(self, checkpoint: Dict[str, Any], filename: str,
+               score: Optional[float] = None, pinned: bool = False,
+               metadata: Optional[Dict[str, Any]] = None) -> Future:
+        """
+        Queue an already-snapshotted checkpoint dict for writing.
+
+        The Future resolves to the manifest entry of the published file.
+        """
+        entry = {
+            'file': filename,
+            'score': score,
+            'pinned': pinned,
+            'created': time.time(),
+            'metadata': metadata or {},
+        }
+        return self._executor.submit(self._write, checkpoint, entry)
+
+    def _write(self, checkpoint: Dict[str, Any], entry: Dict[str, Any]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        path = os.path.join(self.directory, entry['file'])
+        tmp_path = path + '.tmp'
+        with self._lock:
+            pinned = any(e['pinned'] for e in self.entries if e['file'] == entry['file'])
+        if pinned and not entry['pinned']:
+            self.failures += 1
+            WRITE_FAILURES.inc()
+            raise FileExistsError(f"Refusing to overwrite pinned checkpoint {entry['file']}")
+        try:
+            with open(tmp_path, 'wb') as f:
+                torch.save(checkpoint, f)
+                f.flush()
+                os.fsync(f.fileno())
+                size = f.tell()
+            os.replace(tmp_path, path)
+            self._fsync_directory()
+        except Exception:
+            self.failures += 1
+            WRITE_FAILURES.inc()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        entry['bytes'] = size
+        entry['write_ms'] = latency_ms
+        self.write_latency_ms.append(latency_ms)
+        self.bytes_written += size
+        self.writes += 1
+        WRITE_SECONDS.observe(latency_ms / 1000)
+        WRITE_BYTES.inc(size)
+
+        with self._lock:
+            self.entries = [e for e in self.entries if e['file'] != entry['file']]
+            self.entries.append(entry)
+            self._apply_retention()
+            self._save_manifest()
+        return entry
+
+    def _apply_retention(self) -> None:
+        """Delete checkpoints outside the keep-last / keep-best sets."""
+        keep = {e['file'] for e in self.entries if e['pinned']}
+        newest = sorted(self.entries, key=lambda e: e['created'], reverse=True)
+        keep.update(e['file'] for e in newest[:self.keep_last])
+        scored = [e for e in self.entries if e['score'] is not None]
+        best = sorted(scored, key=lambda e: e['score'], reverse=True)
+        keep.update(e['file'] for e in best[:self.keep_best])
+
+        for entry in self.entries:
+            if entry['file'] not in keep:
+                try:
+                    os.remove(os.path.join(self.directory, entry['file']))
+                except FileNotFoundError:
+                    pass
+        self.entries = [e for e in self.entries if e['file'] in keep]
+
+    def _fsync_directory(self) -> None:
+        """Make the rename durable (no-op where directories can't be opened)."""
+        try:
+            fd = os.open(self.directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def _load_manifest(self) -> List[Dict[str, Any]]:
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            entries = json.load(f)
+        # Drop entries whose files were removed by hand
+        return [e for e in entries if os.path.exists(os.path.join(self.directory, e['file']))]
+
+    def _save_manifest(self) -> None:
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def best(self) -> Optional[Dict[str, Any]]:
+        """Return the manifest entry with the highest score, if any."""
+        with self._lock:
+            scored = [e for e in self.entries if e['score'] is not None]
+        return max(scored, key=lambda e: e['score']) if scored else None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Return write latency and volume metrics."""
+        return {
+            'writes': self.writes,
+            'failures': self.failures,
+            'bytes_written': self.bytes_written,
+            'write_ms': self.write_latency_ms.summary(),
+        }
+
+    def close(self, wait: bool = True) -> None:
+        """Stop the worker, optionally waiting for queued writes."""
+        self._executor.shutdown(wait=wait)
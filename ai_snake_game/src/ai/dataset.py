@@ -0,0 +1,302 @@
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional
+    pa = None
+    pq = None
+
+
+SCHEMA_FILE = 'schema.json'
+SCHEMA_VERSION = 1
+FORMATS = ('npz', 'npy', 'parquet')
+
+# Transition columns: name -> dtype (state columns are (rows, state_size))
+COLUMNS = {
+    'states': 'float32',
+    'actions': 'uint8',
+    'rewards': 'float32',
+    'next_states': 'float32',
+    'dones': 'bool',
+}
+
+
+class TransitionExporter:
+    """
+    Streams (state, action, reward, next_state, done) transitions to shards.
+
+    Rows are copied into preallocated column arrays; every ``shard_size``
+    rows the full arrays are handed to a writer thread and fresh ones are
+    allocated, so ``add`` stays a handful of array stores. Shard formats:
+
+    - ``npz``: compressed ``.npz`` per shard (smallest)
+    - ``npy``: one uncompressed ``.npy`` per column per shard, which
+      ``OfflineDataset`` memory-maps
+    - ``parquet``: one scalar column per observation feature (needs pyarrow)
+
+    ``schema.json`` records the observation layout (feature names), column
+    dtypes and the shard list. The writer thread rewrites it atomically
+    after every shard, so a crash loses at most the shards still in flight
+    and a later exporter on the same directory continues the numbering;
+    ``close`` flushes the last partial shard and writes it a final time.
+    """
+
+    def __init__(self, directory: str, state_size: int,
+                 feature_names: Optional[List[str]] = None, shard_size: int = 50000,
+                 fmt: str = 'npz', metadata: Optional[Dict[str, Any]] = None):
+        """Initialize exporter writing into ``directory`` (created if missing)."""
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown dataset format {fmt!r}; expected one of {FORMATS}")
+        if fmt == 'parquet' and pa is None:
+            raise ImportError("Parquet export requires pyarrow")
+        if feature_names and len(feature_names) != state_size:
+            raise ValueError(f"{len(feature_names)} feature names for "
+                             f"{state_size} observation values")
+        self.directory = directory
+        self.state_size = state_size
+        self.feature_names = list(feature_names or [f'f{i}' for i in range(state_size)])
+        self.shard_size = shard_size
+        self.format = fmt
+        self.metadata = metadata or {}
+        os.makedirs(directory, exist_ok=True)
+
+        # Shards already in the directory are kept; new ones are appended
+        self.shards: List[Dict[str, Any]] = []
+        schema_path = os.path.join(directory, SCHEMA_FILE)
+        if os.path.exists(schema_path):
+            with open(schema_path) as f:
+                existing = json.load(f)
+            if existing['format'] != fmt or existing['state_size'] != state_size:
+                raise ValueError(f"{directory} holds a {existing['format']} dataset with "
+                                 f"state size {existing['state_size']}")
+            self.shards = existing['shards']
+        self._next_shard = len(self.shards)
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dataset')
+        self._lock = threading.Lock()
+        self._pending: List[Future] = []
+        self.rows = 0
+        self._buffers = self._allocate()
+        self._fill = 0
+
+    def _allocate(self) -> Dict[str, np.ndarray]:
+        return {
+            'states': np.empty((self.shard_size, self.state_size), dtype=np.float32),
+            'actions': np.empty(self.shard_size, dtype=np.uint8),
+            'rewards': np.empty(self.shard_size, dtype=np.float32),
+            'next_states': np.empty((self.shard_size, self.state_size), dtype=np.float32),
+            'dones': np.empty(self.shard_size, dtype=bool),
+        }
+
+    def add(self, state, action: int, reward: float, next_state, done: bool) -> None:
+        """Append one transition (same arguments as ``DQNAgent.remember``)."""
+        with self._lock:
+            i = self._fill
+            buffers = self._buffers
+            buffers['states'][i] = state
+            buffers['actions'][i] = action
+            buffers['rewards'][i] = reward
+            buffers['next_states'][i] = next_state
+            buffers['dones'][i] = done
+            self._fill += 1
+            self.rows += 1
+            if self._fill == self.shard_size:
+                self._flush_locked()
+
+    def dump(self, transitions: Iterable[Tuple]) -> int:
+        """Export an iterable of transitions (e.g. ``agent.memory.memory``); returns the count."""
+        count = 0
+        for state, action, reward, next_state, done in transitions:
+            self.add(state, action, reward, next_state, done)
+            count += 1
+        return count
+
+    def flush(self) -> None:
+        """Write the current partial shard."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._fill:
+            return
+        columns = {name: array[:self._fill] for name, array in self._buffers.items()}
+        name = f'shard_{self._next_shard:05d}'
+        self._next_shard += 1
+        self._pending.append(self._executor.submit(self._write_shard, name, columns))
+        self._buffers = self._allocate()
+        self._fill = 0
+
+    def _write_shard(self, name: str, columns: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        rows = len(columns['actions'])
+        if self.format == 'npz':
+            files = [name + '.npz']
+            np.savez_compressed(os.path.join(self.directory, files[0]), **columns)
+        elif self.format == 'npy':
+            os.makedirs(os.path.join(self.directory, name), exist_ok=True)
+            files = [os.path.join(name, column + '.npy') for column in columns]
+            for file, array in zip(files, columns.values()):
+                np.save(os.path.join(self.directory, file), array)
+        else:
+            files = [name + '.parquet']
+            table = {}
+            for prefix, key in (('state', 'states'), ('next', 'next_states')):
+                for i, feature in enumerate(self.feature_names):
+                    table[f'{prefix}_{feature}'] = columns[key][:, i]
+            for key in ('actions', 'rewards', 'dones'):
+                table[key] = columns[key]
+            pq.write_table(pa.table(table), os.path.join(self.directory, files[0]),
+                           compression='zstd')
+        shard = {'name': name, 'rows': rows, 'files': files,
+                 'write_ms': (time.perf_counter() - start) * 1000}
+        # Only the (single) writer thread appends, so shards stay in order
+        self.shards.append(shard)
+        self._write_schema()
+        return shard
+
+    def close(self) -> Dict[str, Any]:
+        """Flush everything, write the schema and return it."""
+        self.flush()
+        for future in self._pending:
+            future.result()
+        self._pending = []
+        self._executor.shutdown(wait=True)
+        return self._write_schema()
+
+    def _write_schema(self) -> Dict[str, Any]:
+        schema = {
+            'version': SCHEMA_VERSION,
+            'format': self.format,
+            'rows': sum(s['rows'] for s in self.shards),
+            'state_size': self.state_size,
+            'feature_names': self.feature_names,
+            'columns': {name: {'dtype': dtype,
+                               'shape': [self.state_size] if name.endswith('states') else []}
+                        for name, dtype in COLUMNS.items()},
+            'shards': [{'name': s['name'], 'rows': s['rows'], 'files': s['files']}
+                       for s in self.shards],
+            'metadata': self.metadata,
+            'created': time.time(),
+        }
+        path = os.path.join(self.directory, SCHEMA_FILE)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(schema, f, indent=2)
+        os.replace(path + '.tmp', path)
+        return schema
+
+
+class OfflineDataset:
+    """
+    Read-only transition dataset written by ``TransitionExporter``.
+
+    ``npy`` shards are memory-mapped, so a dataset larger than RAM only
+    pages in the rows that are sampled; ``npz`` shards are decompressed
+    on first use and ``parquet`` shards are read through a memory map.
+    ``as_memory`` wraps the dataset in a ReplayMemory-compatible object
+    so ``DQNAgent.replay`` can train from it unchanged.
+    """
+
+    def __init__(self, directory: str):
+        """Open the dataset in ``directory``."""
+        with open(os.path.join(directory, SCHEMA_FILE)) as f:
+            self.schema = json.load(f)
+        self.directory = directory
+        self.format = self.schema['format']
+        self.feature_names = self.schema['feature_names']
+        self.state_size = self.schema['state_size']
+        rows = [s['rows'] for s in self.schema['shards']]
+        self.offsets = np.concatenate([[0], np.cumsum(rows)]).astype(np.int64)
+        self._shards: Dict[int, Dict[str, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    def shard(self, index: int) -> Dict[str, np.ndarray]:
+        """Column arrays of one shard (opened lazily and kept)."""
+        columns = self._shards.get(index)
+        if columns is not None:
+            return columns
+        entry = self.schema['shards'][index]
+        paths = [os.path.join(self.directory, f) for f in entry['files']]
+        if self.format == 'npy':
+            columns = {os.path.splitext(os.path.basename(p))[0]: np.load(p, mmap_mode='r')
+                       for p in paths}
+        elif self.format == 'npz':
+            with np.load(paths[0]) as data:
+                columns = {name: data[name] for name in COLUMNS}
+        else:
+            if pq is None:
+                raise ImportError("Reading Parquet datasets requires pyarrow")
+            table = pq.read_table(paths[0], memory_map=True)
+            columns = {
+                'states': np.stack([table[f'state_{n}'].to_numpy() for n in self.feature_names],
+                                   axis=1),
+                'next_states': np.stack([table[f'next_{n}'].to_numpy()
+                                         for n in self.feature_names], axis=1),
+            }
+            for key in ('actions', 'rewards', 'dones'):
+                columns[key] = table[key].to_numpy()
+        self._shards[index] = columns
+        return columns
+
+    def gather(self, indices: np.ndarray) -> Dict[str, np.ndarray]:
+        """Rows at global ``indices`` as column arrays (in the given order)."""
+        indices = np.asarray(indices, dtype=np.int64)
+        shard_ids = np.searchsorted(self.offsets, indices, side='right') - 1
+        out = {
+            'states': np.empty((len(indices), self.state_size), dtype=np.float32),
+            'actions': np.empty(len(indices), dtype=np.int64),
+            'rewards': np.empty(len(indices), dtype=np.float32),
+            'next_states': np.empty((len(indices), self.state_size), dtype=np.float32),
+            'dones': np.empty(len(indices), dtype=bool),
+        }
+        for shard_id in np.unique(shard_ids):
+            mask = shard_ids == shard_id
+            rows = indices[mask] - self.offsets[shard_id]
+            columns = self.shard(int(shard_id))
+            for name, array in out.items():
+                array[mask] = columns[name][rows]
+        return out
+
+    def as_memory(self, seed: Optional[int] = None) -> 'OfflineReplayMemory':
+        return OfflineReplayMemory(self, seed)
+
+
+class OfflineReplayMemory:
+    """
+    ReplayMemory stand-in that samples from an ``OfflineDataset``.
+
+    Assign it to ``agent.memory`` for offline training: ``sample`` returns
+    the same (state, action, reward, next_state, done) tuples, and
+    ``push`` is ignored so acting code paths keep working.
+    """
+
+    def __init__(self, dataset: OfflineDataset, seed: Optional[int] = None):
+        self.dataset = dataset
+        self.capacity = len(dataset)
+        self.total_pushed = len(dataset)
+        self._rng = np.random.default_rng(seed if seed is not None else random.getrandbits(32))
+
+    def push(self, state, action: int, reward: float, next_state, done: bool) -> None:
+        pass
+
+    def sample(self, batch_size: int) -> List[Tuple]:
+        """Uniform sample of ``batch_size`` transitions (with replacement)."""
+        rows = self.dataset.gather(self._rng.integers(0, len(self.dataset), batch_size))
+        return list(zip(rows['states'], rows['actions'].tolist(), rows['rewards'].tolist(),
+                        rows['next_states'], rows['dones'].tolist()))
+
+    def __len__(self) -> int:
+        return len(self.dataset)
+
+    def is_full(self) -> bool:
+        return True
@@ -0,0 +1,168 @@
+import multiprocessing as mp
+import queue
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import torch
+
+from ..utils.log import get_logger
+
+log = get_logger('evaluator')
+
+# Longest single wait on the result queue before checking the process is alive
+LIVENESS_INTERVAL = 0.5
+
+
+def _evaluation_worker(spec: Dict[str, Any], requests, results) -> None:
+    """Evaluator process: rebuild the agent once, then score each weight snapshot."""
+    from ..game.game_engine import GameEngine
+    from .agent import DQNAgent
+    from .input_processor import InputProcessor
+    from .trainer import AITrainer
+
+    # Leave the cores to the learner
+    torch.set_num_threads(1)
+
+    config = spec['agent_config']
+    agent = DQNAgent(config['state_size'], config['action_size'], config)
+    agent.q_network.eval()
+    trainer = AITrainer(
+        agent,
+        GameEngine(spec['grid_width'], spec['grid_height'], spec['cell_size']),
+        InputProcessor(spec['input_type'], spec['input_config']),
+        {}
+    )
+
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        episode, weights = request
+        try:
+            agent.q_network.load_state_dict(
+                {k: torch.from_numpy(v) for k, v in weights.items()}
+            )
+            result = trainer.evaluate(spec['episodes'], max_steps=spec['max_steps'])
+            result['episode'] = episode
+        except Exception as e:
+            result = {'episode': episode, 'error': repr(e)}
+        results.put(result)
+
+
+class AsyncEvaluator:
+    """
+    Periodic greedy evaluation in a separate process.
+
+    The learner ships a copy of its Q-network weights with ``submit`` and
+    keeps training; finished evaluations are collected with ``poll``.
+    At most ``max_in_flight`` evaluations are queued so a slow evaluator
+    never builds up a backlog of stale snapshots.
+
+    If the process dies, ``poll`` returns an ``error`` result for every
+    evaluation it still held and the next ``submit`` starts a new process.
+    """
+
+    def __init__(self, spec: Dict[str, Any], max_in_flight: int = 2):
+        """
+        Start the evaluator process.
+
+        Args:
+            spec: agent_config (DQNAgent checkpoint config), input_type,
+                input_config, grid_width, grid_height, cell_size, episodes
+                and max_steps (per-episode step cap)
+            max_in_flight: Maximum evaluations queued or running
+        """
+        self.spec = spec
+        self.max_in_flight = max_in_flight
+        self.skipped = 0
+        self.restarts = 0
+        self._pending: Deque[int] = deque()  # Episodes submitted, in worker order
+        self._failed: List[Dict[str, Any]] = []  # Lost evaluations not yet polled
+        self._start()
+
+    def _start(self) -> None:
+        context = mp.get_context('spawn')
+        self._requests = context.Queue()
+        self._results = context.Queue()
+        self._process = context.Process(
+            target=_evaluation_worker,
+            args=(self.spec, self._requests, self._results),
+            daemon=True,
+        )
+        self._process.start()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    def submit(self, episode: int, q_network) -> bool:
+        """Queue an evaluation of the given network; False if the evaluator is saturated."""
+        if not self._process.is_alive():
+            # Report what the dead process held, then replace it
+            self._fail_pending()
+            log.warning("evaluator process exited with code %s; restarting",
+                        self._process.exitcode)
+            self.restarts += 1
+            self._start()
+        if self.in_flight >= self.max_in_flight:
+            self.skipped += 1
+            return False
+        weights = {k: v.detach().cpu().numpy().copy()
+                   for k, v in q_network.state_dict().items()}
+        self._requests.put((episode, weights))
+        self._pending.append(episode)
+        return True
+
+    def poll(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Return finished evaluation results.
+
+        With ``timeout=None`` this never blocks; otherwise it waits up to
+        ``timeout`` seconds for the first result.
+        """
+        results, self._failed = self._failed, []
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.in_flight:
+            wait = None
+            if deadline is not None and not results:
+                wait = min(max(deadline - time.monotonic(), 0.0), LIVENESS_INTERVAL)
+            try:
+                result = self._results.get(block=wait is not None, timeout=wait)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    self._fail_pending()
+                    results.extend(self._failed)
+                    self._failed = []
+                    break
+                if wait and time.monotonic() < deadline:
+                    continue
+                break
+            if result['episode'] in self._pending:
+                self._pending.remove(result['episode'])
+            results.append(result)
+        return results
+
+    def _fail_pending(self) -> None:
+        """Queue error results for the evaluations lost with a dead process."""
+        error = f'evaluator process exited with code {self._process.exitcode}'
+        self._failed.extend({'episode': episode, 'error': error} for episode in self._pending)
+        self._pending.clear()
+
+    def drain(self, timeout: float = 60.0) -> List[Dict[str, Any]]:
+        """Wait for all in-flight evaluations (bounded by ``timeout`` each)."""
+        results = self.poll()
+        while self.in_flight:
+            batch = self.poll(timeout=timeout)
+            if not batch:
+                break
+            results.extend(batch)
+        return results
+
+    def close(self) -> None:
+        """Stop the evaluator process."""
+        if self._process.is_alive():
+            self._requests.put(None)
+            self._process.join(timeout=5)
+            if self._process.is_alive():
+                self._process.terminate()
@@ -2,6 +2,45 @@ import numpy as np
 from typing import List, Dict, Any, Tuple
 
 
+# Grid value for cells outside the board in an egocentric crop
+OUTSIDE_VALUE = -1.0
+
+# config.yaml ``ai`` block holding each input type's options
+INPUT_CONFIG_KEYS = {
+    'features': 'feature_config',
+    'grid': 'grid_config',
+    'vision': 'vision_config',
+}
+
+
+def input_config_for(ai_config: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the options block of ``ai_config['input_type']`` (empty if absent)."""
+    input_type = ai_config['input_type']
+    if input_type not in INPUT_CONFIG_KEYS:
+        raise ValueError(f"Unknown input_type {input_type!r}; expected one of "
+                         f"{sorted(INPUT_CONFIG_KEYS)}")
+    return ai_config.get(INPUT_CONFIG_KEYS[input_type]) or {}
+
+
+def egocentric_crop(grid: np.ndarray, center: Tuple[int, int], radius: int,
+                    fill: float = OUTSIDE_VALUE) -> np.ndarray:
+    """
+    Return the (2 * radius + 1) square window of ``grid`` centred on ``center``.
+
+    Cells beyond the board edge are set to ``fill``, so walls stay visible
+    and the window has the same shape on every grid size.
+    """
+    size = 2 * radius + 1
+    x, y = center
+    grid_h, grid_w = grid.shape
+    window = np.full((size, size), fill, dtype=grid.dtype)
+    left, top = x - radius, y - radius
+    x0, y0 = max(left, 0), max(top, 0)
+    x1, y1 = min(x + radius + 1, grid_w), min(y + radius + 1, grid_h)
+    window[y0 - top:y1 - top, x0 - left:x1 - left] = grid[y0:y1, x0:x1]
+    return window
+
+
 class InputProcessor:
     """
     Modular system for different AI input representations.
@@ -190,14 +229,19 @@ class InputProcessor:
         for x, y in snake.positions[1:]:
             grid[y, x] = 1.0
 
-        # Add snake head (value 2)
+        # Add snake head (value 2); after a wall crash it is off the board
         head_x, head_y = snake.head
-        grid[head_y, head_x] = 2.0
+        if 0 <= head_x < grid_w and 0 <= head_y < grid_h:
+            grid[head_y, head_x] = 2.0
 
         # Add food (value 3)
         food_x, food_y = food.position
         grid[food_y, food_x] = 3.0
 
+        # Optional fixed-size window around the head (walls as OUTSIDE_VALUE)
+        crop_radius = self.config.get('crop_radius')
+        if crop_radius:
+            return egocentric_crop(grid, snake.head, crop_radius)
         return grid
 
     def _process_vision_input(self, game_state: Dict[str, Any]) -> np.ndarray:
@@ -233,6 +277,9 @@ class InputProcessor:
                 total_size += len(features)
             return total_size
         elif self.input_type == 'grid':
+            crop_radius = self.config.get('crop_radius')
+            if crop_radius:
+                return (2 * crop_radius + 1) ** 2
             # Grid size will be determined by game dimensions
             return 0  # Will be set dynamically
         elif self.input_type == 'vision':
@@ -1,5 +1,6 @@
 import random
 from collections import deque
+from itertools import islice
 from typing import List, Tuple, Optional
 import numpy as np
 
@@ -16,11 +17,13 @@ class ReplayMemory:
         """Initialize replay memory with specified capacity."""
         self.memory = deque(maxlen=capacity)
         self.capacity = capacity
+        self.total_pushed = 0  # Experiences ever pushed, including evicted ones
 
     def push(self, state: np.ndarray, action: int, reward: float,
              next_state: np.ndarray, done: bool) -> None:
         """Add experience to memory."""
         self.memory.append((state, action, reward, next_state, done))
+        self.total_pushed += 1
 
     def sample(self, batch_size: int) -> List[Tuple]:
         """Sample a batch of experiences from memory."""
@@ -39,6 +42,11 @@ class ReplayMemory:
     def clear(self) -> None:
         """Clear all stored experiences."""
         self.memory.clear()
+        self.total_pushed = 0
+
+    def latest(self, n: int) -> List[Tuple]:
+        """Return the ``n`` most recently pushed experiences, oldest first."""
+        return list(islice(reversed(self.memory), n))[::-1]
 
 
 class PrioritizedReplayMemory:
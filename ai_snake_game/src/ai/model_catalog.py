@@ -0,0 +1,259 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import torch
+
+from ..utils.metrics import REGISTRY
+from ..utils.stats import MetricSeries
+from .agent import DQNAgent
+from .checkpoint_writer import MANIFEST_FILE
+
+
+LOAD_SECONDS = REGISTRY.histogram('snake_model_load_seconds',
+                                  'Time to read a checkpoint and build a standby agent')
+
+
+def hidden_layers_from_state(state_dict: Dict[str, torch.Tensor]) -> List[int]:
+    """
+    Recover hidden layer sizes from a FeatureDQN state dict.
+
+    Older checkpoints recorded a default ``hidden_layers`` in their config
+    rather than the sizes actually trained, so the weights are the
+    source of truth.
+    """
+    weights = sorted(
+        ((int(name.split('.')[1]), tensor) for name, tensor in state_dict.items()
+         if name.startswith('network.') and name.endswith('.weight')),
+        key=lambda item: item[0]
+    )
+    return [tensor.shape[0] for _, tensor in weights[:-1]]
+
+
+class ModelCatalog:
+    """
+    Index of loadable ``.pth`` checkpoints across directories.
+
+    Metadata (network config, epsilon, step count, file size, plus score
+    and metadata from a CheckpointWriter manifest when present) is read
+    once per file and cached by (mtime, size), so listing is cheap after
+    the first scan. Reading uses ``mmap=True``, which maps the tensor
+    storages instead of reading them.
+    """
+
+    def __init__(self, directories: List[str]):
+        """Initialize catalog over the given directories (missing ones are skipped)."""
+        self.directories = [os.path.abspath(d) for d in directories]
+        self._cache: Dict[str, Tuple[Tuple[float, int], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def scan(self) -> List[Dict[str, Any]]:
+        """Return metadata for every checkpoint, newest first."""
+        entries = []
+        seen = set()
+        for directory in self.directories:
+            if not os.path.isdir(directory):
+                continue
+            manifest = self._manifest(directory)
+            for name in os.listdir(directory):
+                if not name.endswith('.pth'):
+                    continue
+                path = os.path.join(directory, name)
+                if path in seen:
+                    continue
+                seen.add(path)
+                entry = self.describe(path)
+                if entry is None:
+                    continue
+                entry = dict(entry)
+                if name in manifest:
+                    entry['score'] = manifest[name].get('score')
+                    entry['pinned'] = manifest[name].get('pinned', False)
+                    entry['metadata'] = manifest[name].get('metadata', {})
+                entries.append(entry)
+        with self._lock:
+            for path in list(self._cache):
+                if path not in seen:
+                    del self._cache[path]
+        return sorted(entries, key=lambda e: e['modified'], reverse=True)
+
+    def resolve(self, model_id: str) -> Optional[str]:
+        """Map a catalog id (``<dir name>/<file>`` or a bare file name) to a path."""
+        for entry in self.scan():
+            if model_id in (entry['id'], entry['file']):
+                return entry['path']
+        return None
+
+    def describe(self, path: str) -> Optional[Dict[str, Any]]:
+        """Return cached metadata for one checkpoint file (None if unreadable)."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = (stat.st_mtime, stat.st_size)
+        with self._lock:
+            cached = self._cache.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        entry = {
+            'id': f'{os.path.basename(os.path.dirname(path))}/{os.path.basename(path)}',
+            'file': os.path.basename(path),
+            'path': path,
+            'bytes': stat.st_size,
+            'modified': stat.st_mtime,
+        }
+        try:
+            checkpoint = torch.load(path, map_location='cpu', mmap=True, weights_only=False)
+            config = dict(checkpoint.get('config', {}))
+            if config.get('network_type', 'FeatureDQN') == 'FeatureDQN':
+                config['hidden_layers'] = hidden_layers_from_state(checkpoint['q_network_state_dict'])
+            entry.update({
+                'config': config,
+                'epsilon': checkpoint.get('epsilon'),
+                'step_count': checkpoint.get('step_count'),
+            })
+        except Exception as e:
+            entry['error'] = repr(e)
+        with self._lock:
+            self._cache[path] = (key, entry)
+        return entry
+
+    @staticmethod
+    def _manifest(directory: str) -> Dict[str, Dict[str, Any]]:
+        path = os.path.join(directory, MANIFEST_FILE)
+        try:
+            with open(path) as f:
+                return {e['file']: e for e in json.load(f)}
+        except (OSError, ValueError):
+            return {}
+
+
+class ModelLoader:
+    """
+    Background model loading with an atomic swap into the live agent.
+
+    ``preload`` reads a checkpoint and builds a complete standby agent on
+    a loader thread. ``activate`` swaps the standby networks, optimizer
+    and schedule into the live agent with a handful of reference
+    assignments under ``DQNAgent.update_lock`` (after waiting for any
+    in-flight replay via ``replay_lock``), so acting sessions never see a
+    half-loaded model and the swap itself takes microseconds. The live
+    agent object, and so every reference to it, is unchanged; its replay
+    memory is kept.
+    """
+
+    def __init__(self, agent: DQNAgent, catalog: ModelCatalog):
+        """Initialize loader for the live agent."""
+        self.agent = agent
+        self.catalog = catalog
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model-loader')
+        self.standby: Optional[Tuple[Dict[str, Any], DQNAgent]] = None
+        self.active: Optional[Dict[str, Any]] = None
+
+        # Metrics
+        self.load_ms = MetricSeries(window=100)
+        self.swap_us = MetricSeries(window=100)
+        self.loads = 0
+        self.failures = 0
+
+    def preload(self, model_id: str) -> Future:
+        """
+        Load a catalog model into the standby slot.
+
+        The Future resolves to the model's catalog entry (with ``load_ms``)
+        or raises if the model is unknown or incompatible.
+        """
+        return self._executor.submit(self._preload, model_id)
+
+    def _preload(self, model_id: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            path = self.catalog.resolve(model_id)
+            if path is None:
+                raise FileNotFoundError(f"Unknown model: {model_id}")
+            checkpoint = torch.load(path, map_location='cpu', weights_only=False)
+            standby = self._build_agent(checkpoint)
+        except Exception:
+            self.failures += 1
+            raise
+
+        entry = dict(self.catalog.describe(path) or {'path': path})
+        entry['load_ms'] = (time.perf_counter() - start) * 1000
+        self.load_ms.append(entry['load_ms'])
+        LOAD_SECONDS.observe(entry['load_ms'] / 1000)
+        self.standby = (entry, standby)
+        return entry
+
+    def _build_agent(self, checkpoint: Dict[str, Any]) -> DQNAgent:
+        live = self.agent
+        q_state = checkpoint['q_network_state_dict']
+        config = dict(checkpoint.get('config', {}))
+        network_type = config.get('network_type', 'FeatureDQN')
+        if network_type != live.network_type:
+            raise ValueError(f"Model is a {network_type}, live agent runs a {live.network_type}")
+        if config.get('state_size', live.state_size) != live.state_size:
+            raise ValueError(f"Model expects {config['state_size']} inputs, "
+                             f"live agent has {live.state_size}")
+        config.update({
+            'state_size': live.state_size,
+            'action_size': live.action_size,
+            'hidden_layers': hidden_layers_from_state(q_state),
+            # Keep the live agent's schedule and buffer settings
+            'learning_rate': config.get('learning_rate', live.learning_rate),
+            'batch_size': live.batch_size,
+            'memory_size': 1,
+            'epsilon_start': live.epsilon_start,
+            'epsilon_end': live.epsilon_min,
+            'epsilon_decay': live.epsilon_decay,
+            'target_update_frequency': live.target_update_freq,
+        })
+        standby = DQNAgent(live.state_size, live.action_size, config)
+        standby.load_checkpoint_dict(checkpoint)
+        return standby
+
+    def activate(self) -> Dict[str, Any]:
+        """
+        Swap the standby model into the live agent.
+
+        Blocks only while an in-flight replay finishes; call it off the
+        event loop (e.g. on the compute torch thread).
+        """
+        if self.standby is None:
+            raise RuntimeError("No model preloaded")
+        entry, standby = self.standby
+        live = self.agent
+        with live.replay_lock:
+            start = time.perf_counter()
+            with live.update_lock:
+                live.q_network = standby.q_network
+                live.target_network = standby.target_network
+                live.optimizer = standby.optimizer
+                live.hidden_layers = standby.hidden_layers
+                live.learning_rate = standby.learning_rate
+                live.epsilon = standby.epsilon
+                live.step_count = standby.step_count
+            swap_us = (time.perf_counter() - start) * 1e6
+        self.swap_us.append(swap_us)
+        self.standby = None
+        self.loads += 1
+        entry = dict(entry, swap_us=swap_us, activated=time.time())
+        self.active = entry
+        return entry
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Return load latency and swap cost."""
+        return {
+            'loads': self.loads,
+            'failures': self.failures,
+            'active': self.active.get('id') if self.active else None,
+            'standby': self.standby[0].get('id') if self.standby else None,
+            'load_ms': self.load_ms.summary(),
+            'swap_us': self.swap_us.summary(),
+        }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
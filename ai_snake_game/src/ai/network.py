@@ -50,7 +50,13 @@ class FeatureDQN(DQNetwork):
 
 
 class GridDQN(nn.Module):
-    """Neural network for grid-based input (full game board)."""
+    """
+    Neural network for grid-based input (full game board).
+
+    The flattened conv output ties ``fc1`` to one grid size and grows with
+    it (about 164M parameters at 100x100); see ConvGridDQN for a network
+    that runs on any grid.
+    """
     
     def __init__(self, grid_width: int, grid_height: int, hidden_sizes: List[int] = [256, 128]):
         super(GridDQN, self).__init__()
@@ -111,4 +117,116 @@ class VisionDQN(nn.Module):
         x = self.dropout(x)
         x = self.fc3(x)
         
-        return x 
\ No newline at end of file
+        return x
+
+
+class ConvGridDQN(nn.Module):
+    """
+    Fully convolutional network for grid input of any size.
+
+    Two stride-2 convolutions downsample the board and adaptive max
+    pooling reduces whatever remains to ``pooled_size`` x ``pooled_size``
+    cells, so the parameter count does not depend on the grid and one
+    trained model runs on every board. Convolution cost still grows with
+    the input area; feeding it an egocentric crop (InputProcessor
+    ``crop_radius``) bounds that too.
+    """
+
+    def __init__(self, hidden_sizes: List[int] = [256, 128], pooled_size: int = 4):
+        super(ConvGridDQN, self).__init__()
+
+        # Convolutional layers; conv2 and conv3 halve the resolution
+        self.conv1 = nn.Conv2d(1, 32, kernel_size=3, padding=1)
+        self.conv2 = nn.Conv2d(32, 64, kernel_size=3, stride=2, padding=1)
+        self.conv3 = nn.Conv2d(64, 64, kernel_size=3, stride=2, padding=1)
+        self.pool = nn.AdaptiveMaxPool2d(pooled_size)
+
+        # Fully connected layers on the fixed-size pooled map
+        self.fc1 = nn.Linear(64 * pooled_size * pooled_size, hidden_sizes[0])
+        self.fc2 = nn.Linear(hidden_sizes[0], hidden_sizes[1])
+        self.fc3 = nn.Linear(hidden_sizes[1], 4)
+
+        self.dropout = nn.Dropout(0.1)
+
+    def forward(self, x):
+        # x shape: (batch_size, 1, height, width) or (batch_size, height, width)
+        if x.dim() == 3:
+            x = x.unsqueeze(1)
+        x = F.relu(self.conv1(x))
+        x = F.relu(self.conv2(x))
+        x = F.relu(self.conv3(x))
+        x = self.pool(x).flatten(1)
+
+        x = F.relu(self.fc1(x))
+        x = self.dropout(x)
+        x = F.relu(self.fc2(x))
+        x = self.dropout(x)
+        x = self.fc3(x)
+
+        return x
+
+
+class PopulationDQN(nn.Module):
+    """
+    ``members`` independent DQNetworks evaluated as one batched network.
+
+    Each layer's weights are stacked along a leading member axis, so a
+    forward pass over a (members, batch, input_size) tensor is one
+    ``torch.baddbmm`` per layer instead of ``members`` small Linear calls,
+    and gradients stay separate per member. Member ``i`` computes exactly
+    what a DQNetwork with the same weights would; ``member_state_dict``
+    and ``load_member_state_dict`` convert to and from that layout.
+    """
+
+    def __init__(self, members: int, input_size: int, hidden_sizes: List[int],
+                 output_size: int = 4):
+        super(PopulationDQN, self).__init__()
+        self.members = members
+
+        # Initialize like separate DQNetworks, then stack (weights as in x out)
+        nets = [DQNetwork(input_size, hidden_sizes, output_size) for _ in range(members)]
+        linears = [[m for m in net.network if isinstance(m, nn.Linear)] for net in nets]
+        self.weights = nn.ParameterList([
+            nn.Parameter(torch.stack([layers[i].weight.detach().t() for layers in linears]))
+            for i in range(len(linears[0]))
+        ])
+        self.biases = nn.ParameterList([
+            nn.Parameter(torch.stack([layers[i].bias.detach().unsqueeze(0) for layers in linears]))
+            for i in range(len(linears[0]))
+        ])
+
+        self.dropout = nn.Dropout(0.1)
+
+    def forward(self, x):
+        # x shape: (members, batch_size, input_size)
+        last = len(self.weights) - 1
+        for i, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            x = torch.baddbmm(bias, x, weight)
+            if i < last:
+                x = self.dropout(F.relu(x))
+        return x
+
+    def _member_keys(self) -> List[str]:
+        # DQNetwork's Sequential holds Linear, ReLU, Dropout per hidden layer
+        return [f'network.{3 * i}' for i in range(len(self.weights))]
+
+    def member_state_dict(self, member: int) -> dict:
+        """State dict of one member in DQNetwork/FeatureDQN layout."""
+        state = {}
+        for key, weight, bias in zip(self._member_keys(), self.weights, self.biases):
+            state[f'{key}.weight'] = weight[member].detach().t().clone()
+            state[f'{key}.bias'] = bias[member, 0].detach().clone()
+        return state
+
+    def load_member_state_dict(self, member: int, state: dict) -> None:
+        """Load DQNetwork/FeatureDQN weights into one member."""
+        with torch.no_grad():
+            for key, weight, bias in zip(self._member_keys(), self.weights, self.biases):
+                weight[member].copy_(state[f'{key}.weight'].t())
+                bias[member, 0].copy_(state[f'{key}.bias'])
+
+    def copy_members_from(self, other: 'PopulationDQN', members) -> None:
+        """Copy the weights of ``members`` (indices) from another population."""
+        with torch.no_grad():
+            for mine, theirs in zip(self.parameters(), other.parameters()):
+                mine[members] = theirs[members]
@@ -0,0 +1,566 @@
+"""
+Population training: many DQN agents trained together in one process.
+
+PopulationAgent stacks the members' networks so acting and training are
+one batched forward/backward pass; PopulationTrainer steps one game
+engine per member in lockstep. ``population_sweep`` runs the PBT loop of
+src.ai.sweep on top of them, driven by the same ``sweep`` config section,
+as an alternative to one worker process per member for small networks.
+Only the MEMBER_KEYS hyperparameters in ``sweep.space`` vary per member;
+the rest (hidden_layers, batch_size, memory_size) come from ``ai`` and
+are shared. The output directory receives ``results.csv`` (rewritten
+after every round) and the final best member as ``best.pth``. Unlike the
+process sweep it does not resume.
+
+Run from ai_snake_game/:
+    python -m src.ai.population
+    python -m src.ai.population --population 64 --rounds 50 --output sweeps/pop
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import torch
+import yaml
+
+from ..game.game_engine import GameEngine
+from ..utils.stats import MetricSeries
+from .agent import DQNAgent
+from .input_processor import InputProcessor, input_config_for
+from .network import PopulationDQN
+from .sweep import exploit_and_explore, print_results, sample_hyperparameters
+from .trainer import ACTIONS
+
+RESULTS_FILE = 'results.csv'
+
+# Per-member hyperparameters; everything else (hidden_layers, batch_size,
+# memory_size) must be shared so the members stack
+MEMBER_KEYS = ('learning_rate', 'epsilon_start', 'epsilon_end', 'epsilon_decay',
+               'target_update_frequency')
+
+
+class MemberAdam:
+    """
+    Adam over PopulationDQN parameters with a learning rate per member.
+
+    Applies torch.optim.Adam's update (default betas and eps) to every
+    member slice of the stacked parameters, scaled by that member's
+    learning rate. Step counts are per member too, so ``reset_member``
+    restarts one member's moments without disturbing the others.
+    """
+
+    def __init__(self, params, learning_rates: np.ndarray,
+                 betas=(0.9, 0.999), eps: float = 1e-8):
+        self.params = list(params)
+        self.learning_rates = torch.as_tensor(learning_rates, dtype=torch.float32)
+        self.betas = betas
+        self.eps = eps
+        self.steps = torch.zeros(len(self.learning_rates))
+        self.exp_avg = [torch.zeros_like(p) for p in self.params]
+        self.exp_avg_sq = [torch.zeros_like(p) for p in self.params]
+
+    def zero_grad(self) -> None:
+        for p in self.params:
+            p.grad = None
+
+    @torch.no_grad()
+    def step(self) -> None:
+        beta1, beta2 = self.betas
+        self.steps += 1
+        step_size = self.learning_rates / (1 - beta1 ** self.steps)
+        bias_correction2 = 1 - beta2 ** self.steps
+        for p, exp_avg, exp_avg_sq in zip(self.params, self.exp_avg, self.exp_avg_sq):
+            if p.grad is None:
+                continue
+            shape = (-1,) + (1,) * (p.dim() - 1)
+            exp_avg.mul_(beta1).add_(p.grad, alpha=1 - beta1)
+            exp_avg_sq.mul_(beta2).addcmul_(p.grad, p.grad, value=1 - beta2)
+            denom = (exp_avg_sq / bias_correction2.view(shape)).sqrt_().add_(self.eps)
+            p.addcdiv_(exp_avg * step_size.view(shape), denom, value=-1)
+
+    def reset_member(self, member: int) -> None:
+        """Forget one member's moments (after its weights were replaced)."""
+        self.steps[member] = 0
+        for exp_avg, exp_avg_sq in zip(self.exp_avg, self.exp_avg_sq):
+            exp_avg[member] = 0
+            exp_avg_sq[member] = 0
+
+
+class PopulationMemory:
+    """
+    Replay buffers of every member as stacked ring-buffer arrays.
+
+    Members push in lockstep (one transition each per step), so one
+    position and size cover all of them and a batch for every member is a
+    single fancy-indexing gather per column.
+    """
+
+    def __init__(self, members: int, capacity: int, state_size: int):
+        self.members = members
+        self.capacity = capacity
+        self.states = np.zeros((members, capacity, state_size), dtype=np.float32)
+        self.actions = np.zeros((members, capacity), dtype=np.int64)
+        self.rewards = np.zeros((members, capacity), dtype=np.float32)
+        self.next_states = np.zeros((members, capacity, state_size), dtype=np.float32)
+        self.dones = np.zeros((members, capacity), dtype=bool)
+        self.position = 0
+        self.size = 0
+        self.total_pushed = 0
+        self._rows = np.arange(members)[:, None]
+
+    def push(self, states, actions, rewards, next_states, dones) -> None:
+        """Add one transition per member (each argument has a leading member axis)."""
+        i = self.position
+        self.states[:, i] = states
+        self.actions[:, i] = actions
+        self.rewards[:, i] = rewards
+        self.next_states[:, i] = next_states
+        self.dones[:, i] = dones
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self.total_pushed += 1
+
+    def sample(self, batch_size: int):
+        """Independent uniform batches per member as (members, batch, ...) tensors."""
+        idx = np.random.randint(0, self.size, (self.members, batch_size))
+        rows = self._rows
+        return (torch.from_numpy(self.states[rows, idx]),
+                torch.from_numpy(self.actions[rows, idx]),
+                torch.from_numpy(self.rewards[rows, idx]),
+                torch.from_numpy(self.next_states[rows, idx]),
+                torch.from_numpy(self.dones[rows, idx]))
+
+    def copy_member(self, source: int, dest: int) -> None:
+        """Replace one member's buffer with a copy of another's."""
+        for column in (self.states, self.actions, self.rewards, self.next_states, self.dones):
+            column[dest] = column[source]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def is_full(self) -> bool:
+        return self.size >= self.capacity
+
+
+class PopulationAgent:
+    """
+    A population of DQN agents trained together in one process.
+
+    Every member has its own weights, replay buffer, learning rate and
+    epsilon schedule, but acting and training run as one batched forward
+    and backward pass over all members (PopulationDQN), so a sweep of
+    small networks costs a few large matmuls per step instead of
+    ``members`` separate framework round trips.
+
+    ``config`` is a DQNAgent config; ``members`` is one dict of overrides
+    per member for the keys in MEMBER_KEYS.
+    """
+
+    def __init__(self, state_size: int, action_size: int, config: Dict[str, Any],
+                 members: List[Dict[str, Any]]):
+        """Initialize population from a shared config and per-member overrides."""
+        for overrides in members:
+            shared = set(overrides) - set(MEMBER_KEYS)
+            if shared:
+                raise ValueError(f"Cannot vary {sorted(shared)} per member; "
+                                 f"only {MEMBER_KEYS}")
+        if config.get('network_type', 'FeatureDQN') != 'FeatureDQN':
+            raise ValueError("PopulationAgent only batches FeatureDQN members")
+        self.state_size = state_size
+        self.action_size = action_size
+        self.config = dict(config)
+        self.member_configs = [dict(config, **overrides) for overrides in members]
+        self.members = len(members)
+        self.batch_size = config['batch_size']
+        self.hidden_layers = list(config['hidden_layers'])
+
+        def column(key, dtype=np.float64):
+            return np.array([c[key] for c in self.member_configs], dtype=dtype)
+
+        self.learning_rates = column('learning_rate')
+        self.epsilon = column('epsilon_start')
+        self.epsilon_min = column('epsilon_end')
+        self.epsilon_decay = column('epsilon_decay')
+        self.target_update_freq = column('target_update_frequency', np.int64)
+        self.step_count = 0
+
+        self.memory = PopulationMemory(self.members, config['memory_size'], state_size)
+        self.q_network = PopulationDQN(self.members, state_size, self.hidden_layers, action_size)
+        self.target_network = PopulationDQN(self.members, state_size, self.hidden_layers,
+                                            action_size)
+        self.optimizer = MemberAdam(self.q_network.parameters(), self.learning_rates)
+        self.update_target_network()
+
+    def act_batch(self, states: np.ndarray, epsilon: Optional[float] = None) -> np.ndarray:
+        """Epsilon-greedy action per member for (members, state_size) states."""
+        if epsilon is None:
+            epsilon = self.epsilon
+
+        with torch.no_grad():
+            q_values = self.q_network(torch.as_tensor(states, dtype=torch.float32).unsqueeze(1))
+        actions = q_values[:, 0].argmax(dim=1).numpy()
+
+        explore = np.random.random(self.members) <= epsilon
+        if explore.any():
+            actions[explore] = np.random.randint(0, self.action_size, explore.sum())
+        return actions
+
+    def remember(self, states, actions, rewards, next_states, dones) -> None:
+        """Store one transition per member."""
+        self.memory.push(states, actions, rewards, next_states, dones)
+
+    def replay(self) -> Optional[np.ndarray]:
+        """Train every member on its own batch; returns per-member losses."""
+        if len(self.memory) < self.batch_size:
+            return None
+        states, actions, rewards, next_states, dones = self.memory.sample(self.batch_size)
+
+        current_q = self.q_network(states).gather(2, actions.unsqueeze(2)).squeeze(2)
+        with torch.no_grad():
+            next_q = self.target_network(next_states).max(2)[0]
+        target_q = rewards + (0.99 * next_q * ~dones)
+
+        # Summing per-member means gives each member its standalone gradient
+        losses = ((current_q - target_q) ** 2).mean(dim=1)
+        self.optimizer.zero_grad()
+        losses.sum().backward()
+        self.optimizer.step()
+
+        # Update epsilon
+        decaying = self.epsilon > self.epsilon_min
+        self.epsilon[decaying] *= self.epsilon_decay[decaying]
+
+        # Update target networks on each member's own schedule
+        self.step_count += 1
+        due = np.flatnonzero(self.step_count % self.target_update_freq == 0)
+        if len(due):
+            self.update_target_network(due)
+
+        return losses.detach().numpy()
+
+    def update_target_network(self, members=None) -> None:
+        """Copy weights to the target network (all members or the given indices)."""
+        if members is None:
+            self.target_network.load_state_dict(self.q_network.state_dict())
+        else:
+            self.target_network.copy_members_from(self.q_network, torch.as_tensor(members))
+
+    def set_learning_rate(self, member: int, learning_rate: float) -> None:
+        self.learning_rates[member] = learning_rate
+        self.optimizer.learning_rates[member] = learning_rate
+        self.member_configs[member]['learning_rate'] = learning_rate
+
+    def set_member_hyperparameters(self, member: int, values: Dict[str, Any]) -> None:
+        """Change MEMBER_KEYS values of one member (e.g. after an explore step)."""
+        unknown = set(values) - set(MEMBER_KEYS)
+        if unknown:
+            raise ValueError(f"Cannot vary {sorted(unknown)} per member; only {MEMBER_KEYS}")
+        if 'learning_rate' in values:
+            self.set_learning_rate(member, values['learning_rate'])
+        columns = {'epsilon_end': self.epsilon_min, 'epsilon_decay': self.epsilon_decay,
+                   'target_update_frequency': self.target_update_freq}
+        for key, column in columns.items():
+            if key in values:
+                column[member] = values[key]
+        self.member_configs[member].update(values)
+
+    def copy_member(self, source: int, dest: int) -> None:
+        """Exploit step: ``dest`` takes ``source``'s weights, epsilon and replay buffer."""
+        for network in (self.q_network, self.target_network):
+            network.load_member_state_dict(dest, network.member_state_dict(source))
+        self.epsilon[dest] = self.epsilon[source]
+        self.memory.copy_member(source, dest)
+        self.optimizer.reset_member(dest)
+
+    def member_checkpoint_dict(self, member: int) -> Dict[str, Any]:
+        """
+        One member as a DQNAgent checkpoint dict (loadable by DQNAgent,
+        the evaluator and the backend). The optimizer state is fresh.
+        """
+        config = self.member_configs[member]
+        agent = DQNAgent(self.state_size, self.action_size, dict(config, memory_size=1))
+        agent.q_network.load_state_dict(self.q_network.member_state_dict(member))
+        agent.target_network.load_state_dict(self.target_network.member_state_dict(member))
+        agent.epsilon = float(self.epsilon[member])
+        agent.step_count = self.step_count
+        checkpoint = agent.checkpoint_dict()
+        checkpoint['config']['memory_size'] = config['memory_size']
+        return checkpoint
+
+    def load_member_checkpoint_dict(self, member: int, checkpoint: Dict[str, Any]) -> None:
+        """Load a DQNAgent checkpoint dict into one member and reset its optimizer moments."""
+        self.q_network.load_member_state_dict(member, checkpoint['q_network_state_dict'])
+        self.target_network.load_member_state_dict(member, checkpoint['target_network_state_dict'])
+        self.epsilon[member] = checkpoint.get('epsilon', self.epsilon[member])
+        self.optimizer.reset_member(member)
+
+
+class PopulationTrainer:
+    """
+    Trains a PopulationAgent with one game engine per member.
+
+    All engines advance in lockstep: one batched act, one step per engine,
+    one batched replay. An engine whose game ends (or runs past
+    ``max_episode_steps``) is reset on its own, so members finish
+    episodes at their own pace.
+    """
+
+    def __init__(self, agent: PopulationAgent, input_processor, grid_width: int,
+                 grid_height: int, cell_size: int = 20,
+                 config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize trainer.
+
+        Args:
+            agent: PopulationAgent to train
+            input_processor: InputProcessor shared by all members
+            grid_width, grid_height, cell_size: Engine dimensions
+            config: Optional ``stats_window``, ``max_episode_steps`` and
+                ``seed`` (member ``i`` plays on an engine seeded ``seed + i``)
+        """
+        config = config or {}
+        self.agent = agent
+        self.input_processor = input_processor
+        self.grid_width, self.grid_height, self.cell_size = grid_width, grid_height, cell_size
+        self.max_episode_steps = config.get('max_episode_steps')
+        self.seed = config.get('seed', 0)
+        self.engines = [GameEngine(grid_width, grid_height, cell_size, seed=self.seed + i)
+                        for i in range(agent.members)]
+        stats_window = config.get('stats_window', 100)
+        self.scores = [MetricSeries(window=stats_window) for _ in range(agent.members)]
+        self.losses = [MetricSeries(window=stats_window) for _ in range(agent.members)]
+        self.episodes = np.zeros(agent.members, dtype=np.int64)
+        self.best_scores = np.zeros(agent.members, dtype=np.int64)
+        self.total_steps = 0
+        self._states = np.stack([self._observe(engine) for engine in self.engines])
+
+    def _observe(self, engine: GameEngine) -> np.ndarray:
+        return self.input_processor.process_state(engine.get_state())
+
+    def train_steps(self, num_steps: int) -> None:
+        """Advance every member ``num_steps`` environment steps."""
+        agent = self.agent
+        rewards = np.zeros(agent.members, dtype=np.float32)
+        dones = np.zeros(agent.members, dtype=bool)
+        next_states = np.empty_like(self._states)
+        for _ in range(num_steps):
+            actions = agent.act_batch(self._states)
+            for i, engine in enumerate(self.engines):
+                rewards[i] = engine.update(ACTIONS[actions[i]])
+                next_states[i] = self._observe(engine)
+                dones[i] = engine.is_game_over()
+            agent.remember(self._states, actions, rewards, next_states, dones)
+            losses = agent.replay()
+            if losses is not None:
+                for series, loss in zip(self.losses, losses):
+                    series.append(float(loss))
+
+            self._states[:] = next_states
+            for i, engine in enumerate(self.engines):
+                if dones[i] or (self.max_episode_steps and engine.steps >= self.max_episode_steps):
+                    self._finish_episode(i)
+            self.total_steps += 1
+
+    def train(self, num_episodes: int) -> None:
+        """Run until every member has finished ``num_episodes`` more episodes."""
+        target = self.episodes + num_episodes
+        while (self.episodes < target).any():
+            self.train_steps(1)
+
+    def _finish_episode(self, member: int) -> None:
+        engine = self.engines[member]
+        score = engine.get_score()
+        self.scores[member].append(score)
+        self.best_scores[member] = max(self.best_scores[member], score)
+        self.episodes[member] += 1
+        engine.reset()
+        self._states[member] = self._observe(engine)
+
+    def evaluate(self, num_episodes: int, max_steps: Optional[int] = None) -> np.ndarray:
+        """
+        Mean greedy score per member over ``num_episodes`` games.
+
+        Every member plays the same food seeds, and all members step in
+        lockstep with one batched forward pass per step.
+        """
+        agent = self.agent
+        totals = np.zeros(agent.members)
+        agent.q_network.eval()
+        try:
+            for episode in range(num_episodes):
+                seed = self.seed + agent.members + episode
+                engines = [GameEngine(self.grid_width, self.grid_height, self.cell_size, seed=seed)
+                           for _ in range(agent.members)]
+                states = np.stack([self._observe(engine) for engine in engines])
+                active = np.ones(agent.members, dtype=bool)
+                steps = 0
+                while active.any() and (max_steps is None or steps < max_steps):
+                    actions = agent.act_batch(states, epsilon=0.0)
+                    for i in np.flatnonzero(active):
+                        engines[i].update(ACTIONS[actions[i]])
+                        states[i] = self._observe(engines[i])
+                        active[i] = not engines[i].is_game_over()
+                    steps += 1
+                totals += [engine.get_score() for engine in engines]
+        finally:
+            agent.q_network.train()
+        return totals / num_episodes
+
+    def get_training_stats(self) -> List[Dict[str, Any]]:
+        """Per-member summary: episodes, recent scores and loss, current hyperparameters."""
+        agent = self.agent
+        return [{
+            'member': i,
+            'episodes': int(self.episodes[i]),
+            'avg_score': self.scores[i].window_mean,
+            'best_score': int(self.best_scores[i]),
+            'avg_loss': self.losses[i].window_mean,
+            'epsilon': float(agent.epsilon[i]),
+            'learning_rate': float(agent.learning_rates[i]),
+        } for i in range(agent.members)]
+
+
+def population_sweep(config: Dict[str, Any], output_dir: str, rounds: Optional[int] = None,
+                     seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Run a PBT sweep with every member in one PopulationAgent.
+
+    Args:
+        config: Parsed config.yaml (``ai``, ``game`` and ``sweep`` sections)
+        output_dir: Directory for ``results.csv`` and ``best.pth``
+        rounds: Rounds to run (default: sweep.rounds)
+        seed: Seed for sampling, exploit/explore, engines and torch/numpy
+
+    Returns:
+        One result row per member per round
+    """
+    ai_config, game_config = config['ai'], config['game']
+    sweep_config = dict(config['sweep'])
+    sweep_config['space'] = {k: v for k, v in sweep_config['space'].items() if k in MEMBER_KEYS}
+    rounds = rounds or sweep_config['rounds']
+    seed = 0 if seed is None else seed
+
+    input_type = ai_config['input_type']
+    input_config = input_config_for(ai_config)
+    processor = InputProcessor(input_type, input_config)
+    state_size = processor.get_input_size()
+    if not state_size:
+        raise ValueError(f"input_type {input_type!r} with {input_config} yields no inputs")
+
+    rng = random.Random(seed)
+    random.seed(seed)
+    np.random.seed(seed % 2 ** 32)
+    torch.manual_seed(seed)
+    hyperparameters = [sample_hyperparameters(sweep_config['space'], rng)
+                       for _ in range(sweep_config['population'])]
+    agent_config = {key: ai_config[key] for key in (
+        'learning_rate', 'batch_size', 'memory_size', 'epsilon_start', 'epsilon_end',
+        'epsilon_decay', 'target_update_frequency', 'hidden_layers')}
+    agent_config['network_type'] = ai_config.get('network_type', 'FeatureDQN')
+    agent = PopulationAgent(state_size, 4, agent_config, hyperparameters)
+    grid_width, grid_height = game_config['grid_width'], game_config['grid_height']
+    max_steps = grid_width * grid_height * 4
+    trainer = PopulationTrainer(agent, processor, grid_width, grid_height,
+                                game_config['cell_size'], {
+                                    'stats_window': sweep_config['episodes_per_round'],
+                                    'max_episode_steps': max_steps,
+                                    'seed': seed,
+                                })
+
+    os.makedirs(output_dir, exist_ok=True)
+    history: List[Dict[str, Any]] = []
+    parents: List[Optional[int]] = [None] * agent.members
+    for round_index in range(rounds):
+        start = time.perf_counter()
+        trainer.train(sweep_config['episodes_per_round'])
+        scores = trainer.evaluate(sweep_config['evaluation_episodes'], max_steps=max_steps)
+        seconds = time.perf_counter() - start
+        results = [{
+            'round': round_index,
+            'member': i,
+            'parent': parents[i],
+            'score': float(scores[i]),
+            'train_score': trainer.scores[i].window_mean,
+            'episodes': int(trainer.episodes[i]),
+            'seconds': seconds,
+            **hyperparameters[i],
+        } for i in range(agent.members)]
+        history.extend(results)
+        _write_results(os.path.join(output_dir, RESULTS_FILE), history)
+        best = max(results, key=lambda r: r['score'])
+        print(f"Round {round_index + 1}/{rounds}: best member {best['member']} "
+              f"scored {best['score']:.2f} ({seconds:.1f} s)")
+
+        if round_index + 1 == rounds:
+            # Keep the evaluated weights of the final round for best.pth
+            break
+        parents = [None] * agent.members
+        copies = exploit_and_explore(results, dict(enumerate(hyperparameters)),
+                                     sweep_config, rng)
+        for loser, winner, values in copies:
+            agent.copy_member(winner, loser)
+            agent.set_member_hyperparameters(loser, values)
+            hyperparameters[loser] = values
+            parents[loser] = winner
+
+    checkpoint = agent.member_checkpoint_dict(best['member'])
+    checkpoint.update(input_type=input_type, input_config=input_config)
+    torch.save(checkpoint, os.path.join(output_dir, 'best.pth'))
+    return history
+
+
+def _write_results(path: str, history: List[Dict[str, Any]]) -> None:
+    """Atomically rewrite the results table (same layout as the process sweep)."""
+    with open(path + '.tmp', 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(history[0]))
+        writer.writeheader()
+        for row in history:
+            writer.writerow({k: json.dumps(v) if isinstance(v, list) else v
+                             for k, v in row.items()})
+    os.replace(path + '.tmp', path)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--output', help='Output directory (default: sweep.population_output_dir)')
+    parser.add_argument('--population', type=int, help='Members')
+    parser.add_argument('--rounds', type=int)
+    parser.add_argument('--episodes', type=int, help='Training episodes per member per round')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+    sweep_config = config['sweep']
+    if args.population:
+        sweep_config['population'] = args.population
+    if args.episodes:
+        sweep_config['episodes_per_round'] = args.episodes
+    output_dir = args.output or sweep_config.get('population_output_dir', 'sweeps/population')
+    shared = [k for k in sweep_config['space'] if k not in MEMBER_KEYS]
+    if shared:
+        print(f"Shared by all members (from ai config): {', '.join(shared)}")
+
+    print(f"{sweep_config['population']} members in one process")
+    try:
+        history = population_sweep(config, output_dir, rounds=args.rounds, seed=args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+
+    last_round = history[-1]['round']
+    latest = [r for r in history if r['round'] == last_round]
+    space = {k: v for k, v in sweep_config['space'].items() if k in MEMBER_KEYS}
+    print_results(latest, space)
+    best = max(latest, key=lambda r: r['score'])
+    print(f"Best member {best['member']} ({best['score']:.2f}) saved to "
+          f"{os.path.join(output_dir, 'best.pth')}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,418 @@
+"""
+Population-based hyperparameter sweep over a process pool.
+
+Each round every member trains ``episodes_per_round`` episodes with its
+own AITrainer in a worker process (one per core, pinned), then is scored
+by greedy evaluation. The bottom ``exploit_fraction`` of the population
+copies the training state (weights, optimizer, replay buffer) of a
+randomly chosen top member and perturbs its hyperparameters (explore).
+
+Everything lives under the output directory: ``sweep.json`` (round,
+members, history; rewritten atomically after each round), ``results.csv``
+(one row per member per round) and ``members/round_<n>/member_<i>/``
+(TrainingStateStore directories). An interrupted sweep resumes from the
+last completed round.
+
+Run from ai_snake_game/:
+    python -m src.ai.sweep
+    python -m src.ai.sweep --population 32 --rounds 50 --workers 16 --output sweeps/big
+"""
+import argparse
+import csv
+import json
+import math
+import multiprocessing as mp
+import os
+import random
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+import yaml
+
+from .input_processor import InputProcessor, input_config_for
+
+STATE_FILE = 'sweep.json'
+RESULTS_FILE = 'results.csv'
+MEMBERS_DIR = 'members'
+
+# Hyperparameters that change the network shape; inherited on exploit, never perturbed
+ARCHITECTURE_KEYS = ('hidden_layers',)
+
+
+def usable_cores() -> List[int]:
+    """CPU ids this process may run on."""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def sample_hyperparameters(space: Dict[str, Dict[str, Any]], rng: random.Random) -> Dict[str, Any]:
+    """Draw one value per key of ``space`` ({key: {uniform|log_uniform|choice: ...}})."""
+    values = {}
+    for key, spec in space.items():
+        if 'choice' in spec:
+            values[key] = rng.choice(spec['choice'])
+        elif 'log_uniform' in spec:
+            low, high = spec['log_uniform']
+            values[key] = math.exp(rng.uniform(math.log(low), math.log(high)))
+        elif 'uniform' in spec:
+            values[key] = rng.uniform(*spec['uniform'])
+        else:
+            raise ValueError(f"Unknown distribution for {key}: {spec}")
+    return values
+
+
+def perturb_hyperparameters(values: Dict[str, Any], space: Dict[str, Dict[str, Any]],
+                            rng: random.Random, factors: List[float]) -> Dict[str, Any]:
+    """
+    Explore step: scale log-uniform values by a random factor, shift
+    uniform values by (factor - 1) of their range (both clipped to the
+    range) and move choices to a neighbouring option.
+    """
+    perturbed = dict(values)
+    for key, spec in space.items():
+        if key in ARCHITECTURE_KEYS:
+            continue
+        if 'choice' in spec:
+            options = spec['choice']
+            index = options.index(values[key]) if values[key] in options else 0
+            index = min(max(index + rng.choice((-1, 1)), 0), len(options) - 1)
+            perturbed[key] = options[index]
+        elif 'log_uniform' in spec:
+            low, high = spec['log_uniform']
+            perturbed[key] = min(max(values[key] * rng.choice(factors), low), high)
+        else:
+            low, high = spec['uniform']
+            shift = (rng.choice(factors) - 1) * (high - low)
+            perturbed[key] = min(max(values[key] + shift, low), high)
+    return perturbed
+
+
+def exploit_and_explore(results: List[Dict[str, Any]], hyperparameters: Dict[int, Dict[str, Any]],
+                        sweep_config: Dict[str, Any],
+                        rng: random.Random) -> List[Tuple[int, int, Dict[str, Any]]]:
+    """
+    One PBT step: each of the bottom ``exploit_fraction`` members copies a
+    random top member. Returns (loser, winner, perturbed hyperparameters)
+    per copy, given the round's results and each member's hyperparameters.
+    """
+    ranked = sorted(results, key=lambda r: r['score'], reverse=True)
+    count = max(1, int(len(ranked) * sweep_config['exploit_fraction']))
+    if count * 2 > len(ranked):
+        return []
+    copies = []
+    for loser in ranked[-count:]:
+        winner = rng.choice(ranked[:count])['member']
+        copies.append((loser['member'], winner, perturb_hyperparameters(
+            hyperparameters[winner], sweep_config['space'], rng,
+            sweep_config['perturb_factors'],
+        )))
+    return copies
+
+
+def _pin_worker(cores) -> None:
+    """Pool initializer: pin this worker to one free core and use one torch thread."""
+    core = cores.get()
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {core})
+    torch.set_num_threads(1)
+
+
+def _train_member(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Worker: resume (or start) one member, train a round, evaluate, save its state."""
+    from ..game.game_engine import GameEngine
+    from .agent import DQNAgent
+    from .input_processor import InputProcessor
+    from .trainer import AITrainer
+
+    start = time.perf_counter()
+    hyperparameters = job['hyperparameters']
+    config = dict(job['agent_config'], **hyperparameters)
+    processor = InputProcessor(job['input_type'], job['input_config'])
+    agent = DQNAgent(processor.get_input_size(), 4, config)
+    engine = GameEngine(*job['grid'], job['cell_size'], seed=job['seed'])
+    trainer = AITrainer(agent, engine, processor, {'stats_window': job['episodes']})
+
+    dest = job['dest']
+    if os.path.exists(dest):
+        shutil.rmtree(dest)  # Left over from an interrupted round
+    if job['source']:
+        # Replay chunks are never rewritten in place, so hard links are safe
+        shutil.copytree(job['source'], dest, copy_function=os.link)
+        trainer.load_training_state(dest)
+        # The optimizer state carries the parent's learning rate
+        for group in agent.optimizer.param_groups:
+            group['lr'] = agent.learning_rate
+    # Fresh RNG streams so exploited copies diverge from their parent
+    random.seed(job['seed'])
+    np.random.seed(job['seed'] % 2 ** 32)
+    torch.manual_seed(job['seed'])
+
+    trainer.train(job['episodes'])
+    train_score = trainer.stats['scores'].window_mean
+    agent.q_network.eval()
+    evaluation = trainer.evaluate(job['evaluation_episodes'], max_steps=job['max_steps'])
+    agent.q_network.train()
+    trainer.save_training_state(dest, background=False)
+    trainer.close()
+
+    return {
+        'round': job['round'],
+        'member': job['member'],
+        'parent': job['parent'],
+        'score': evaluation['mean_score'],
+        'train_score': train_score,
+        'episodes': trainer.episode,
+        'seconds': time.perf_counter() - start,
+        'pid': os.getpid(),
+        **hyperparameters,
+    }
+
+
+class PBTSweep:
+    """
+    Population-based training driver (see module docstring).
+
+    Args:
+        config: Parsed config.yaml (``ai``, ``game`` and ``sweep`` sections)
+        output_dir: Sweep directory; an existing sweep there is resumed
+        workers: Worker processes (default: one per usable core)
+        seed: Seed for sampling and exploit/explore decisions
+    """
+
+    def __init__(self, config: Dict[str, Any], output_dir: str,
+                 workers: Optional[int] = None, seed: Optional[int] = None):
+        ai_config = config['ai']
+        self.input_type = ai_config['input_type']
+        self.input_config = input_config_for(ai_config)
+        if (ai_config.get('network_type', 'FeatureDQN') == 'FeatureDQN'
+                and InputProcessor(self.input_type, self.input_config).get_input_size() == 0):
+            raise ValueError(f"input_type {self.input_type!r} with {self.input_config} "
+                             f"yields no inputs for a FeatureDQN")
+        self.config = config
+        self.sweep_config = config['sweep']
+        self.output_dir = output_dir
+        os.makedirs(os.path.join(output_dir, MEMBERS_DIR), exist_ok=True)
+        self.cores = usable_cores()
+        self.workers = min(workers or self.sweep_config.get('workers') or len(self.cores),
+                           len(self.cores))
+
+        state_path = os.path.join(output_dir, STATE_FILE)
+        if os.path.exists(state_path):
+            with open(state_path) as f:
+                self.state = json.load(f)
+            self.rng = random.Random()
+            self.rng.setstate(_tuple_state(self.state['rng']))
+        else:
+            self.rng = random.Random(seed)
+            space = self.sweep_config['space']
+            self.state = {
+                'round': 0,
+                'members': [{
+                    'member': i,
+                    'hyperparameters': sample_hyperparameters(space, self.rng),
+                    'source': None,
+                    'parent': None,
+                } for i in range(self.sweep_config['population'])],
+                'history': [],
+            }
+
+    @property
+    def round(self) -> int:
+        return self.state['round']
+
+    def _round_dir(self, round_index: int) -> str:
+        return os.path.join(self.output_dir, MEMBERS_DIR, f'round_{round_index:03d}')
+
+    def _jobs(self) -> List[Dict[str, Any]]:
+        ai_config, game_config = self.config['ai'], self.config['game']
+        grid = [game_config['grid_width'], game_config['grid_height']]
+        agent_config = {
+            'learning_rate': ai_config['learning_rate'],
+            'batch_size': ai_config['batch_size'],
+            'memory_size': ai_config['memory_size'],
+            'epsilon_start': ai_config['epsilon_start'],
+            'epsilon_end': ai_config['epsilon_end'],
+            'epsilon_decay': ai_config['epsilon_decay'],
+            'target_update_frequency': ai_config['target_update_frequency'],
+            'network_type': ai_config.get('network_type', 'FeatureDQN'),
+            'hidden_layers': ai_config['hidden_layers'],
+        }
+        round_dir = self._round_dir(self.round)
+        return [{
+            'round': self.round,
+            'member': member['member'],
+            'parent': member['parent'],
+            'seed': self.rng.getrandbits(63),
+            'hyperparameters': member['hyperparameters'],
+            'source': member['source'],
+            'dest': os.path.join(round_dir, f"member_{member['member']:03d}"),
+            'agent_config': agent_config,
+            'input_type': self.input_type,
+            'input_config': self.input_config,
+            'grid': grid,
+            'cell_size': game_config['cell_size'],
+            'episodes': self.sweep_config['episodes_per_round'],
+            'evaluation_episodes': self.sweep_config['evaluation_episodes'],
+            'max_steps': grid[0] * grid[1] * 4,
+        } for member in self.state['members']]
+
+    def run(self, rounds: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Run (or resume) the sweep up to ``rounds`` rounds; returns the history."""
+        rounds = rounds or self.sweep_config['rounds']
+        if self.round >= rounds:
+            return self.state['history']
+
+        context = mp.get_context('spawn')
+        cores = context.Queue()
+        for core in self.cores[:self.workers]:
+            cores.put(core)
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                 initializer=_pin_worker, initargs=(cores,)) as pool:
+            while self.round < rounds:
+                start = time.perf_counter()
+                futures = [pool.submit(_train_member, job) for job in self._jobs()]
+                results = []
+                for future in as_completed(futures):
+                    results.append(future.result())
+                results.sort(key=lambda r: r['member'])
+                self._finish_round(results)
+                best = max(results, key=lambda r: r['score'])
+                print(f"Round {self.round}/{rounds}: best member {best['member']} "
+                      f"scored {best['score']:.2f} ({time.perf_counter() - start:.1f} s)")
+        return self.state['history']
+
+    def _finish_round(self, results: List[Dict[str, Any]]) -> None:
+        """
+        Record results, exploit/explore, then commit the round to disk.
+
+        Exploit/explore runs after every round, including the last one
+        requested, so a sweep resumed with more rounds continues exactly
+        as an uninterrupted one would.
+        """
+        round_dir = self._round_dir(self.round)
+        for member in self.state['members']:
+            member['source'] = os.path.join(round_dir, f"member_{member['member']:03d}")
+            member['parent'] = None
+        self._exploit_and_explore(results)
+
+        self.state['history'].extend(results)
+        self.state['round'] += 1
+        self.state['rng'] = self.rng.getstate()
+        self._save()
+
+        # The previous round's states are no longer referenced
+        previous = self._round_dir(self.round - 2)
+        if os.path.exists(previous):
+            shutil.rmtree(previous)
+
+    def _exploit_and_explore(self, results: List[Dict[str, Any]]) -> None:
+        """Bottom members take a top member's state with perturbed hyperparameters."""
+        members = {m['member']: m for m in self.state['members']}
+        hyperparameters = {i: m['hyperparameters'] for i, m in members.items()}
+        for loser, winner, values in exploit_and_explore(results, hyperparameters,
+                                                         self.sweep_config, self.rng):
+            member = members[loser]
+            member['source'] = members[winner]['source']
+            member['parent'] = winner
+            member['hyperparameters'] = values
+
+    def _save(self) -> None:
+        """Atomically rewrite sweep.json and results.csv."""
+        path = os.path.join(self.output_dir, STATE_FILE)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(path + '.tmp', path)
+
+        history = self.state['history']
+        fields = list(history[0]) if history else []
+        path = os.path.join(self.output_dir, RESULTS_FILE)
+        with open(path + '.tmp', 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for row in history:
+                writer.writerow({k: json.dumps(v) if isinstance(v, list) else v
+                                 for k, v in row.items()})
+        os.replace(path + '.tmp', path)
+
+    def best(self) -> Dict[str, Any]:
+        """Best result of the latest round."""
+        latest = [r for r in self.state['history'] if r['round'] == self.round - 1]
+        return max(latest, key=lambda r: r['score'])
+
+    def export_best(self, filepath: str) -> Dict[str, Any]:
+        """Write the latest round's best member as a DQNAgent checkpoint."""
+        best = self.best()
+        state_dir = os.path.join(self._round_dir(best['round']), f"member_{best['member']:03d}")
+        state = torch.load(os.path.join(state_dir, 'state.pt'), weights_only=False)
+        # Recorders (src.game.exporter) rebuild the observation from the
+        # input type/config the member trained with (sweeps before they were
+        # stored fall back to the sweep config)
+        torch.save(dict(state['agent'],
+                        input_type=state.get('input_type', self.input_type),
+                        input_config=state.get('input_config', self.input_config)),
+                   filepath)
+        return best
+
+
+def _tuple_state(state):
+    """random.Random state from its JSON form (lists back to tuples)."""
+    return tuple(_tuple_state(s) if isinstance(s, list) else s for s in state)
+
+
+def print_results(results: List[Dict[str, Any]], space: Dict[str, Any]) -> None:
+    """Print one round's results, best first."""
+    keys = list(space)
+    header = f"{'member':>6} {'parent':>6} {'score':>7} {'train':>7} " + ' '.join(
+        f'{k[:14]:>14}' for k in keys)
+    print(header)
+    print('-' * len(header))
+    for r in sorted(results, key=lambda r: r['score'], reverse=True):
+        values = ' '.join(f'{r[k]:>14.4g}' if isinstance(r[k], float) else f'{str(r[k]):>14}'
+                          for k in keys)
+        parent = '-' if r['parent'] is None else r['parent']
+        print(f"{r['member']:>6} {parent:>6} {r['score']:>7.2f} {r['train_score']:>7.2f} {values}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--output', help='Sweep directory (default: sweep.output_dir)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: usable cores)')
+    parser.add_argument('--population', type=int, help='Members (new sweeps only)')
+    parser.add_argument('--rounds', type=int)
+    parser.add_argument('--episodes', type=int, help='Training episodes per member per round')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+    sweep_config = config['sweep']
+    if args.population:
+        sweep_config['population'] = args.population
+    if args.episodes:
+        sweep_config['episodes_per_round'] = args.episodes
+    output_dir = args.output or sweep_config['output_dir']
+
+    try:
+        sweep = PBTSweep(config, output_dir, workers=args.workers, seed=args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    if sweep.round:
+        print(f"Resuming {output_dir} after round {sweep.round}")
+    print(f"{len(sweep.state['members'])} members on {sweep.workers} workers")
+    history = sweep.run(args.rounds)
+
+    latest = [r for r in history if r['round'] == sweep.round - 1]
+    print_results(latest, sweep_config['space'])
+    best = sweep.export_best(os.path.join(output_dir, 'best.pth'))
+    print(f"Best member {best['member']} ({best['score']:.2f}) saved to "
+          f"{os.path.join(output_dir, 'best.pth')}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,21 @@
 import numpy as np
 from typing import Dict, Any, Optional
 
+from ..game.snake import Direction
+from ..utils.log import get_logger
+from ..utils.profiler import Profiler
+from ..utils.stats import MetricSeries
+from .checkpoint_writer import CheckpointWriter
+from .dataset import TransitionExporter
+from .evaluator import AsyncEvaluator
+from .training_state import TrainingStateStore
+
+# Agent action index -> snake direction (same order as the backend)
+ACTIONS = [Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT]
+
+log = get_logger('trainer')
+
+
 class AITrainer:
     """
     Training orchestration and management system for DQN agent.
@@ -28,15 +43,30 @@ class AITrainer:
         self.input_processor = input_processor
         self.config = config
         self.episode = 0
+        stats_window = config.get('stats_window', 100)
         self.stats = {
-            'scores': [],
-            'losses': [],
-            'epsilons': [],
-            'steps': [],
+            'scores': MetricSeries(window=stats_window),
+            'losses': MetricSeries(window=stats_window),
+            'epsilons': MetricSeries(window=stats_window),
+            'steps': MetricSeries(window=stats_window),
+            'eval_scores': MetricSeries(window=stats_window),
         }
+        self.profiler = Profiler(enabled=config.get('profiling', False))
+        self.agent.profiler = self.profiler
+        self.state_store: Optional[TrainingStateStore] = None
+
+        # Periodic out-of-process evaluation
+        self.evaluator: Optional[AsyncEvaluator] = None
+        self.checkpoint_writer: Optional[CheckpointWriter] = None
+        self.best_eval_score: Optional[float] = None
+        self.best_eval_episode = 0
+        self.stop_reason: Optional[str] = None
+        self._eval_snapshots: Dict[int, Dict[str, Any]] = {}
 
     def train_episode(self) -> Dict[str, Any]:
         """Run a single training episode."""
+        profiler = self.profiler
+        profiler.begin_episode()
         self.game_engine.reset()
         state = self.input_processor.process_state(self.game_engine.get_state())
         total_reward = 0
@@ -45,14 +75,22 @@ class AITrainer:
         losses = []
 
         while not self.game_engine.is_game_over():
-            action = self.agent.act(state)
-            reward = self.game_engine.update(action)
-            next_state = self.input_processor.process_state(self.game_engine.get_state())
+            with profiler.section('act'):
+                action = self.agent.act(state)
+            with profiler.section('env_step'):
+                reward = self.game_engine.update(ACTIONS[action])
+            with profiler.section('process_state'):
+                next_state = self.input_processor.process_state(self.game_engine.get_state())
             done = self.game_engine.is_game_over()
-            self.agent.remember(state, action, reward, next_state, done)
+            with profiler.section('remember'):
+                self.agent.remember(state, action, reward, next_state, done)
+            # Timed by the agent's replay_* sections; an outer section would
+            # count that time twice in the shares
             loss = self.agent.replay()
             if loss is not None:
                 losses.append(loss)
+                profiler.count('updates')
+            profiler.count('env_steps')
             state = next_state
             total_reward += reward
             steps += 1
@@ -65,21 +103,140 @@ class AITrainer:
         self.stats['steps'].append(steps)
         self.episode += 1
 
-        return {
+        result = {
             'score': score,
             'loss': avg_loss,
             'epsilon': self.agent.epsilon,
             'steps': steps,
             'episode': self.episode
         }
+        if profiler.enabled:
+            result['profile'] = profiler.end_episode()
+        return result
 
     def train(self, num_episodes: int) -> None:
-        """Run full training session."""
+        """
+        Run full training session.
+
+        When ``checkpoint_dir`` is configured, the full training state is
+        saved in the background every ``save_frequency`` episodes. When
+        ``evaluation_frequency`` is set, a weight snapshot is evaluated in a
+        separate process every that many episodes; results drive
+        best-model saving, ``early_stopping_patience`` and ``target_score``.
+        When ``dataset_dir`` is set, every transition is also exported there
+        for offline analysis or training (see ai.dataset).
+
+        An evaluator process started here is stopped before returning; the
+        checkpoint writer stays up for later calls, so call ``close`` when
+        done with the trainer.
+        """
+        checkpoint_dir = self.config.get('checkpoint_dir')
+        save_frequency = self.config.get('save_frequency', 0)
+        eval_frequency = self.config.get('evaluation_frequency', 0)
+        owns_evaluator = bool(eval_frequency) and self.evaluator is None
+        if owns_evaluator:
+            self.evaluator = AsyncEvaluator(self._evaluation_spec())
+        dataset_dir = self.config.get('dataset_dir')
+        if dataset_dir and self.agent.exporter is None:
+            feature_names = self.input_processor.get_feature_names()
+            self.agent.exporter = TransitionExporter(
+                dataset_dir, self.agent.state_size,
+                feature_names if len(feature_names) == self.agent.state_size else None,
+                shard_size=self.config.get('dataset_shard_size', 50000),
+                fmt=self.config.get('dataset_format', 'npz'),
+                metadata={'input_type': self.input_processor.input_type},
+            )
+        self.stop_reason = None
+
         for _ in range(num_episodes):
             self.train_episode()
+            if checkpoint_dir and save_frequency and self.episode % save_frequency == 0:
+                self.save_training_state(checkpoint_dir)
+            if eval_frequency:
+                if self.episode % eval_frequency == 0:
+                    self._submit_evaluation()
+                for result in self.evaluator.poll():
+                    self._handle_evaluation(result)
+            if self.stop_reason:
+                break
+
+        if self.evaluator is not None:
+            for result in self.evaluator.drain():
+                self._handle_evaluation(result)
+            if owns_evaluator:
+                self.evaluator.close()
+                self.evaluator = None
+        if self.state_store is not None:
+            self.state_store.wait()
+        if dataset_dir and self.agent.exporter is not None:
+            self.agent.exporter.close()
+            self.agent.exporter = None
 
-    def evaluate(self, num_episodes: int) -> Dict[str, Any]:
-        """Evaluate current agent performance."""
+    def _evaluation_spec(self) -> Dict[str, Any]:
+        """Describe how the evaluator process should rebuild this setup."""
+        return {
+            'agent_config': self.agent.checkpoint_dict()['config'],
+            'input_type': self.input_processor.input_type,
+            'input_config': self.input_processor.config,
+            'grid_width': self.game_engine.grid_width,
+            'grid_height': self.game_engine.grid_height,
+            'cell_size': self.game_engine.cell_size,
+            'episodes': self.config.get('evaluation_episodes', 10),
+            'max_steps': self.config.get(
+                'evaluation_max_steps',
+                self.game_engine.grid_width * self.game_engine.grid_height * 4
+            ),
+        }
+
+    def _submit_evaluation(self) -> None:
+        """Ship the current weights to the evaluator, keeping a snapshot for saving."""
+        if self.evaluator.submit(self.episode, self.agent.q_network):
+            self._eval_snapshots[self.episode] = self.agent.checkpoint_dict(snapshot=True)
+
+    def _handle_evaluation(self, result: Dict[str, Any]) -> None:
+        """Record an evaluation result and update best model / stopping state."""
+        snapshot = self._eval_snapshots.pop(result['episode'], None)
+        if 'error' in result:
+            log.warning("evaluation at episode %s failed: %s", result['episode'], result['error'])
+            return
+
+        score = result['mean_score']
+        self.stats['eval_scores'].append(score)
+        if self.best_eval_score is None or score > self.best_eval_score:
+            self.best_eval_score = score
+            self.best_eval_episode = result['episode']
+            model_dir = self.config.get('model_dir')
+            if model_dir and snapshot is not None:
+                if self.checkpoint_writer is None:
+                    self.checkpoint_writer = CheckpointWriter(
+                        model_dir,
+                        keep_last=self.config.get('keep_last_checkpoints', 5),
+                        keep_best=self.config.get('keep_best_checkpoints', 3),
+                    )
+                self.checkpoint_writer.submit(
+                    snapshot, f"best_ep{result['episode']}.pth", score=score,
+                    metadata={'episode': result['episode'], 'source': 'evaluation'}
+                )
+
+        target_score = self.config.get('target_score')
+        patience = self.config.get('early_stopping_patience')
+        if target_score is not None and score >= target_score:
+            self.stop_reason = 'target_score'
+        elif patience and self.episode - self.best_eval_episode >= patience:
+            self.stop_reason = 'early_stopping'
+
+    def close(self) -> None:
+        """Stop background workers (evaluator process, checkpoint writer)."""
+        if self.evaluator is not None:
+            self.evaluator.close()
+            self.evaluator = None
+        if self.checkpoint_writer is not None:
+            self.checkpoint_writer.close()
+        if self.state_store is not None:
+            self.state_store.wait()
+
+    def evaluate(self, num_episodes: int, max_steps: Optional[int] = None) -> Dict[str, Any]:
+        """Evaluate current agent performance (episodes end after ``max_steps`` if set)."""
         scores = []
         for _ in range(num_episodes):
             self.game_engine.reset()
@@ -87,8 +244,10 @@ class AITrainer:
             done = False
             steps = 0
             while not self.game_engine.is_game_over():
+                if max_steps is not None and steps >= max_steps:
+                    break
                 action = self.agent.act(state, epsilon=0.0)  # Greedy
-                self.game_engine.update(action)
+                self.game_engine.update(ACTIONS[action])
                 state = self.input_processor.process_state(self.game_engine.get_state())
                 steps += 1
             scores.append(self.game_engine.get_score())
@@ -107,6 +266,22 @@ class AITrainer:
         """Load training checkpoint."""
         self.agent.load_model(filepath)
 
+    def save_training_state(self, directory: str, background: bool = True) -> None:
+        """Save resumable training state (replay buffer, RNGs, stats) to a directory."""
+        if self.state_store is None or self.state_store.directory != directory:
+            self.state_store = TrainingStateStore(directory)
+        self.state_store.save(self, background=background)
+
+    def load_training_state(self, directory: str) -> None:
+        """Resume from a directory written by save_training_state."""
+        self.state_store = TrainingStateStore(directory)
+        self.state_store.load(self)
+
     def get_training_stats(self) -> Dict[str, Any]:
         """Return current training metrics."""
-        return self.stats 
\ No newline at end of file
+        stats = {name: series.summary() for name, series in self.stats.items()}
+        stats['best_eval_score'] = self.best_eval_score
+        stats['best_eval_episode'] = self.best_eval_episode
+        if self.profiler.enabled:
+            stats['profile'] = self.profiler.summary()
+        return stats 
\ No newline at end of file
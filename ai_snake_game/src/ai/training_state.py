@@ -0,0 +1,191 @@
+import copy
+import os
+import random
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import torch
+
+
+STATE_FILE = 'state.pt'
+REPLAY_DIR = 'replay'
+FORMAT_VERSION = 1
+
+
+class TrainingStateStore:
+    """
+    Resumable on-disk training state for an AITrainer.
+
+    A state directory holds ``state.pt`` (networks, optimizer, epsilon
+    schedule, RNG streams, episode counter, trainer stats and the input
+    type/config the observations were built with) plus the
+    replay buffer as ``replay/chunk_<start>_<end>.npz`` files. Each save
+    only writes experiences pushed since the previous save, and chunks
+    that have fallen out of the buffer are deleted, so periodic saves stay
+    cheap for large buffers.
+
+    The snapshot is taken on the calling thread; serialization runs on a
+    background thread unless ``background=False``.
+
+    Only ``load`` adopts the chunks already in the directory. The first
+    save of a store that was not loaded replaces whatever an earlier run
+    left there with the full buffer.
+    """
+
+    def __init__(self, directory: str):
+        """Initialize store rooted at ``directory`` (created if missing)."""
+        self.directory = directory
+        self.replay_dir = os.path.join(directory, REPLAY_DIR)
+        os.makedirs(self.replay_dir, exist_ok=True)
+        self.chunks: List[Dict[str, Any]] = []
+        self.saved_upto = 0
+        # Set until the directory's replay chunks are known to be ours
+        self._reset_replay = True
+        self._thread: Optional[threading.Thread] = None
+        self.last_error: Optional[BaseException] = None
+
+    def exists(self) -> bool:
+        """Check whether a saved state is present."""
+        return os.path.exists(os.path.join(self.directory, STATE_FILE))
+
+    def save(self, trainer, background: bool = True) -> None:
+        """Snapshot the trainer and write it to disk."""
+        self.wait()
+        snapshot = self._snapshot(trainer)
+        if background:
+            self._thread = threading.Thread(
+                target=self._write_safely, args=(snapshot,), daemon=True
+            )
+            self._thread.start()
+        else:
+            self._write(snapshot)
+
+    def wait(self) -> None:
+        """Block until any background write has finished, re-raising its error."""
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.last_error is not None:
+            error, self.last_error = self.last_error, None
+            raise error
+
+    def _snapshot(self, trainer) -> Dict[str, Any]:
+        agent = trainer.agent
+        memory = agent.memory
+
+        # A cleared or replaced buffer invalidates the chunks on disk
+        reset_replay = self._reset_replay or memory.total_pushed < self.saved_upto
+        if reset_replay:
+            self.chunks, self.saved_upto = [], 0
+            self._reset_replay = False
+        new_experiences = memory.latest(memory.total_pushed - self.saved_upto)
+        start = memory.total_pushed - len(new_experiences)
+        self.saved_upto = memory.total_pushed
+
+        return {
+            'version': FORMAT_VERSION,
+            'agent': agent.checkpoint_dict(snapshot=True),
+            'episode': trainer.episode,
+            'stats': copy.deepcopy(trainer.stats),
+            'input_type': trainer.input_processor.input_type,
+            'input_config': copy.deepcopy(trainer.input_processor.config),
+            'rng': {
+                'python': random.getstate(),
+                'numpy': np.random.get_state(),
+                'torch': torch.get_rng_state(),
+            },
+            'replay': {
+                'capacity': memory.capacity,
+                'total_pushed': memory.total_pushed,
+                'chunks': list(self.chunks),
+            },
+            'new_experiences': new_experiences,
+            'new_start': start,
+            'reset_replay': reset_replay,
+        }
+
+    def _write_safely(self, snapshot: Dict[str, Any]) -> None:
+        try:
+            self._write(snapshot)
+        except Exception as e:
+            # Rewrite the whole buffer next time; the failed chunk never landed
+            self.chunks, self.saved_upto = [], 0
+            self._reset_replay = True
+            self.last_error = e
+
+    def _write(self, snapshot: Dict[str, Any]) -> None:
+        experiences = snapshot.pop('new_experiences')
+        start = snapshot.pop('new_start')
+        replay = snapshot['replay']
+
+        if snapshot.pop('reset_replay'):
+            # Drop the old state first so it never points at deleted chunks
+            state_path = os.path.join(self.directory, STATE_FILE)
+            if os.path.exists(state_path):
+                os.remove(state_path)
+            for name in os.listdir(self.replay_dir):
+                os.remove(os.path.join(self.replay_dir, name))
+
+        if experiences:
+            end = start + len(experiences)
+            filename = f'chunk_{start:012d}_{end:012d}.npz'
+            np.savez_compressed(
+                os.path.join(self.replay_dir, filename),
+                states=np.array([e[0] for e in experiences], dtype=np.float32),
+                actions=np.array([e[1] for e in experiences], dtype=np.int64),
+                rewards=np.array([e[2] for e in experiences], dtype=np.float32),
+                next_states=np.array([e[3] for e in experiences], dtype=np.float32),
+                dones=np.array([e[4] for e in experiences], dtype=bool),
+            )
+            replay['chunks'].append({'start': start, 'end': end, 'file': filename})
+
+        # Chunks entirely older than the buffer window are no longer needed
+        oldest_kept = replay['total_pushed'] - replay['capacity']
+        live = [c for c in replay['chunks'] if c['end'] > oldest_kept]
+        stale = [c for c in replay['chunks'] if c['end'] <= oldest_kept]
+        replay['chunks'] = live
+
+        state_path = os.path.join(self.directory, STATE_FILE)
+        tmp_path = state_path + '.tmp'
+        torch.save(snapshot, tmp_path)
+        os.replace(tmp_path, state_path)
+        self.chunks = live
+
+        for chunk in stale:
+            try:
+                os.remove(os.path.join(self.replay_dir, chunk['file']))
+            except FileNotFoundError:
+                pass
+
+    def load(self, trainer) -> None:
+        """Restore a trainer (agent, replay buffer, RNGs, counters, stats)."""
+        self.wait()
+        state = torch.load(os.path.join(self.directory, STATE_FILE), weights_only=False)
+        agent = trainer.agent
+        agent.load_checkpoint_dict(state['agent'])
+
+        replay = state['replay']
+        memory = agent.memory
+        memory.clear()
+        oldest_kept = replay['total_pushed'] - memory.capacity
+        for chunk in replay['chunks']:
+            with np.load(os.path.join(self.replay_dir, chunk['file'])) as data:
+                states, actions = data['states'], data['actions']
+                rewards, next_states = data['rewards'], data['next_states']
+                dones = data['dones']
+            skip = max(0, oldest_kept - chunk['start'])
+            for i in range(skip, chunk['end'] - chunk['start']):
+                memory.push(states[i], int(actions[i]), float(rewards[i]),
+                            next_states[i], bool(dones[i]))
+        memory.total_pushed = replay['total_pushed']
+
+        random.setstate(state['rng']['python'])
+        np.random.set_state(state['rng']['numpy'])
+        torch.set_rng_state(state['rng']['torch'])
+
+        trainer.episode = state['episode']
+        trainer.stats = state['stats']
+        self.chunks = replay['chunks']
+        self.saved_upto = replay['total_pushed']
+        self._reset_replay = False
@@ -0,0 +1,253 @@
+"""
+Record agent games and export them as PNG frames or raw video.
+
+Recordings hold only a seed and the action stream per game (see
+game.recording); frames are produced offline by replaying them through
+ModernRenderer onto offscreen surfaces, one game per worker process.
+
+Run from ai_snake_game/:
+    python -m src.game.exporter record models/dqn_snake_ep0.pth games.npz --episodes 8
+    python -m src.game.exporter export games.npz out/ --format raw --workers 4
+
+Raw output is rgb24 frames plus a JSON sidecar; encode with e.g.
+    ffmpeg -f rawvideo -pix_fmt rgb24 -s WxH -r 10 -i episode_0000.rgb episode_0000.mp4
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pygame
+
+from .game_engine import STATE_FEATURE_NAMES, GameEngine
+from .recording import EpisodeRecorder, EpisodeRecording, load_recordings, save_recordings
+from .renderer import ModernRenderer
+
+
+FORMATS = ('raw', 'png')
+FRAME_BATCH = 64  # Frames copied per array batch before one write
+
+
+def frame_size(grid_width: int, grid_height: int, cell_size: int) -> tuple:
+    """Surface size that fits the grid at ModernRenderer's fixed offset."""
+    return 100 + grid_width * cell_size, 100 + grid_height * cell_size
+
+
+def render_recording(recording: EpisodeRecording, output: str, fmt: str = 'raw',
+                     cell_size: Optional[int] = None, fps: float = 10.0,
+                     batch: int = FRAME_BATCH) -> Dict[str, Any]:
+    """
+    Replay one recording offscreen and write its frames.
+
+    Raw output copies ``batch`` frames into one preallocated array and
+    writes it with a single call; PNG output writes one file per frame
+    into the ``output`` directory.
+
+    Returns:
+        dict: Output path, frame count, size and render time
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}")
+    start = time.perf_counter()
+    cell_size = cell_size or recording.cell_size
+    width, height = frame_size(recording.grid_width, recording.grid_height, cell_size)
+    surface = pygame.Surface((width, height))
+    renderer = ModernRenderer(surface, cell_size)
+
+    frames = 0
+    if fmt == 'png':
+        os.makedirs(output, exist_ok=True)
+        for engine in recording.replay():
+            renderer.render_dirty(engine)
+            pygame.image.save(surface, os.path.join(output, f'frame_{frames:06d}.png'))
+            frames += 1
+    else:
+        buffer = np.empty((batch, height, width, 3), dtype=np.uint8)
+        pending = 0
+        with open(output, 'wb') as f:
+            for engine in recording.replay():
+                renderer.render_dirty(engine)
+                buffer[pending] = np.frombuffer(
+                    pygame.image.tobytes(surface, 'RGB'), dtype=np.uint8
+                ).reshape(height, width, 3)
+                pending += 1
+                frames += 1
+                if pending == batch:
+                    f.write(buffer.tobytes())
+                    pending = 0
+            if pending:
+                f.write(buffer[:pending].tobytes())
+        with open(os.path.splitext(output)[0] + '.json', 'w') as f:
+            json.dump({
+                'pix_fmt': 'rgb24', 'width': width, 'height': height, 'fps': fps,
+                'frames': frames, 'seed': recording.seed, 'score': recording.score,
+                'policy_id': recording.policy_id,
+            }, f, indent=2)
+
+    elapsed = time.perf_counter() - start
+    return {
+        'output': output,
+        'frames': frames,
+        'size': [width, height],
+        'seconds': elapsed,
+        'frames_per_sec': frames / elapsed if elapsed else 0.0,
+    }
+
+
+def _render_job(args) -> Dict[str, Any]:
+    return render_recording(*args)
+
+
+def export_recordings(recordings: List[EpisodeRecording], output_dir: str, fmt: str = 'raw',
+                      cell_size: Optional[int] = None, fps: float = 10.0,
+                      workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Render every recording into ``output_dir``, one game per worker process.
+
+    Games are independent, so with ``workers`` processes export runs up
+    to ``workers`` times faster than a single renderer.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = []
+    for i, recording in enumerate(recordings):
+        name = f'episode_{i:04d}'
+        output = os.path.join(output_dir, name if fmt == 'png' else name + '.rgb')
+        jobs.append((recording, output, fmt, cell_size, fps))
+
+    if workers is None:
+        workers = (len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity')
+                   else os.cpu_count() or 1)
+    workers = min(workers, max(len(jobs), 1))
+    if workers == 1:
+        return [_render_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn')) as pool:
+        return list(pool.map(_render_job, jobs))
+
+
+def observation_fn(state_size: int, input_type: Optional[str] = None,
+                   input_config: Optional[Dict[str, Any]] = None):
+    """
+    Return a function mapping a GameEngine to the observation a checkpoint expects.
+
+    With an input type the observation comes from an InputProcessor (as
+    in AITrainer); without one, only the engine's own 11-value
+    ``get_state_for_ai`` (backend checkpoints) is available.
+    """
+    if input_type is not None:
+        from ..ai.input_processor import InputProcessor
+
+        processor = InputProcessor(input_type, input_config or {})
+        size = processor.get_input_size()
+        if size != state_size:
+            raise ValueError(f"Checkpoint expects {state_size} inputs but {input_type!r} "
+                             f"input with this config gives {size}")
+        return lambda engine: processor.process_state(engine.get_state())
+    if state_size != len(STATE_FEATURE_NAMES):
+        raise ValueError(f"Checkpoint expects {state_size} inputs and records no input "
+                         f"type; pass the input settings it was trained with (--config)")
+    return lambda engine: engine.get_state_for_ai()
+
+
+def record_games(model_path: str, episodes: int, grid_width: int, grid_height: int,
+                 cell_size: int = 20, max_steps: int = 1000, seed: Optional[int] = None,
+                 input_type: Optional[str] = None,
+                 input_config: Optional[Dict[str, Any]] = None) -> List[EpisodeRecording]:
+    """
+    Play greedy games with a checkpoint and return their recordings.
+
+    The observation follows the checkpoint's ``input_type``/``input_config``
+    when it records them, else the given ones (see ``observation_fn``).
+    """
+    import random
+
+    import torch
+
+    from ..ai.agent import DQNAgent
+    from ..ai.model_catalog import hidden_layers_from_state
+
+    checkpoint = torch.load(model_path, map_location='cpu', weights_only=False)
+    config = dict(checkpoint['config'])
+    observe = observation_fn(config['state_size'],
+                             checkpoint.get('input_type', input_type),
+                             checkpoint.get('input_config', input_config))
+    config['hidden_layers'] = hidden_layers_from_state(checkpoint['q_network_state_dict'])
+    config['memory_size'] = 1
+    agent = DQNAgent(config['state_size'], config['action_size'], config)
+    agent.load_checkpoint_dict(checkpoint)
+    agent.q_network.eval()
+
+    rng = random.Random(seed)
+    engine = GameEngine(grid_width, grid_height, cell_size)
+    recorder = EpisodeRecorder(policy_id=os.path.basename(model_path))
+    for _ in range(episodes):
+        recorder.start(engine, rng.getrandbits(32))
+        while not engine.is_game_over() and engine.steps < max_steps:
+            action = agent.act(observe(engine), epsilon=0.0)
+            recorder.record(action)
+            engine.apply_action(action)
+        recorder.finish(engine)
+    return recorder.recordings
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help='Record greedy games of a checkpoint')
+    record.add_argument('model')
+    record.add_argument('output', help='Recordings file (.npz)')
+    record.add_argument('--episodes', type=int, default=10)
+    record.add_argument('--grid', type=int, nargs=2, default=[20, 20], metavar=('W', 'H'))
+    record.add_argument('--max-steps', type=int, default=1000)
+    record.add_argument('--seed', type=int)
+    record.add_argument('--config', help='config.yaml whose ai.input_type (and its options) the '
+                        'checkpoint was trained with (if the checkpoint does not record them)')
+
+    export = commands.add_parser('export', help='Render recordings to frames or raw video')
+    export.add_argument('recordings', help='Recordings file (.npz)')
+    export.add_argument('output_dir')
+    export.add_argument('--format', choices=FORMATS, default='raw')
+    export.add_argument('--cell-size', type=int, help='Override the recorded cell size')
+    export.add_argument('--fps', type=float, default=10.0, help='Frame rate noted in raw sidecars')
+    export.add_argument('--workers', type=int, help='Worker processes (default: usable CPUs)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        input_type = input_config = None
+        if args.config:
+            import yaml
+            from ..ai.input_processor import input_config_for
+
+            with open(args.config) as f:
+                ai_config = yaml.safe_load(f)['ai']
+            input_type = ai_config['input_type']
+            try:
+                input_config = input_config_for(ai_config)
+            except ValueError as e:
+                parser.error(str(e))
+        try:
+            recordings = record_games(args.model, args.episodes, *args.grid,
+                                      max_steps=args.max_steps, seed=args.seed,
+                                      input_type=input_type, input_config=input_config)
+        except ValueError as e:
+            parser.error(str(e))
+        save_recordings(args.output, recordings)
+        steps = sum(len(r) for r in recordings)
+        print(f"Recorded {len(recordings)} games ({steps} steps) to {args.output}")
+    else:
+        recordings = load_recordings(args.recordings)
+        start = time.perf_counter()
+        results = export_recordings(recordings, args.output_dir, args.format,
+                                    args.cell_size, args.fps, args.workers)
+        elapsed = time.perf_counter() - start
+        frames = sum(r['frames'] for r in results)
+        print(f"Exported {frames} frames from {len(results)} games in {elapsed:.1f} s "
+              f"({frames / elapsed:.0f} frames/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,5 @@
 import random
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 
 class Food:
@@ -17,18 +17,20 @@ class Food:
     - grid_width, grid_height: Game area dimensions
     """
 
-    def __init__(self, grid_width: int, grid_height: int):
-        """Initialize food with grid dimensions."""
+    def __init__(self, grid_width: int, grid_height: int,
+                 rng: Optional[random.Random] = None):
+        """Initialize food with grid dimensions and an optional RNG for placement."""
         self.grid_width = grid_width
         self.grid_height = grid_height
+        self.rng = rng or random.Random()
         self.position = (0, 0)
         self._generate_initial_food()
 
     def _generate_initial_food(self) -> None:
         """Generate initial food position."""
         self.position = (
-            random.randint(0, self.grid_width - 1),
-            random.randint(0, self.grid_height - 1)
+            self.rng.randint(0, self.grid_width - 1),
+            self.rng.randint(0, self.grid_height - 1)
         )
 
     def generate_new_food(
@@ -50,7 +52,7 @@ class Food:
             )
         
         # Choose random available position
-        self.position = random.choice(available_positions)
+        self.position = self.rng.choice(available_positions)
 
     def is_eaten(self, snake_head: Tuple[int, int]) -> bool:
         """Check if food is consumed by snake head."""
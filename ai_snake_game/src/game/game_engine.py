@@ -1,8 +1,20 @@
+import random
 from typing import Optional, Dict, Any, Tuple
 from .snake import Snake, Direction
 from .food import Food
 
 
+# Action index -> direction name used by every AI loop
+ACTION_DIRECTIONS = ['UP', 'DOWN', 'LEFT', 'RIGHT']
+
+# Layout of get_state_for_ai
+STATE_FEATURE_NAMES = [
+    'dir_up', 'dir_down', 'dir_left', 'dir_right',
+    'danger_straight', 'danger_right', 'danger_left',
+    'food_up', 'food_down', 'food_left', 'food_right',
+]
+
+
 class GameEngine:
     """
     Main game controller managing game state and flow.
@@ -10,7 +22,7 @@ class GameEngine:
     Required Methods:
     - __init__(self, width, height, cell_size)
     - update(self, action=None)  # Update game state, return reward
-    - reset(self)  # Reset game to initial state
+    - reset(self, seed=None)  # Reset game to initial state
     - get_state(self)  # Return current game state for AI
     - is_game_over(self)  # Check if game ended
     - get_score(self)  # Return current score
@@ -23,11 +35,14 @@ class GameEngine:
     - game_over: Boolean game state
     """
 
-    def __init__(self, width: int, height: int, cell_size: int):
-        """Initialize game engine with grid dimensions."""
+    def __init__(self, width: int, height: int, cell_size: int,
+                 seed: Optional[int] = None):
+        """Initialize game engine with grid dimensions and optional food seed."""
         self.grid_width = width
         self.grid_height = height
         self.cell_size = cell_size
+        # Private RNG so a seed plus the actions fully determine a game
+        self.rng = random.Random(seed)
         
         # Game state
         self.score = 0
@@ -37,7 +52,7 @@ class GameEngine:
         # Initialize game objects
         start_pos = (width // 2, height // 2)
         self.snake = Snake(start_pos, Direction.RIGHT)
-        self.food = Food(width, height)
+        self.food = Food(width, height, self.rng)
         
         # Ensure food is not on snake initially
         self.food.generate_new_food(self.snake.get_body_positions())
@@ -84,8 +99,10 @@ class GameEngine:
 
         return reward
 
-    def reset(self) -> None:
-        """Reset game to initial state."""
+    def reset(self, seed: Optional[int] = None) -> None:
+        """Reset game to initial state, reseeding food placement if ``seed`` is given."""
+        if seed is not None:
+            self.rng.seed(seed)
         self.score = 0
         self.steps = 0
         self.game_over = False
@@ -159,6 +176,23 @@ class GameEngine:
             food_up, food_down, food_left, food_right
         ]
 
+    def apply_action(self, action: int) -> bool:
+        """
+        Advance one step with an action index (0-3: UP, DOWN, LEFT, RIGHT).
+
+        Same step as the AI loops: turn, move, then eat and respawn food.
+
+        Returns:
+            bool: True if food was eaten on this step
+        """
+        self.change_direction(ACTION_DIRECTIONS[action])
+        self.move_snake()
+        if self.check_food_collision():
+            self.eat_food()
+            self.spawn_food()
+            return True
+        return False
+
     def change_direction(self, direction_str: str) -> None:
         """Change snake direction using string input."""
         direction_map = {
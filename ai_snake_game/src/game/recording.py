@@ -0,0 +1,116 @@
+import json
+import random
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .game_engine import GameEngine
+
+
+class EpisodeRecording:
+    """
+    One game as its food seed plus action stream.
+
+    ``GameEngine`` places food from its own seeded RNG, so replaying the
+    actions through ``apply_action`` after ``reset(seed)`` reproduces the
+    game exactly; a recording is one byte per step.
+    """
+
+    def __init__(self, grid_width: int, grid_height: int, cell_size: int, seed: int,
+                 actions: Optional[List[int]] = None, score: int = 0,
+                 policy_id: Optional[str] = None):
+        """Initialize recording for a game on the given grid."""
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.cell_size = cell_size
+        self.seed = seed
+        self.actions = bytearray(actions or [])
+        self.score = score
+        self.policy_id = policy_id
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    def replay(self) -> Iterator[GameEngine]:
+        """
+        Yield the engine at the start of the game and after every step.
+
+        The same engine object is yielded each time; copy anything that
+        must outlive the next step.
+        """
+        engine = GameEngine(self.grid_width, self.grid_height, self.cell_size)
+        engine.reset(self.seed)
+        yield engine
+        for action in self.actions:
+            engine.apply_action(action)
+            yield engine
+
+
+class EpisodeRecorder:
+    """
+    Records the games played on a ``GameEngine``.
+
+    Call ``start`` instead of ``engine.reset`` (it reseeds the engine),
+    ``record`` with each action index before applying it and ``finish``
+    at game over. Completed recordings accumulate in ``recordings``.
+    """
+
+    def __init__(self, policy_id: Optional[str] = None):
+        """Initialize recorder; ``policy_id`` tags every recording."""
+        self.policy_id = policy_id
+        self.recordings: List[EpisodeRecording] = []
+        self._current: Optional[EpisodeRecording] = None
+
+    def start(self, engine: GameEngine, seed: Optional[int] = None) -> int:
+        """Reset ``engine`` with a fresh (or given) seed and begin a recording."""
+        if seed is None:
+            seed = random.getrandbits(32)
+        engine.reset(seed)
+        self._current = EpisodeRecording(engine.grid_width, engine.grid_height,
+                                         engine.cell_size, seed, policy_id=self.policy_id)
+        return seed
+
+    def record(self, action: int) -> None:
+        """Append one action index to the current recording."""
+        self._current.actions.append(action)
+
+    def finish(self, engine: GameEngine) -> EpisodeRecording:
+        """Close the current recording with the engine's final score."""
+        recording = self._current
+        recording.score = engine.score
+        self.recordings.append(recording)
+        self._current = None
+        return recording
+
+
+def save_recordings(path: str, recordings: List[EpisodeRecording]) -> None:
+    """Write recordings to one compressed ``.npz`` (actions concatenated)."""
+    lengths = np.array([len(r) for r in recordings], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    header = [{
+        'grid_width': r.grid_width,
+        'grid_height': r.grid_height,
+        'cell_size': r.cell_size,
+        'seed': r.seed,
+        'score': r.score,
+        'policy_id': r.policy_id,
+    } for r in recordings]
+    actions = b''.join(bytes(r.actions) for r in recordings)
+    np.savez_compressed(
+        path,
+        header=np.frombuffer(json.dumps(header).encode(), dtype=np.uint8),
+        offsets=offsets,
+        actions=np.frombuffer(actions, dtype=np.uint8),
+    )
+
+
+def load_recordings(path: str) -> List[EpisodeRecording]:
+    """Read recordings written by ``save_recordings``."""
+    with np.load(path) as data:
+        header: List[Dict[str, Any]] = json.loads(data['header'].tobytes())
+        offsets = data['offsets']
+        actions = data['actions']
+    return [
+        EpisodeRecording(actions=actions[offsets[i]:offsets[i + 1]].tolist(), **entry)
+        for i, entry in enumerate(header)
+    ]
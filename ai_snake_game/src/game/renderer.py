@@ -1,57 +1,195 @@
 import pygame
-from typing import Optional
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
 from .game_engine import GameEngine
 
 
+BACKGROUND_COLOR = (10, 10, 10)
+GRID_COLOR = (22, 33, 62)
+HEAD_COLOR = (255, 255, 255)
+BODY_COLOR = (0, 255, 65)
+FOOD_COLOR = (255, 0, 128)
+SNAKE_INSET = 1
+FOOD_INSET = 4
+
+
 class ModernRenderer:
-    def __init__(self, screen: pygame.Surface, cell_size: int = 30):
+    def __init__(self, screen: pygame.Surface, cell_size: int = 30,
+                 viewport: Optional[pygame.Rect] = None):
         self.screen = screen
         self.cell_size = cell_size
         self.grid_offset_x = 50
         self.grid_offset_y = 50
+        # Screen area owned by the renderer in dirty-rect mode
+        self.viewport = pygame.Rect(viewport) if viewport else screen.get_rect()
+
+        # Dirty-rect state
+        self._background: Optional[pygame.Surface] = None
+        self._background_key = None
+        # Snake cells as last drawn (head first) and how many segments cover each cell
+        self._drawn: Deque[Tuple[int, int]] = deque()
+        self._occupancy: Dict[Tuple[int, int], int] = {}
+        self._food: Optional[Tuple[int, int]] = None
+        self._full_redraw = True
 
     def render(self, game_engine: GameEngine):
         """Render the game engine state."""
-        self.screen.fill((10, 10, 10))
+        self.screen.fill(BACKGROUND_COLOR)
         self.render_grid(game_engine.grid_width, game_engine.grid_height)
         self.render_food(game_engine.food)
         self.render_snake(game_engine.snake)
 
     def render_frame(self, game_state, ai_overlay: Optional[dict] = None):
-        self.screen.fill((10, 10, 10))
+        self.screen.fill(BACKGROUND_COLOR)
         self.render_grid(game_state['grid_width'], game_state['grid_height'])
         self.render_food(game_state['food'])
         self.render_snake(game_state['snake'])
 
-    def render_grid(self, grid_width: int, grid_height: int):
-        color = (22, 33, 62)
+    def render_dirty(self, game_engine: GameEngine) -> List[pygame.Rect]:
+        """
+        Redraw only the cells that changed since the last call.
+
+        Produces the same pixels inside the viewport as ``render``. Changed
+        cells are restored from a cached background (fill plus grid lines,
+        rebuilt when the grid or screen size changes) and redrawn. Returns
+        the rects to pass to ``pygame.display.update``. Call ``invalidate``
+        if anything else drew inside the viewport.
+
+        The changed cells come from the move since the last frame (new head
+        cells, the previous head, vacated tail cells, old and new food), so
+        a frame costs O(steps moved), not O(snake length). A snake that was
+        reset or replaced is resynchronised from its full position list.
+        """
+        background = self._get_background(game_engine.grid_width, game_engine.grid_height)
+        positions = game_engine.snake.positions
+        food = game_engine.food.position
+        previous_clip = self.screen.get_clip()
+        self.screen.set_clip(self.viewport)
+
+        dirty = []
+        if self._full_redraw:
+            self._resync(positions)
+            self.screen.blit(background, self.viewport, self.viewport)
+            for cell, (color, inset) in self._cell_contents(game_engine.food,
+                                                            game_engine.snake).items():
+                pygame.draw.rect(self.screen, color, self._cell_rect(cell, inset))
+            dirty.append(self.viewport.copy())
+        else:
+            cells = self._advance(positions)
+            cells.update((self._food, food))
+            cells.discard(None)
+            head = positions[0] if positions else None
+            for cell in cells:
+                # Snake and food never touch the grid lines around a cell
+                rect = self._cell_rect(cell, SNAKE_INSET)
+                self.screen.blit(background, rect, rect)
+                # Body segments are drawn after the head, and both after food
+                segments = self._occupancy.get(cell, 0)
+                if segments > (cell == head):
+                    pygame.draw.rect(self.screen, BODY_COLOR, rect)
+                elif cell == head:
+                    pygame.draw.rect(self.screen, HEAD_COLOR, rect)
+                elif cell == food:
+                    pygame.draw.rect(self.screen, FOOD_COLOR, self._cell_rect(cell, FOOD_INSET))
+                rect = rect.clip(self.viewport)
+                if rect.width and rect.height:
+                    dirty.append(rect)
+
+        self.screen.set_clip(previous_clip)
+        self._food = food
+        self._full_redraw = False
+        return dirty
+
+    def _advance(self, positions: List[Tuple[int, int]]) -> Set[Tuple[int, int]]:
+        """Bring the drawn snake up to ``positions``; return the cells that changed."""
+        drawn = self._drawn
+        length = len(positions)
+        # The old head is ``steps`` segments back after moving ``steps`` cells
+        steps = None
+        if drawn:
+            old_head = drawn[0]
+            for i in range(min(length, len(drawn) + 1)):
+                if positions[i] == old_head:
+                    steps = i
+                    break
+        if (steps is None or length - steps > len(drawn)
+                or (length and drawn[length - steps - 1] != positions[-1])):
+            return self._resync(positions)
+
+        changed = set(positions[:steps + 1]) if steps else set()
+        for cell in reversed(positions[:steps]):
+            drawn.appendleft(cell)
+            self._occupancy[cell] = self._occupancy.get(cell, 0) + 1
+        while len(drawn) > length:
+            cell = drawn.pop()
+            changed.add(cell)
+            remaining = self._occupancy[cell] - 1
+            if remaining:
+                self._occupancy[cell] = remaining
+            else:
+                del self._occupancy[cell]
+        return changed
+
+    def _resync(self, positions: Iterable[Tuple[int, int]]) -> Set[Tuple[int, int]]:
+        """Replace the drawn snake with ``positions``; return old and new cells."""
+        changed = set(self._drawn)
+        self._drawn = deque(positions)
+        self._occupancy = {}
+        for cell in self._drawn:
+            self._occupancy[cell] = self._occupancy.get(cell, 0) + 1
+        changed.update(self._occupancy)
+        return changed
+
+    def invalidate(self) -> None:
+        """Force the next ``render_dirty`` to redraw the whole viewport."""
+        self._full_redraw = True
+
+    def _get_background(self, grid_width: int, grid_height: int) -> pygame.Surface:
+        key = (grid_width, grid_height, self.cell_size, self.screen.get_size())
+        if key != self._background_key:
+            background = pygame.Surface(self.screen.get_size(), 0, self.screen)
+            background.fill(BACKGROUND_COLOR)
+            self.render_grid(grid_width, grid_height, surface=background)
+            self._background = background
+            self._background_key = key
+            self._full_redraw = True
+        return self._background
+
+    @staticmethod
+    def _cell_contents(food, snake) -> Dict[Tuple[int, int], Tuple[Tuple[int, int, int], int]]:
+        """Map cell -> (color, inset); later entries win, matching draw order."""
+        cells = {food.position: (FOOD_COLOR, FOOD_INSET)}
+        for i, position in enumerate(snake.positions):
+            cells[position] = (BODY_COLOR if i > 0 else HEAD_COLOR, SNAKE_INSET)
+        return cells
+
+    def _cell_rect(self, cell: Tuple[int, int], inset: int) -> pygame.Rect:
+        x, y = cell
+        return pygame.Rect(
+            self.grid_offset_x + x * self.cell_size + inset,
+            self.grid_offset_y + y * self.cell_size + inset,
+            self.cell_size - 2 * inset, self.cell_size - 2 * inset)
+
+    def render_grid(self, grid_width: int, grid_height: int,
+                    surface: Optional[pygame.Surface] = None):
+        surface = surface or self.screen
         for x in range(grid_width + 1):
             pygame.draw.line(
-                self.screen, color,
+                surface, GRID_COLOR,
                 (self.grid_offset_x + x * self.cell_size, self.grid_offset_y),
-                (self.grid_offset_x + x * self.cell_size, 
+                (self.grid_offset_x + x * self.cell_size,
                  self.grid_offset_y + grid_height * self.cell_size), 1)
         for y in range(grid_height + 1):
             pygame.draw.line(
-                self.screen, color,
+                surface, GRID_COLOR,
                 (self.grid_offset_x, self.grid_offset_y + y * self.cell_size),
-                (self.grid_offset_x + grid_width * self.cell_size, 
+                (self.grid_offset_x + grid_width * self.cell_size,
                  self.grid_offset_y + y * self.cell_size), 1)
 
     def render_snake(self, snake):
-        for i, (x, y) in enumerate(snake.positions):
-            color = (0, 255, 65) if i > 0 else (255, 255, 255)
-            rect = pygame.Rect(
-                self.grid_offset_x + x * self.cell_size + 1,
-                self.grid_offset_y + y * self.cell_size + 1,
-                self.cell_size - 2, self.cell_size - 2)
-            pygame.draw.rect(self.screen, color, rect)
+        for i, position in enumerate(snake.positions):
+            color = BODY_COLOR if i > 0 else HEAD_COLOR
+            pygame.draw.rect(self.screen, color, self._cell_rect(position, SNAKE_INSET))
 
     def render_food(self, food):
-        x, y = food.position
-        color = (255, 0, 128)
-        rect = pygame.Rect(
-            self.grid_offset_x + x * self.cell_size + 4,
-            self.grid_offset_y + y * self.cell_size + 4,
-            self.cell_size - 8, self.cell_size - 8)
-        pygame.draw.rect(self.screen, color, rect) 
\ No newline at end of file
+        pygame.draw.rect(self.screen, FOOD_COLOR, self._cell_rect(food.position, FOOD_INSET))
@@ -0,0 +1,355 @@
+import os
+import struct
+import zlib
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .game_engine import GameEngine
+from .recording import EpisodeRecording
+from .snake import Direction
+
+
+# Files: <path>.dat holds zlib-compressed chunks of episode records,
+# <path>.idx one fixed-size entry per episode; both are append-only.
+DATA_MAGIC = b'SNKTDAT1'
+INDEX_MAGIC = b'SNKTIDX1'
+CHUNK_HEADER = struct.Struct('<II')        # compressed size, raw size
+INDEX_ENTRY = struct.Struct('<QII')        # chunk offset in .dat, record offset, record size
+
+# Episode record: header, policy id, 2-bit packed actions, events, snapshots
+EPISODE_HEADER = struct.Struct('<HHHIIIHHH')  # grid w, h, cell, seed, steps, score,
+                                              # events, snapshots, policy id length
+EVENT = struct.Struct('<IBhh')             # step, kind, x, y
+SNAPSHOT = struct.Struct('<IIBBhhI')       # step, score, direction, grow pending,
+                                           # food x, food y, snake length
+POINT = struct.Struct('<hh')
+
+EVENT_FOOD = 1   # Food eaten on this step; (x, y) is where the new food spawned
+EVENT_DEATH = 2  # Game over on this step; (x, y) is the head position
+
+DIRECTIONS = list(Direction)
+
+
+def pack_actions(actions: np.ndarray) -> bytes:
+    """Pack action indices (0-3) four to a byte, first action in the low bits."""
+    padded = np.zeros(-(-len(actions) // 4) * 4, dtype=np.uint8)
+    padded[:len(actions)] = actions
+    return (padded[0::4] | padded[1::4] << 2 | padded[2::4] << 4 | padded[3::4] << 6).tobytes()
+
+
+def unpack_actions(data: bytes, count: int) -> np.ndarray:
+    """Inverse of ``pack_actions``."""
+    packed = np.frombuffer(data, dtype=np.uint8)
+    actions = np.empty(len(packed) * 4, dtype=np.uint8)
+    for i in range(4):
+        actions[i::4] = (packed >> (2 * i)) & 3
+    return actions[:count]
+
+
+class Snapshot:
+    """Full game state at a step, enough to resume simulation without the seed."""
+
+    __slots__ = ('step', 'score', 'direction', 'grow_pending', 'food', 'positions')
+
+    def __init__(self, step: int, score: int, direction: int, grow_pending: bool,
+                 food: Tuple[int, int], positions: List[Tuple[int, int]]):
+        self.step = step
+        self.score = score
+        self.direction = direction
+        self.grow_pending = grow_pending
+        self.food = food
+        self.positions = positions
+
+    @classmethod
+    def capture(cls, engine: GameEngine) -> 'Snapshot':
+        snake = engine.snake
+        return cls(engine.steps, engine.score, DIRECTIONS.index(snake.direction),
+                   snake.grow_pending, engine.food.position, list(snake.positions))
+
+    def restore(self, engine: GameEngine) -> None:
+        engine.steps = self.step
+        engine.score = self.score
+        engine.game_over = False
+        engine.snake.positions = list(self.positions)
+        engine.snake.direction = DIRECTIONS[self.direction]
+        engine.snake.grow_pending = self.grow_pending
+        engine.food.position = self.food
+
+
+class TrajectoryEpisode:
+    """
+    One decoded episode with random access to any frame.
+
+    ``frame(step)`` restores the nearest snapshot at or before ``step``
+    and re-simulates the remaining actions through ``GameEngine``. Food
+    respawns come from the stored food events rather than the RNG, so
+    simulation can start from any snapshot.
+    """
+
+    def __init__(self, grid_width: int, grid_height: int, cell_size: int, seed: int,
+                 score: int, policy_id: Optional[str], actions: np.ndarray,
+                 events: List[Tuple[int, int, int, int]], snapshots: List[Snapshot]):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.cell_size = cell_size
+        self.seed = seed
+        self.score = score
+        self.policy_id = policy_id
+        self.actions = actions
+        self.events = events
+        self.snapshots = snapshots
+        self._food = {step: (x, y) for step, kind, x, y in events if kind == EVENT_FOOD}
+        self._snapshot_steps = [s.step for s in snapshots]
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    def frame(self, step: int) -> GameEngine:
+        """Return a new engine holding the state after ``step`` actions."""
+        if not 0 <= step <= len(self.actions):
+            raise IndexError(f"Step {step} outside episode of {len(self.actions)} steps")
+        snapshot = self.snapshots[bisect_right(self._snapshot_steps, step) - 1]
+        engine = GameEngine(self.grid_width, self.grid_height, self.cell_size)
+        snapshot.restore(engine)
+        for i in range(snapshot.step, step):
+            if engine.apply_action(int(self.actions[i])) and i + 1 in self._food:
+                engine.food.position = self._food[i + 1]
+        return engine
+
+    def to_recording(self) -> EpisodeRecording:
+        """Convert to a seed + actions recording (e.g. for video export)."""
+        return EpisodeRecording(self.grid_width, self.grid_height, self.cell_size, self.seed,
+                                self.actions.tolist(), self.score, self.policy_id)
+
+
+def encode_episode(recording: EpisodeRecording, snapshot_interval: int) -> bytes:
+    """
+    Simulate a recording once and encode it as an episode record.
+
+    Food and death events are collected along the way; snapshots are
+    taken at step 0 and every ``snapshot_interval`` steps after that.
+    """
+    engine = GameEngine(recording.grid_width, recording.grid_height, recording.cell_size)
+    engine.reset(recording.seed)
+    snapshots = [Snapshot.capture(engine)]
+    events = []
+    for step, action in enumerate(recording.actions, 1):
+        if engine.apply_action(action):
+            events.append((step, EVENT_FOOD) + engine.food.position)
+        if engine.is_game_over():
+            events.append((step, EVENT_DEATH) + engine.snake.head)
+        elif step % snapshot_interval == 0 and step < len(recording.actions):
+            snapshots.append(Snapshot.capture(engine))
+
+    policy = (recording.policy_id or '').encode()
+    parts = [
+        EPISODE_HEADER.pack(recording.grid_width, recording.grid_height, recording.cell_size,
+                            recording.seed, len(recording.actions), engine.score,
+                            len(events), len(snapshots), len(policy)),
+        policy,
+        pack_actions(np.frombuffer(bytes(recording.actions), dtype=np.uint8)),
+    ]
+    parts.extend(EVENT.pack(*event) for event in events)
+    for s in snapshots:
+        parts.append(SNAPSHOT.pack(s.step, s.score, s.direction, s.grow_pending,
+                                   *s.food, len(s.positions)))
+        parts.append(b''.join(POINT.pack(*p) for p in s.positions))
+    return b''.join(parts)
+
+
+def decode_episode(data: bytes) -> TrajectoryEpisode:
+    """Inverse of ``encode_episode``."""
+    (grid_width, grid_height, cell_size, seed, steps, score,
+     n_events, n_snapshots, policy_len) = EPISODE_HEADER.unpack_from(data)
+    offset = EPISODE_HEADER.size
+    policy_id = data[offset:offset + policy_len].decode() or None
+    offset += policy_len
+    packed_len = -(-steps // 4)
+    actions = unpack_actions(data[offset:offset + packed_len], steps)
+    offset += packed_len
+    events = [EVENT.unpack_from(data, offset + i * EVENT.size) for i in range(n_events)]
+    offset += n_events * EVENT.size
+    snapshots = []
+    for _ in range(n_snapshots):
+        step, snap_score, direction, grow, food_x, food_y, length = SNAPSHOT.unpack_from(data, offset)
+        offset += SNAPSHOT.size
+        positions = list(struct.iter_unpack('<hh', data[offset:offset + length * POINT.size]))
+        offset += length * POINT.size
+        snapshots.append(Snapshot(step, snap_score, direction, bool(grow),
+                                  (food_x, food_y), positions))
+    return TrajectoryEpisode(grid_width, grid_height, cell_size, seed, score, policy_id,
+                             actions, events, snapshots)
+
+
+class TrajectoryWriter:
+    """
+    Append-only writer for the binary trajectory log.
+
+    Episode records are buffered into a chunk that is zlib-compressed and
+    appended to ``<path>.dat`` once it reaches ``chunk_bytes``; the index
+    entries for its episodes are appended to ``<path>.idx`` only after the
+    chunk is on disk, so a crash never leaves an index pointing at
+    missing data. Reopening a log appends to it after cutting off whatever
+    a crash left behind: a torn trailing index entry and any data past the
+    last indexed chunk.
+    """
+
+    def __init__(self, path: str, chunk_bytes: int = 1 << 20, snapshot_interval: int = 256,
+                 compress_level: int = 6):
+        """Open (or create) the log at ``path``."""
+        self.path = path
+        self.chunk_bytes = chunk_bytes
+        self.snapshot_interval = snapshot_interval
+        self.compress_level = compress_level
+        self._recover(path + '.dat', path + '.idx')
+        self._data = self._open(path + '.dat', DATA_MAGIC)
+        self._index = self._open(path + '.idx', INDEX_MAGIC)
+        self.episodes = (self._index.tell() - len(INDEX_MAGIC)) // INDEX_ENTRY.size
+        self._chunk: List[bytes] = []
+        self._chunk_size = 0
+
+    @staticmethod
+    def _recover(data_path: str, index_path: str) -> None:
+        """Truncate both files to the last fully written, indexed chunk."""
+        if not os.path.exists(index_path):
+            return
+        if not os.path.exists(data_path):
+            # Nothing the index points at survived
+            os.remove(index_path)
+            return
+        data_size = os.path.getsize(data_path)
+        with open(index_path, 'r+b') as index, open(data_path, 'r+b') as data:
+            entries = max(os.path.getsize(index_path) - len(INDEX_MAGIC), 0) // INDEX_ENTRY.size
+            data_end = len(DATA_MAGIC)
+            # Drop entries whose chunk is not complete on disk (newest first)
+            while entries:
+                index.seek(len(INDEX_MAGIC) + (entries - 1) * INDEX_ENTRY.size)
+                chunk_offset, _, _ = INDEX_ENTRY.unpack(index.read(INDEX_ENTRY.size))
+                data.seek(chunk_offset)
+                header = data.read(CHUNK_HEADER.size)
+                if len(header) == CHUNK_HEADER.size:
+                    end = chunk_offset + CHUNK_HEADER.size + CHUNK_HEADER.unpack(header)[0]
+                    if end <= data_size:
+                        data_end = end
+                        break
+                entries -= 1
+            index.truncate(len(INDEX_MAGIC) + entries * INDEX_ENTRY.size)
+            data.truncate(min(data_end, data_size))
+
+    @staticmethod
+    def _open(path: str, magic: bytes):
+        f = open(path, 'ab')
+        if f.tell() == 0:
+            f.write(magic)
+        return f
+
+    def append(self, recording: EpisodeRecording) -> int:
+        """Add one episode; returns its index in the log."""
+        record = encode_episode(recording, self.snapshot_interval)
+        self._chunk.append(record)
+        self._chunk_size += len(record)
+        index = self.episodes + len(self._chunk) - 1
+        if self._chunk_size >= self.chunk_bytes:
+            self.flush()
+        return index
+
+    def flush(self) -> None:
+        """Write the pending chunk and its index entries."""
+        if not self._chunk:
+            return
+        raw = b''.join(self._chunk)
+        compressed = zlib.compress(raw, self.compress_level)
+        chunk_offset = self._data.tell()
+        self._data.write(CHUNK_HEADER.pack(len(compressed), len(raw)) + compressed)
+        self._data.flush()
+        os.fsync(self._data.fileno())
+
+        record_offset = 0
+        entries = []
+        for record in self._chunk:
+            entries.append(INDEX_ENTRY.pack(chunk_offset, record_offset, len(record)))
+            record_offset += len(record)
+        self._index.write(b''.join(entries))
+        self._index.flush()
+        os.fsync(self._index.fileno())
+        self.episodes += len(self._chunk)
+        self._chunk = []
+        self._chunk_size = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self) -> 'TrajectoryWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class TrajectoryReader:
+    """
+    Random access to episodes in a trajectory log.
+
+    The index is memory-mapped, so opening a log with millions of
+    episodes is instant; decompressed chunks are kept in a small LRU so
+    reading neighbouring episodes decompresses each chunk once.
+    """
+
+    def __init__(self, path: str, cached_chunks: int = 4):
+        """Open the log at ``path`` (as passed to TrajectoryWriter)."""
+        with open(path + '.idx', 'rb') as f:
+            if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                raise ValueError(f"{path}.idx is not a trajectory index")
+        # A torn trailing entry (crash mid-append) is ignored
+        count = (os.path.getsize(path + '.idx') - len(INDEX_MAGIC)) // INDEX_ENTRY.size
+        dtype = np.dtype([('chunk', '<u8'), ('offset', '<u4'), ('size', '<u4')])
+        if count:
+            self._entries = np.memmap(path + '.idx', dtype=dtype, mode='r',
+                                      offset=len(INDEX_MAGIC), shape=(count,))
+        else:
+            self._entries = np.empty(0, dtype=dtype)
+        self._data = open(path + '.dat', 'rb')
+        if self._data.read(len(DATA_MAGIC)) != DATA_MAGIC:
+            raise ValueError(f"{path}.dat is not a trajectory log")
+        self.cached_chunks = cached_chunks
+        self._chunks: 'OrderedDict[int, bytes]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def episode(self, index: int) -> TrajectoryEpisode:
+        """Decode the episode at ``index``."""
+        chunk_offset, record_offset, size = self._entries[index].tolist()
+        chunk = self._chunk(chunk_offset)
+        return decode_episode(chunk[record_offset:record_offset + size])
+
+    def frame(self, index: int, step: int) -> GameEngine:
+        """Game state of episode ``index`` after ``step`` actions."""
+        return self.episode(index).frame(step)
+
+    def _chunk(self, offset: int) -> bytes:
+        chunk = self._chunks.get(offset)
+        if chunk is not None:
+            self._chunks.move_to_end(offset)
+            return chunk
+        self._data.seek(offset)
+        compressed_size, _ = CHUNK_HEADER.unpack(self._data.read(CHUNK_HEADER.size))
+        chunk = zlib.decompress(self._data.read(compressed_size))
+        self._chunks[offset] = chunk
+        if len(self._chunks) > self.cached_chunks:
+            self._chunks.popitem(last=False)
+        return chunk
+
+    def close(self) -> None:
+        self._data.close()
+
+    def __enter__(self) -> 'TrajectoryReader':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -1,9 +1,11 @@
 import pygame
 import sys
+import time
 from game.game_engine import GameEngine
 from game.renderer import ModernRenderer
 from ai.agent import DQNAgent
 from ui.dashboard import Dashboard
+from utils.stats import MetricSeries, RateMeter
 
 
 class SimpleTrainer:
@@ -30,6 +32,12 @@ def main():
     WINDOW_WIDTH = 1200  # Increased to accommodate dashboard
     WINDOW_HEIGHT = 600
     CELL_SIZE = 20
+
+    # Simulation runs on its own fixed timestep; rendering stays at RENDER_FPS
+    RENDER_FPS = 60
+    SIM_RATES = [5, 10, 20, 60, 240, 1000]  # Steps per second, cycled with +/-
+    MAX_STEPS_PER_FRAME = 100  # Catch-up limit after a stall
+    UNCAPPED_FRAME_BUDGET = 0.012  # Seconds of simulation per frame when uncapped
     
     # Calculate grid dimensions
     GRID_WIDTH = (WINDOW_WIDTH - 300) // CELL_SIZE  # Leave space for dashboard
@@ -42,7 +50,9 @@ def main():
     
     # Initialize game components
     game_engine = GameEngine(GRID_WIDTH, GRID_HEIGHT, CELL_SIZE)
-    renderer = ModernRenderer(screen, CELL_SIZE)
+    # The renderer only redraws changed cells; the dashboard owns the right side
+    game_area = pygame.Rect(0, 0, WINDOW_WIDTH - 300, WINDOW_HEIGHT)
+    renderer = ModernRenderer(screen, CELL_SIZE, viewport=game_area)
     dashboard = Dashboard(screen, width=300)
     
     # Initialize AI components
@@ -67,9 +77,12 @@ def main():
     training_mode = False
     target_episodes = 100
     current_episode = 0
-    episode_scores = []
-    last_action_time = 0
-    action_delay = 100  # milliseconds
+    episode_scores = MetricSeries(window=100)
+    step_rate = 10  # Steps per second
+    uncapped = False  # AI/training steps as fast as the frame budget allows
+    step_accumulator = 0.0
+    steps_per_sec = RateMeter()
+    last_frame_time = time.perf_counter()
     
     # Training stats
     training_stats = {
@@ -86,12 +99,12 @@ def main():
     print("  S - Start training")
     print("  P - Pause training")
     print("  E - Set training episodes")
+    print("  +/- - Change simulation speed")
+    print("  U - Toggle uncapped AI/training speed")
     print("  Arrow keys - Manual control")
     
     running = True
     while running:
-        current_time = pygame.time.get_ticks()
-        
         # Handle events
         for event in pygame.event.get():
             # Dashboard event handling
@@ -106,9 +119,9 @@ def main():
                     if new_w > 3 and new_h > 3:
                         dashboard.set_grid_size(new_w, new_h)
                         game_engine = GameEngine(new_w, new_h, CELL_SIZE)
-                        renderer = ModernRenderer(screen, CELL_SIZE)
+                        renderer = ModernRenderer(screen, CELL_SIZE, viewport=game_area)
                         current_episode = 0
-                        episode_scores = []
+                        episode_scores.reset()
                         print(f"Grid size set to: {new_w}x{new_h}")
                 except Exception as e:
                     print(f"Invalid grid size input: {e}")
@@ -119,7 +132,7 @@ def main():
                     training_mode = True
                     ai_mode = True
                     current_episode = 0
-                    episode_scores = []
+                    episode_scores.reset()
                     print(
                         f"Training started for {target_episodes} episodes (dashboard)"
                     )
@@ -129,6 +142,9 @@ def main():
             # Normal event handling
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type == pygame.WINDOWEXPOSED:
+                renderer.invalidate()
+                dashboard.invalidate()
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_t:
                     ai_mode = not ai_mode
@@ -142,7 +158,7 @@ def main():
                     training_mode = True
                     ai_mode = True
                     current_episode = 0
-                    episode_scores = []
+                    episode_scores.reset()
                     print(
                         f"Starting training for {target_episodes} episodes"
                     )
@@ -160,6 +176,16 @@ def main():
                         )
                     except ValueError:
                         print("Invalid input. Using default 100 episodes")
+                elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    step_rate = next((r for r in SIM_RATES if r > step_rate), SIM_RATES[-1])
+                    print(f"Simulation speed: {step_rate} steps/s")
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    step_rate = next((r for r in reversed(SIM_RATES) if r < step_rate),
+                                     SIM_RATES[0])
+                    print(f"Simulation speed: {step_rate} steps/s")
+                elif event.key == pygame.K_u:
+                    uncapped = not uncapped
+                    print(f"Uncapped AI speed: {'ON' if uncapped else 'OFF'}")
                 # Manual controls (only when not in AI mode)
                 elif not ai_mode:
                     if event.key == pygame.K_UP:
@@ -171,15 +197,26 @@ def main():
                     elif event.key == pygame.K_RIGHT:
                         game_engine.change_direction('RIGHT')
 
-        # Only move snake if in manual, AI, or training mode
-        move_snake = False
-        if training_mode or ai_mode:
-            move_snake = True
-        # Manual mode - move snake on timer
-        elif not ai_mode and not training_mode and current_time - last_action_time > action_delay:
-            move_snake = True
+        # Work out how many simulation steps this frame owes
+        now = time.perf_counter()
+        frame_time = now - last_frame_time
+        last_frame_time = now
+        step_interval = 1.0 / step_rate
+        run_uncapped = uncapped and (ai_mode or training_mode)
+        if run_uncapped:
+            steps_due = None
+            step_deadline = now + UNCAPPED_FRAME_BUDGET
+            step_accumulator = 0.0
+        else:
+            step_accumulator = min(step_accumulator + frame_time,
+                                   MAX_STEPS_PER_FRAME * step_interval)
+            steps_due = int(step_accumulator / step_interval)
+            step_accumulator -= steps_due * step_interval
 
-        if move_snake and current_time - last_action_time > action_delay:
+        steps = 0
+        while (steps < steps_due if steps_due is not None
+               else time.perf_counter() < step_deadline):
+            steps += 1
             if ai_mode or training_mode:
                 # AI logic
                 state = game_engine.get_state_for_ai()
@@ -208,7 +245,7 @@ def main():
                         if current_episode >= target_episodes:
                             training_mode = False
                             ai_mode = False
-                            avg_score = sum(episode_scores) / len(episode_scores)
+                            avg_score = episode_scores.mean
                             print(
                                 f"Training completed! "
                                 f"Average score: {avg_score:.1f}"
@@ -218,7 +255,6 @@ def main():
                     reward = 1 if game_engine.check_food_collision() else 0
                     next_state = game_engine.get_state_for_ai()
                     trainer.store_experience(state, action, reward, next_state, False)
-                last_action_time = current_time
             else:
                 # Manual mode
                 game_engine.move_snake()
@@ -228,11 +264,12 @@ def main():
                 if game_engine.is_game_over():
                     dashboard.add_score(game_engine.score)
                     game_engine.reset()
-                last_action_time = current_time
+            if run_uncapped and not (ai_mode or training_mode):
+                break  # Training finished; back to the fixed rate
+        steps_per_sec.add(steps)
 
-        # Clear screen
-        screen.fill((0, 0, 0))
-        renderer.render(game_engine)
+        # Render the latest state only
+        dirty_rects = renderer.render_dirty(game_engine)
         mode = ("AI Training" if training_mode else ("AI" if ai_mode else "Manual"))
         game_state = {
             'score': game_engine.score,
@@ -241,9 +278,13 @@ def main():
         dashboard.set_training_mode(training_mode, target_episodes)
         dashboard.update_training_stats(training_stats)
         dashboard.update_episode(current_episode)
-        dashboard.render(game_state, mode)
-        pygame.display.flip()
-        clock.tick(60)
+        dashboard.update_performance(
+            steps_per_sec.rate(), clock.get_fps(),
+            'uncapped' if run_uncapped else f'{step_rate}/s'
+        )
+        dirty_rects.extend(dashboard.render(game_state, mode))
+        pygame.display.update(dirty_rects)
+        clock.tick(RENDER_FPS)
 
     pygame.quit()
     sys.exit()
@@ -0,0 +1,177 @@
+"""
+Headless benchmark for the pygame render path.
+
+Drives ModernRenderer (full and dirty-rect) and Dashboard through
+scripted game states on offscreen surfaces using SDL's dummy video
+driver, so it runs on machines without a display. Reports per-frame
+time distributions for each scenario.
+
+Run from src/:
+    python render_benchmark.py
+    python render_benchmark.py --frames 1000 --scenario long_snake --output bench.json
+"""
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Must be set before pygame initializes its display
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+
+from game.game_engine import GameEngine
+from game.renderer import ModernRenderer
+from ui.dashboard import Dashboard
+from utils.stats import MetricSeries
+
+
+DASHBOARD_WIDTH = 300
+
+# name -> (grid width, grid height, cell size, snake length)
+SCENARIOS: Dict[str, Tuple[int, int, int, int]] = {
+    'short_snake': (20, 20, 20, 3),
+    'default_grid': (45, 30, 20, 40),
+    'long_snake': (45, 30, 20, 1000),
+    'huge_grid': (200, 150, 4, 50),
+    'huge_long_snake': (200, 150, 4, 20000),
+}
+
+
+def serpentine_path(width: int, height: int) -> List[Tuple[int, int]]:
+    """Every cell once, row by row, alternating direction (adjacent steps)."""
+    path = []
+    for y in range(height):
+        xs = range(width) if y % 2 == 0 else range(width - 1, -1, -1)
+        path.extend((x, y) for x in xs)
+    return path
+
+
+class ScriptedGame:
+    """
+    Deterministic game states for a scenario.
+
+    The snake slides along a serpentine path through the grid with food a
+    few cells ahead of the head, and the dashboard sees a score, episode
+    and mode change at a fixed cadence, like a training run.
+    """
+
+    def __init__(self, width: int, height: int, cell_size: int, length: int):
+        self.engine = GameEngine(width, height, cell_size)
+        self.path = serpentine_path(width, height)
+        self.length = min(length, len(self.path) - 1)
+        self.head = self.length - 1
+        self.frame = 0
+
+    def advance(self, dashboard: Dashboard) -> str:
+        """Move to the next state and return the dashboard mode label."""
+        path, count = self.path, len(self.path)
+        self.head = (self.head + 1) % count
+        self.engine.snake.positions = [path[(self.head - i) % count] for i in range(self.length)]
+        self.engine.food.position = path[(self.head + 5 - self.frame % 5) % count]
+        self.engine.steps += 1
+        if self.frame % 50 == 0:
+            dashboard.add_score(self.frame // 50 % 17)
+            dashboard.update_episode(self.frame // 50)
+        self.frame += 1
+        return 'AI Training' if self.frame // 500 % 2 == 0 else 'AI'
+
+
+def _timed(series: MetricSeries, fn, *args) -> Any:
+    start = time.perf_counter()
+    result = fn(*args)
+    series.append((time.perf_counter() - start) * 1000)
+    return result
+
+
+def run_scenario(name: str, frames: int, warmup: int = 20) -> Dict[str, Any]:
+    """Render ``frames`` scripted frames of one scenario; return timing summaries."""
+    width, height, cell_size, length = SCENARIOS[name]
+    renderer_size = (100 + width * cell_size, max(100 + height * cell_size, 600))
+    screen = pygame.Surface((renderer_size[0] + DASHBOARD_WIDTH, renderer_size[1]),
+                            0, pygame.display.get_surface())
+    game_area = pygame.Rect((0, 0), renderer_size)
+    renderer = ModernRenderer(screen, cell_size, viewport=game_area)
+    # Full redraws go to their own surface so they don't disturb the dirty path
+    full_renderer = ModernRenderer(screen.copy(), cell_size)
+    dashboard = Dashboard(screen, width=DASHBOARD_WIDTH)
+    dashboard.set_training_mode(True, frames // 50 + 1)
+
+    timings = {key: MetricSeries(window=frames, quantiles=(0.5, 0.9, 0.99))
+               for key in ('render_full_ms', 'render_dirty_ms', 'dashboard_ms', 'frame_ms')}
+    dirty_rects = MetricSeries(window=frames)
+    game = ScriptedGame(width, height, cell_size, length)
+    for frame in range(warmup + frames):
+        mode = game.advance(dashboard)
+        game_state = {'score': game.engine.score, 'steps': game.engine.steps}
+        if frame < warmup:
+            renderer.render_dirty(game.engine)
+            dashboard.render(game_state, mode)
+            continue
+        # Full redraw for comparison, then the incremental path main.py uses
+        _timed(timings['render_full_ms'], full_renderer.render, game.engine)
+        start = time.perf_counter()
+        rects = _timed(timings['render_dirty_ms'], renderer.render_dirty, game.engine)
+        rects += _timed(timings['dashboard_ms'], dashboard.render, game_state, mode)
+        timings['frame_ms'].append((time.perf_counter() - start) * 1000)
+        dirty_rects.append(len(rects))
+
+    result = {
+        'grid': [width, height],
+        'cell_size': cell_size,
+        'snake_length': game.length,
+        'frames': frames,
+        'dirty_rects_per_frame': dirty_rects.mean,
+        'text_cache': {'hits': dashboard.text_cache.hits,
+                       'misses': dashboard.text_cache.misses},
+    }
+    for key, series in timings.items():
+        summary = series.summary()
+        result[key] = {k: summary[k] for k in ('mean', 'p50', 'p90', 'p99', 'max')}
+    return result
+
+
+def print_report(results: Dict[str, Dict[str, Any]]) -> None:
+    """Print a table of per-scenario timings in milliseconds."""
+    header = (f"{'scenario':<16} {'grid':>9} {'len':>6} "
+              f"{'full p50':>9} {'full p99':>9} {'dirty p50':>10} {'dirty p99':>10} "
+              f"{'dash p50':>9} {'dash p99':>9} {'frame p99':>10}")
+    print(header)
+    print('-' * len(header))
+    for name, r in results.items():
+        grid = f"{r['grid'][0]}x{r['grid'][1]}"
+        print(f"{name:<16} {grid:>9} {r['snake_length']:>6} "
+              f"{r['render_full_ms']['p50']:>9.3f} {r['render_full_ms']['p99']:>9.3f} "
+              f"{r['render_dirty_ms']['p50']:>10.3f} {r['render_dirty_ms']['p99']:>10.3f} "
+              f"{r['dashboard_ms']['p50']:>9.3f} {r['dashboard_ms']['p99']:>9.3f} "
+              f"{r['frame_ms']['p99']:>10.3f}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--frames', type=int, default=500, help='Measured frames per scenario')
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS),
+                        help='Scenario to run (repeatable; default all)')
+    parser.add_argument('--output', help='Write results as JSON')
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    # The dummy driver still needs a display surface for pixel formats
+    pygame.display.set_mode((1, 1))
+
+    results = {}
+    for name in args.scenario or SCENARIOS:
+        results[name] = run_scenario(name, args.frames)
+    pygame.quit()
+
+    print_report(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'sdl_driver': os.environ['SDL_VIDEODRIVER'],
+                       'pygame': pygame.version.ver, 'scenarios': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, Union
+
+from ..utils.metrics import REGISTRY
+from .protocol import PROTOCOL_DELTA
+
+
+Message = Union[str, bytes]
+
+BYTES_SENT = REGISTRY.counter('snake_ws_bytes_sent', 'Bytes sent to WebSocket clients',
+                              ['protocol'])
+FRAMES_SENT = REGISTRY.counter('snake_ws_frames_sent', 'Messages sent to WebSocket clients',
+                               ['protocol'])
+FRAMES_DROPPED = REGISTRY.counter('snake_ws_frames_dropped',
+                                  'State frames shed for clients that fell behind', ['protocol'])
+CLIENT_BYTES = REGISTRY.histogram(
+    'snake_ws_client_bytes', 'Total bytes sent per client connection (observed on disconnect)',
+    buckets=(1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9))
+SLOW_DISCONNECTS = REGISTRY.counter('snake_ws_slow_disconnects',
+                                    'Clients disconnected for blocking longer than max_lag')
+
+
+class ClientChannel:
+    """
+    One client's bounded send queue and writer task.
+
+    State frames are droppable: when the queue is full a JSON client
+    keeps only the newest frames (each is a full state), while a delta
+    client has its queued deltas replaced by a fresh keyframe so it can
+    resync. Command replies are never dropped.
+    """
+
+    def __init__(self, ws, protocol: str, max_queue: int):
+        self.ws = ws
+        self.protocol = protocol
+        self.max_queue = max_queue
+        self.queue: Deque[Tuple[Message, bool]] = deque()
+        self.frames_queued = 0
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.sending_since: Optional[float] = None
+
+        # Metrics
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.bytes_sent = 0
+        self.max_depth = 0
+        self._bytes_counter = BYTES_SENT.labels(protocol)
+        self._frames_counter = FRAMES_SENT.labels(protocol)
+        self._dropped_counter = FRAMES_DROPPED.labels(protocol)
+
+    def push_frame(self, message: Message, keyframe: Callable[[], Optional[str]]) -> None:
+        """Queue a state frame, shedding old frames if the client is behind."""
+        if self.frames_queued >= self.max_queue:
+            if self.protocol == PROTOCOL_DELTA:
+                self._drop_frames(self.frames_queued)
+                resync = keyframe()
+                if resync is not None:
+                    # The keyframe already contains this tick's state
+                    self._append(resync, True)
+                    return
+            else:
+                self._drop_frames(1)
+        self._append(message, True)
+
+    def push_reply(self, message: Message) -> None:
+        """Queue a message that must not be dropped."""
+        self._append(message, False)
+
+    def _append(self, message: Message, droppable: bool) -> None:
+        self.queue.append((message, droppable))
+        if droppable:
+            self.frames_queued += 1
+        if len(self.queue) > self.max_depth:
+            self.max_depth = len(self.queue)
+        self.wakeup.set()
+
+    def _drop_frames(self, count: int) -> None:
+        """Drop the ``count`` oldest droppable frames."""
+        kept = deque()
+        for message, droppable in self.queue:
+            if droppable and count:
+                count -= 1
+                self.frames_queued -= 1
+                self.frames_dropped += 1
+                self._dropped_counter.inc()
+            else:
+                kept.append((message, droppable))
+        self.queue = kept
+
+    async def run(self) -> None:
+        """Writer loop: drain the queue to the socket."""
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            while self.queue:
+                message, droppable = self.queue.popleft()
+                if droppable:
+                    self.frames_queued -= 1
+                self.sending_since = time.monotonic()
+                if isinstance(message, bytes):
+                    await self.ws.send_bytes(message)
+                else:
+                    await self.ws.send_text(message)
+                self.sending_since = None
+                self.frames_sent += 1
+                self.bytes_sent += len(message)
+                self._frames_counter.inc()
+                self._bytes_counter.inc(len(message))
+
+    def lag(self, now: float) -> float:
+        """Seconds the current send has been blocked (0 when idle)."""
+        return now - self.sending_since if self.sending_since is not None else 0.0
+
+
+class Broadcaster:
+    """
+    Fan-out of state frames to many WebSocket clients.
+
+    ``publish`` serializes each protocol's frame once (by the caller) and
+    only appends to per-client queues, so the game tick never awaits a
+    socket. Each client has its own writer task; clients whose send has
+    been blocked for longer than ``max_lag`` seconds are disconnected.
+    """
+
+    def __init__(self, max_queue: int = 8, max_lag: float = 5.0):
+        """Initialize broadcaster with per-client queue size and lag limit."""
+        self.max_queue = max_queue
+        self.max_lag = max_lag
+        self.channels: Dict[Any, ClientChannel] = {}
+        self.disconnected_slow = 0
+        # Totals carried over from clients that have disconnected
+        self.closed_totals = {'frames_sent': 0, 'frames_dropped': 0, 'bytes_sent': 0}
+
+    def add(self, ws, protocol: str, initial: Optional[Message] = None) -> ClientChannel:
+        """Register a client and start its writer task."""
+        channel = ClientChannel(ws, protocol, self.max_queue)
+        if initial is not None:
+            channel.push_reply(initial)
+        channel.task = asyncio.create_task(self._run_channel(channel))
+        self.channels[ws] = channel
+        return channel
+
+    async def _run_channel(self, channel: ClientChannel) -> None:
+        try:
+            await channel.run()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Socket closed or errored; the client is gone
+            pass
+        finally:
+            self._forget(channel.ws)
+
+    def remove(self, ws) -> None:
+        """Unregister a client and stop its writer task."""
+        channel = self._forget(ws)
+        if channel is not None and channel.task is not None:
+            channel.task.cancel()
+
+    def _forget(self, ws) -> Optional[ClientChannel]:
+        channel = self.channels.pop(ws, None)
+        if channel is not None:
+            self.closed_totals['frames_sent'] += channel.frames_sent
+            self.closed_totals['frames_dropped'] += channel.frames_dropped
+            self.closed_totals['bytes_sent'] += channel.bytes_sent
+            CLIENT_BYTES.observe(channel.bytes_sent)
+        return channel
+
+    def protocols(self) -> set:
+        """Protocols used by currently connected clients."""
+        return {channel.protocol for channel in self.channels.values()}
+
+    def publish(self, frames: Dict[str, Message],
+                keyframe: Callable[[], Optional[str]]) -> None:
+        """
+        Queue this tick's frame for every client.
+
+        Args:
+            frames: Encoded frame per protocol
+            keyframe: Returns a resync keyframe for delta clients that fell
+                behind (only called when needed)
+        """
+        cached = []
+
+        def cached_keyframe() -> Optional[str]:
+            if not cached:
+                cached.append(keyframe())
+            return cached[0]
+
+        now = time.monotonic()
+        for ws, channel in list(self.channels.items()):
+            if channel.lag(now) > self.max_lag:
+                self.disconnected_slow += 1
+                SLOW_DISCONNECTS.inc()
+                self.remove(ws)
+                asyncio.create_task(self._close(ws))
+                continue
+            frame = frames.get(channel.protocol)
+            if frame is not None:
+                channel.push_frame(frame, cached_keyframe)
+
+    async def send(self, ws, message: Message) -> None:
+        """Send a reply to one client, in order with its state frames."""
+        channel = self.channels.get(ws)
+        if channel is not None:
+            channel.push_reply(message)
+        elif isinstance(message, bytes):
+            await ws.send_bytes(message)
+        else:
+            await ws.send_text(message)
+
+    @staticmethod
+    async def _close(ws) -> None:
+        try:
+            await ws.close(code=1008)
+        except Exception:
+            pass
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Return queue depth, drop and throughput metrics."""
+        channels = list(self.channels.values())
+        depths = [len(c.queue) for c in channels]
+        return {
+            'clients': len(channels),
+            'queue_depth_max': max(depths) if depths else 0,
+            'queue_depth_total': sum(depths),
+            'frames_sent': (sum(c.frames_sent for c in channels) +
+                            self.closed_totals['frames_sent']),
+            'frames_dropped': (sum(c.frames_dropped for c in channels) +
+                               self.closed_totals['frames_dropped']),
+            'bytes_sent': (sum(c.bytes_sent for c in channels) +
+                           self.closed_totals['bytes_sent']),
+            'disconnected_slow': self.disconnected_slow,
+        }
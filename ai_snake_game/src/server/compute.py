@@ -0,0 +1,293 @@
+import asyncio
+import itertools
+import multiprocessing as mp
+import random
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import torch
+
+from ..utils.log import get_logger
+from ..utils.metrics import observe_update
+from ..utils.stats import MetricSeries
+
+log = get_logger('compute')
+
+
+DIRECTIONS = ['UP', 'DOWN', 'LEFT', 'RIGHT']
+MAX_JOBS_KEPT = 256  # Finished job records retained for /jobs lookups
+
+# Per-process cache so pool workers build their agent once
+_worker_agent = None
+_worker_agent_key = None
+
+
+def _init_worker() -> None:
+    """Process pool initializer: one torch thread per worker."""
+    torch.set_num_threads(1)
+
+
+def _warm_up() -> None:
+    """Import the game and agent modules so the first job starts fast."""
+    from ..ai import agent  # noqa: F401
+    from ..game import game_engine  # noqa: F401
+
+
+def _worker_agent_for(agent_config: Dict[str, Any]):
+    global _worker_agent, _worker_agent_key
+    from ..ai.agent import DQNAgent
+
+    key = repr(sorted(agent_config.items()))
+    if _worker_agent is None or _worker_agent_key != key:
+        _worker_agent = DQNAgent(agent_config['state_size'], agent_config['action_size'],
+                                 agent_config)
+        _worker_agent.q_network.eval()
+        _worker_agent_key = key
+    return _worker_agent
+
+
+def evaluate_chunk(agent_config: Dict[str, Any], weights: Dict[str, np.ndarray],
+                   grid: tuple, episodes: int, max_steps: int, seed: int) -> List[int]:
+    """
+    Play ``episodes`` greedy episodes with the given Q-network weights.
+
+    Runs in a pool process; episodes end early after ``max_steps`` steps
+    so a looping policy cannot hang the job.
+    """
+    from ..game.game_engine import GameEngine
+
+    random.seed(seed)
+    np.random.seed(seed)
+    agent = _worker_agent_for(agent_config)
+    agent.q_network.load_state_dict({k: torch.from_numpy(v) for k, v in weights.items()})
+    engine = GameEngine(*grid, seed=seed)
+    scores = []
+    for _ in range(episodes):
+        engine.reset()
+        steps = 0
+        while not engine.is_game_over() and steps < max_steps:
+            action = agent.act(engine.get_state_for_ai(), epsilon=0.0)
+            engine.change_direction(DIRECTIONS[action])
+            engine.move_snake()
+            if engine.check_food_collision():
+                engine.eat_food()
+                engine.spawn_food()
+            steps += 1
+        scores.append(engine.score)
+    return scores
+
+
+class ComputeExecutor:
+    """
+    Keeps blocking work off the asyncio event loop.
+
+    Torch updates on the shared agent (``replay``) run on a single
+    dedicated thread, so they are serialized with each other and only
+    contend with acting through ``DQNAgent.update_lock``. Long jobs such
+    as evaluations run in a spawned process pool on a snapshot of the
+    weights. Jobs get an id; their progress and result are delivered to
+    callbacks on the event loop so handlers can stream them to clients.
+    """
+
+    def __init__(self, agent, process_workers: int = 2, max_pending_updates: int = 64):
+        """
+        Initialize executor pools.
+
+        Args:
+            agent: Shared DQNAgent
+            process_workers: Processes for evaluation jobs
+            max_pending_updates: Replay requests queued beyond this are dropped
+        """
+        self.agent = agent
+        self.process_workers = process_workers
+        self.max_pending_updates = max_pending_updates
+        self.torch_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='torch')
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._job_ids = itertools.count(1)
+        self.jobs: Dict[int, Dict[str, Any]] = {}
+        # Written by one thread each, so no lock is needed
+        self.updates_submitted = 0
+        self.updates_finished = 0
+
+        # Metrics
+        self.updates = 0
+        self.updates_dropped = 0
+        self.update_ms = MetricSeries(window=600)
+        self.losses = MetricSeries(window=600)
+
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        """Process pool, started on first use (and again after it breaks)."""
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.process_workers,
+                mp_context=mp.get_context('spawn'),
+                initializer=_init_worker,
+            )
+        return self._process_pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        """Drop a broken pool so the next job starts a fresh one."""
+        if self._process_pool is pool:
+            log.warning("evaluation process pool broke; it will be restarted")
+            self._process_pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def pending_updates(self) -> int:
+        return self.updates_submitted - self.updates_finished
+
+    def warm_up(self) -> None:
+        """Start the pool processes ahead of the first job (spawn is slow)."""
+        pool = self.process_pool
+        try:
+            for _ in range(self.process_workers):
+                pool.submit(_warm_up)
+        except BrokenProcessPool:
+            self._discard_pool(pool)
+
+    # --- Torch thread ---
+
+    def request_update(self) -> bool:
+        """Queue one ``agent.replay()`` on the torch thread; False if dropped."""
+        if self.pending_updates >= self.max_pending_updates:
+            self.updates_dropped += 1
+            return False
+        self.updates_submitted += 1
+        self.torch_pool.submit(self._run_update)
+        return True
+
+    def _run_update(self) -> None:
+        start = time.perf_counter()
+        try:
+            loss = self.agent.replay()
+        finally:
+            self.updates_finished += 1
+        elapsed = time.perf_counter() - start
+        self.update_ms.append(elapsed * 1000)
+        observe_update(elapsed, loss)
+        if loss is not None:
+            self.updates += 1
+            self.losses.append(loss)
+
+    def run_torch(self, fn: Callable, *args) -> Future:
+        """Run a callable on the torch thread (serialized with updates)."""
+        return self.torch_pool.submit(fn, *args)
+
+    # --- Jobs ---
+
+    def _new_job(self, kind: str, total: int) -> Dict[str, Any]:
+        job = {'id': next(self._job_ids), 'kind': kind, 'status': 'queued',
+               'done': 0, 'total': total, 'started': time.time(), 'result': None}
+        self.jobs[job['id']] = job
+        if len(self.jobs) > MAX_JOBS_KEPT:
+            for job_id in list(self.jobs)[:len(self.jobs) - MAX_JOBS_KEPT]:
+                if self.jobs[job_id]['status'] in ('done', 'failed'):
+                    del self.jobs[job_id]
+        return job
+
+    def submit_evaluation(self, grid: tuple, episodes: int, max_steps: int = 1000,
+                          on_progress: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                          on_done: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                          chunk_size: int = 5) -> Dict[str, Any]:
+        """
+        Start a greedy evaluation of the current weights in the process pool.
+
+        Episodes are split into chunks that run in parallel; ``on_progress``
+        is called (on the event loop) as each chunk finishes and ``on_done``
+        with the finished job. Must be called from the event loop.
+
+        Returns:
+            Dict[str, Any]: The job record (``id``, ``status``, ``done``, ``total``)
+        """
+        job = self._new_job('evaluate', episodes)
+        agent = self.agent
+        with agent.update_lock:
+            weights = {k: v.detach().cpu().numpy().copy()
+                       for k, v in agent.q_network.state_dict().items()}
+        agent_config = agent.checkpoint_dict()['config']
+
+        chunks = [min(chunk_size, episodes - i) for i in range(0, episodes, chunk_size)]
+        pool = self.process_pool
+        futures: List[asyncio.Future] = []
+        try:
+            for n in chunks:
+                futures.append(asyncio.wrap_future(pool.submit(
+                    evaluate_chunk, agent_config, weights, grid, n, max_steps,
+                    int(np.random.randint(0, 2 ** 31 - 1))
+                )))
+        except BrokenProcessPool as e:
+            # Fail this job; the next one gets a new pool
+            self._discard_pool(pool)
+            for future in futures:
+                future.cancel()
+            futures = [_failed_future(e)]
+        job['status'] = 'running'
+        job['task'] = asyncio.ensure_future(
+            self._collect(job, pool, futures, on_progress, on_done)
+        )
+        return job
+
+    async def _collect(self, job: Dict[str, Any], pool: ProcessPoolExecutor,
+                       futures: List[asyncio.Future], on_progress, on_done) -> None:
+        scores: List[int] = []
+        try:
+            for future in asyncio.as_completed(futures):
+                scores.extend(await future)
+                job['done'] = len(scores)
+                if on_progress:
+                    await _maybe_await(on_progress(job))
+            job['status'] = 'done'
+            job['result'] = {
+                'avg_score': sum(scores) / len(scores) if scores else 0,
+                'scores': scores,
+            }
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                self._discard_pool(pool)
+            job['status'] = 'failed'
+            job['result'] = {'error': repr(e)}
+        job['elapsed'] = time.time() - job['started']
+        if on_done:
+            await _maybe_await(on_done(job))
+
+    def job_info(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Public view of a job (without its task handle)."""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        return {k: v for k, v in job.items() if k != 'task'}
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Return update throughput and job counts."""
+        statuses: Dict[str, int] = {}
+        for job in self.jobs.values():
+            statuses[job['status']] = statuses.get(job['status'], 0) + 1
+        return {
+            'updates': self.updates,
+            'updates_pending': self.pending_updates,
+            'updates_dropped': self.updates_dropped,
+            'update_ms': self.update_ms.summary(),
+            'loss': self.losses.summary(),
+            'jobs': statuses,
+        }
+
+    def close(self) -> None:
+        """Stop both pools."""
+        self.torch_pool.shutdown(wait=True)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _failed_future(error: BaseException) -> asyncio.Future:
+    future = asyncio.get_running_loop().create_future()
+    future.set_exception(error)
+    return future
+
+
+async def _maybe_await(value) -> None:
+    if asyncio.iscoroutine(value):
+        await value
@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+
+from ..game.game_engine import GameEngine
+from ..utils.log import get_logger
+from ..utils.metrics import REGISTRY, observe_update
+from ..utils.stats import RateMeter
+
+
+DIRECTIONS = ['UP', 'DOWN', 'LEFT', 'RIGHT']
+# The worker drops the GIL this often so the event loop thread is not
+# held off for a whole interpreter switch interval (5 ms by default)
+YIELD_INTERVAL = 0.002
+
+log = get_logger('headless')
+
+HEADLESS_ENV_STEPS = REGISTRY.counter(
+    'snake_env_steps', 'Environment steps taken', ['runner']).labels('headless')
+
+
+class HeadlessTrainer:
+    """
+    Runs a session's training episodes as fast as possible on a thread.
+
+    The worker owns a private GameEngine, so nothing it mutates is read
+    by the event loop. Every ``frame_interval`` seconds it publishes a
+    small frame (snake, food, counters) by swapping a reference; finished
+    episode scores go through a deque. The session drains both on its
+    normal broadcast tick, so clients see a sampled view of the run.
+    Training follows the step-per-tick mode exactly (same rewards, one
+    replay per finished episode) and shares the agent with it.
+    """
+
+    def __init__(self, agent, grid_width: int, grid_height: int, cell_size: int,
+                 episodes: int, frame_interval: float = 0.1):
+        """
+        Initialize trainer.
+
+        Args:
+            agent: Shared DQNAgent
+            grid_width, grid_height, cell_size: Engine dimensions
+            episodes: Episodes to run before stopping
+            frame_interval: Seconds between published frames
+        """
+        self.agent = agent
+        self.engine = GameEngine(grid_width, grid_height, cell_size)
+        self.episodes = episodes
+        self.frame_interval = frame_interval
+        self.episodes_done = 0
+        self.scores: Deque[int] = deque()
+        self.frame: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Metrics
+        self.env_steps = RateMeter()
+        self.updates = RateMeter()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name='headless-trainer', daemon=True)
+        self._thread.start()
+
+    def stop(self, wait: bool = True) -> None:
+        self._stop.set()
+        if wait and self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def drain_scores(self) -> List[int]:
+        """Return scores of episodes finished since the last call."""
+        scores = []
+        while self.scores:
+            scores.append(self.scores.popleft())
+        return scores
+
+    def _publish(self) -> None:
+        engine = self.engine
+        self.frame = {
+            'snake': engine.snake.get_body_positions(),
+            'food': engine.food.get_position(),
+            'score': engine.score,
+            'steps': engine.steps,
+            'game_over': engine.is_game_over(),
+        }
+
+    def _run(self) -> None:
+        try:
+            self._train()
+        except Exception as e:
+            self.error = repr(e)
+            log.exception("headless training failed")
+        finally:
+            self._publish()
+
+    def _train(self) -> None:
+        agent = self.agent
+        engine = self.engine
+        engine.reset()
+        next_frame = next_yield = time.monotonic()
+        steps = 0
+        while not self._stop.is_set() and self.episodes_done < self.episodes:
+            state = engine.get_state_for_ai()
+            # act_batch skips autograd and the visualization bookkeeping of act
+            action = int(agent.act_batch(np.asarray([state], dtype=np.float32))[0])
+            engine.change_direction(DIRECTIONS[action])
+            engine.move_snake()
+            if engine.check_food_collision():
+                engine.eat_food()
+                engine.spawn_food()
+            steps += 1
+
+            if not engine.is_game_over():
+                reward = 1 if engine.check_food_collision() else 0
+                agent.remember(state, action, reward, engine.get_state_for_ai(), False)
+            else:
+                agent.remember(state, action, -10, engine.get_state_for_ai(), True)
+                if len(agent.memory) > 32:
+                    start = time.perf_counter()
+                    loss = agent.replay()
+                    observe_update(time.perf_counter() - start, loss)
+                    if loss is not None:
+                        self.updates.add()
+                self.episodes_done += 1
+                self.scores.append(engine.score)
+                if self.episodes_done < self.episodes:
+                    engine.reset()
+
+            now = time.monotonic()
+            if now >= next_yield:
+                time.sleep(0)
+                next_yield = now + YIELD_INTERVAL
+            if now >= next_frame:
+                self.env_steps.add(steps, now)
+                HEADLESS_ENV_STEPS.inc(steps)
+                steps = 0
+                self._publish()
+                next_frame = now + self.frame_interval
+        self.env_steps.add(steps)
+        HEADLESS_ENV_STEPS.inc(steps)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Return current throughput."""
+        return {
+            'env_steps_per_sec': self.env_steps.rate(),
+            'updates_per_sec': self.updates.rate(),
+            'episodes_done': self.episodes_done,
+        }
@@ -0,0 +1,166 @@
+import asyncio
+import copy
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from ..utils.metrics import REGISTRY
+from ..utils.stats import MetricSeries, RateMeter
+
+
+# Binary response: uint32 rows, uint32 action_size, rows * uint8 action,
+# then rows * action_size float32 Q-values (all little-endian)
+RESPONSE_HEADER = struct.Struct('<II')
+
+INFERENCE_ROWS = REGISTRY.counter('snake_inference_rows', 'Observations answered by /inference')
+INFERENCE_LATENCY = REGISTRY.histogram('snake_inference_latency_seconds',
+                                       'End-to-end /inference batching + forward time')
+
+
+def encode_binary(actions: np.ndarray, q_values: np.ndarray) -> bytes:
+    """Pack an inference result into the compact binary response format."""
+    rows, action_size = q_values.shape
+    return (RESPONSE_HEADER.pack(rows, action_size) +
+            actions.astype(np.uint8).tobytes() +
+            q_values.astype('<f4').tobytes())
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent inference requests into single forward passes.
+
+    ``infer`` queues a request's rows and awaits its slice of the result.
+    A batch is flushed when it reaches ``max_batch`` rows or when its
+    oldest request has waited ``max_latency_ms``, whichever comes first.
+    The forward pass runs on a dedicated thread against an eval-mode copy
+    of the Q-network (no dropout), refreshed under the agent's
+    ``update_lock`` whenever the agent has trained or a model was swapped
+    in, so it neither blocks the event loop nor reads weights mid-update.
+    """
+
+    def __init__(self, agent, max_batch: int = 256, max_latency_ms: float = 5.0):
+        """Initialize batcher for the live agent."""
+        self.agent = agent
+        self.max_batch = max_batch
+        self.max_latency = max_latency_ms / 1000.0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='inference')
+        self._pending: List[Tuple[np.ndarray, asyncio.Future]] = []
+        self._pending_rows = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._network = None
+        self._network_version = None
+
+        # Metrics
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.batch_rows = MetricSeries(window=1000)
+        self.batch_requests = MetricSeries(window=1000)
+        self.forward_ms = MetricSeries(window=1000)
+        self.latency_ms = MetricSeries(window=1000, quantiles=(0.5, 0.9, 0.99))
+        self.rows_per_sec = RateMeter()
+
+    async def infer(self, states: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return greedy actions and Q-values for a (rows, state_size) array.
+
+        Raises:
+            ValueError: If the observations do not match the agent's input size
+        """
+        if states.ndim != 2 or states.shape[1] != self.agent.state_size:
+            raise ValueError(f"Expected observations of length {self.agent.state_size}, "
+                             f"got shape {tuple(states.shape)}")
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((states, future))
+        self._pending_rows += len(states)
+        self.requests += 1
+
+        if self._pending_rows >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_latency, self._flush)
+
+        result = await future
+        elapsed = time.perf_counter() - start
+        self.latency_ms.append(elapsed * 1000)
+        INFERENCE_LATENCY.observe(elapsed)
+        return result
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        self._pending_rows = 0
+        asyncio.ensure_future(self._run_batch(pending))
+
+    async def _run_batch(self, pending: List[Tuple[np.ndarray, asyncio.Future]]) -> None:
+        batch = np.concatenate([states for states, _ in pending]).astype(np.float32, copy=False)
+        try:
+            q_values, forward_ms = await asyncio.wrap_future(
+                self._executor.submit(self._forward, batch)
+            )
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        actions = q_values.argmax(axis=1)
+        self.batches += 1
+        self.rows += len(batch)
+        self.rows_per_sec.add(len(batch))
+        INFERENCE_ROWS.inc(len(batch))
+        self.batch_rows.append(len(batch))
+        self.batch_requests.append(len(pending))
+        self.forward_ms.append(forward_ms)
+
+        offset = 0
+        for states, future in pending:
+            end = offset + len(states)
+            if not future.done():
+                future.set_result((actions[offset:end], q_values[offset:end]))
+            offset = end
+
+    def _forward(self, batch: np.ndarray) -> Tuple[np.ndarray, float]:
+        start = time.perf_counter()
+        network = self._current_network()
+        with torch.no_grad():
+            q_values = network(torch.from_numpy(batch)).numpy()
+        return q_values, (time.perf_counter() - start) * 1000
+
+    def _current_network(self):
+        """Eval-mode copy of the live Q-network, refreshed when it changes."""
+        agent = self.agent
+        version = (id(agent.q_network), agent.step_count)
+        if version != self._network_version:
+            with agent.update_lock:
+                network = copy.deepcopy(agent.q_network)
+            network.eval()
+            self._network = network
+            self._network_version = version
+        return self._network
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Return throughput, batch sizes and latency."""
+        return {
+            'requests': self.requests,
+            'rows': self.rows,
+            'batches': self.batches,
+            'rows_per_sec': self.rows_per_sec.rate(),
+            'batch_rows': self.batch_rows.summary(),
+            'batch_requests': self.batch_requests.summary(),
+            'forward_ms': self.forward_ms.summary(),
+            'latency_ms': self.latency_ms.summary(),
+        }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,380 @@
+"""
+WebSocket load generator for backend_server.py.
+
+Spawns the real FastAPI app under uvicorn on a local port (or targets
+``--url``), connects N simulated clients and reports frame latency,
+receive rate, drops and command round trips per client role.
+
+Run from ai_snake_game/:
+    python -m src.server.loadtest --clients 200 --duration 30
+    python -m src.server.loadtest --clients 500 --protocol delta1 --output report.json
+
+Roles (``--mix``):
+    spectator  joins one of ``--shared-sessions`` training games and only receives
+    player     own game in manual mode; steers a few times per second
+    commander  own game; cycles set_mode and runs small evaluate_model jobs
+
+Frame latency is measured on JSON frames from their ``server_time``;
+delta1 clients report rate, inter-arrival gaps and sequence-gap drops.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+import websockets
+
+from ..utils.stats import MetricSeries
+from .protocol import HEADER, PROTOCOL_DELTA, PROTOCOL_JSON
+
+
+ROLES = ('spectator', 'player', 'commander')
+DIRECTIONS = ['UP', 'DOWN', 'LEFT', 'RIGHT']
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class RoleStats:
+    """Aggregated measurements for all clients of one role."""
+
+    def __init__(self):
+        self.clients = 0
+        self.connected = 0
+        self.failed = 0
+        self.disconnected = 0
+        self.frames = 0
+        self.bytes = 0
+        self.dropped = 0
+        self.commands = 0
+        self.latency_ms = MetricSeries(window=1000, quantiles=(0.5, 0.9, 0.99))
+        self.gap_ms = MetricSeries(window=1000, quantiles=(0.5, 0.9, 0.99))
+        self.reply_ms = MetricSeries(window=1000, quantiles=(0.5, 0.9, 0.99))
+
+    def report(self, duration: float) -> Dict[str, Any]:
+        per_client = max(self.connected, 1) * duration
+        return {
+            'clients': self.clients,
+            'connected': self.connected,
+            'failed': self.failed,
+            'disconnected_early': self.disconnected,
+            'frames_per_client_per_sec': self.frames / per_client,
+            'bytes_per_client_per_sec': self.bytes / per_client,
+            'dropped_frames': self.dropped,
+            'commands_sent': self.commands,
+            'frame_latency_ms': _quantiles(self.latency_ms),
+            'frame_gap_ms': _quantiles(self.gap_ms),
+            'command_reply_ms': _quantiles(self.reply_ms),
+        }
+
+
+def _quantiles(series: MetricSeries) -> Dict[str, float]:
+    return {'count': series.count, 'mean': series.mean, 'p50': series.quantile(0.5),
+            'p90': series.quantile(0.9), 'p99': series.quantile(0.99),
+            'max': series.max or 0.0}
+
+
+class SimulatedClient:
+    """One WebSocket client following a role's behaviour until ``deadline``."""
+
+    def __init__(self, url: str, role: str, protocol: str, stats: RoleStats,
+                 rng: random.Random, session_id: Optional[str] = None):
+        self.url = url
+        self.role = role
+        self.protocol = protocol
+        self.stats = stats
+        self.rng = rng
+        self.session_id = session_id
+        self.session_ready = asyncio.Event()
+        self.game_over = False
+        self._last_frame: Optional[float] = None
+        self._last_seq: Optional[int] = None
+        self._pending: Dict[str, float] = {}
+
+    async def run(self, deadline: float) -> None:
+        stats = self.stats
+        stats.clients += 1
+        url = f'{self.url}?protocol={self.protocol}'
+        if self.session_id:
+            url += f'&session={self.session_id}'
+        try:
+            async with websockets.connect(url, max_size=None) as ws:
+                stats.connected += 1
+                reader = asyncio.create_task(self._read(ws))
+                try:
+                    await self._act(ws, deadline)
+                finally:
+                    reader.cancel()
+        except (OSError, websockets.WebSocketException, asyncio.TimeoutError):
+            if self._last_frame is None:
+                stats.failed += 1
+            else:
+                stats.disconnected += 1
+        finally:
+            self.session_ready.set()
+
+    async def _send(self, ws, command: Dict[str, Any], reply_type: Optional[str] = None) -> None:
+        if reply_type:
+            self._pending[reply_type] = time.perf_counter()
+        await ws.send(json.dumps(command))
+        self.stats.commands += 1
+
+    async def _act(self, ws, deadline: float) -> None:
+        rng = self.rng
+        if self.role == 'host':
+            await self._send(ws, {'action': 'start_training'})
+        elif self.role == 'player':
+            await self._send(ws, {'action': 'set_mode', 'mode': 'manual'})
+            await self._send(ws, {'action': 'start_round'})
+        next_eval = time.monotonic() + rng.uniform(2, 10)
+        while time.monotonic() < deadline:
+            if self.role in ('spectator', 'host'):
+                await asyncio.sleep(min(1.0, max(0.0, deadline - time.monotonic())))
+            elif self.role == 'player':
+                await asyncio.sleep(rng.uniform(0.15, 0.4))
+                if self.game_over:
+                    await self._send(ws, {'action': 'start_round'})
+                    self.game_over = False
+                else:
+                    await self._send(ws, {'action': 'manual_direction',
+                                          'direction': rng.choice(DIRECTIONS)})
+            else:
+                await asyncio.sleep(rng.uniform(1.0, 3.0))
+                if time.monotonic() >= next_eval:
+                    next_eval = time.monotonic() + rng.uniform(10, 20)
+                    await self._send(ws, {'action': 'evaluate_model', 'episodes': 5,
+                                          'max_steps': 200}, reply_type='evaluation_result')
+                else:
+                    await self._send(ws, {'action': 'set_mode',
+                                          'mode': rng.choice(['ai', 'training', 'manual'])})
+
+    async def _read(self, ws) -> None:
+        stats = self.stats
+        async for message in ws:
+            now = time.perf_counter()
+            stats.bytes += len(message)
+            if isinstance(message, bytes):
+                seq = HEADER.unpack_from(message)[2]
+                self._frame(now, seq)
+                continue
+            data = json.loads(message)
+            kind = data.get('type')
+            if kind == 'session':
+                self.session_id = data['session_id']
+                self.session_ready.set()
+            elif kind == 'keyframe':
+                self._frame(now, data['seq'])
+            elif kind in self._pending:
+                stats.reply_ms.append((now - self._pending.pop(kind)) * 1000)
+            elif 'snake' in data:
+                self._frame(now)
+                self.game_over = data['game_over']
+                # Same host, so wall clocks agree
+                stats.latency_ms.append((time.time() - data['server_time']) * 1000)
+
+    def _frame(self, now: float, seq: Optional[int] = None) -> None:
+        stats = self.stats
+        stats.frames += 1
+        if self._last_frame is not None:
+            stats.gap_ms.append((now - self._last_frame) * 1000)
+        self._last_frame = now
+        if seq is not None:
+            if self._last_seq is not None and seq > self._last_seq + 1:
+                stats.dropped += seq - self._last_seq - 1
+            self._last_seq = seq
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """Parse 'spectator=0.7,player=0.25,commander=0.05' into normalized weights."""
+    mix = {}
+    for part in text.split(','):
+        role, _, weight = part.partition('=')
+        if role.strip() not in ROLES:
+            raise argparse.ArgumentTypeError(f"Unknown role {role!r}; expected one of {ROLES}")
+        mix[role.strip()] = float(weight)
+    total = sum(mix.values())
+    return {role: weight / total for role, weight in mix.items()}
+
+
+def assign_roles(clients: int, mix: Dict[str, float]) -> List[str]:
+    """Deterministic role list matching the mix as closely as possible."""
+    roles = []
+    for role, weight in mix.items():
+        roles.extend([role] * int(round(clients * weight)))
+    roles = roles[:clients]
+    while len(roles) < clients:
+        roles.append(max(mix, key=mix.get))
+    return roles
+
+
+async def run_load_test(base_url: str, clients: int, mix: Dict[str, float], duration: float,
+                        protocol: str, shared_sessions: int, ramp: float,
+                        seed: int) -> Dict[str, Any]:
+    """Drive the clients and return the report dict."""
+    rng = random.Random(seed)
+    ws_url = base_url.replace('http', 'ws', 1) + '/ws'
+    stats = {role: RoleStats() for role in ROLES}
+    roles = assign_roles(clients, mix)
+    rng.shuffle(roles)
+
+    def client_protocol() -> str:
+        if protocol == 'mixed':
+            return rng.choice([PROTOCOL_JSON, PROTOCOL_DELTA])
+        return protocol
+
+    # Spectators watch games hosted by training clients so frames keep flowing
+    start = time.monotonic()
+    deadline = start + duration
+    hosts = []
+    tasks = []
+    if 'spectator' in roles:
+        for _ in range(max(1, shared_sessions)):
+            host = SimulatedClient(ws_url, 'host', PROTOCOL_JSON, RoleStats(),
+                                   random.Random(rng.random()))
+            hosts.append(host)
+            tasks.append(asyncio.create_task(host.run(deadline)))
+        await asyncio.gather(*(h.session_ready.wait() for h in hosts))
+
+    interval = 1.0 / ramp if ramp > 0 else 0.0
+    for i, role in enumerate(roles):
+        session_id = hosts[i % len(hosts)].session_id if role == 'spectator' and hosts else None
+        client = SimulatedClient(ws_url, role, client_protocol(), stats[role],
+                                 random.Random(rng.random()), session_id=session_id)
+        tasks.append(asyncio.create_task(client.run(deadline)))
+        if interval:
+            await asyncio.sleep(interval)
+    await asyncio.gather(*tasks, return_exceptions=True)
+    elapsed = time.monotonic() - start
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=10) as http:
+        server = {}
+        for name in ('sessions', 'broadcast', 'compute'):
+            try:
+                server[name] = (await http.get(f'/metrics/{name}')).json()
+            except httpx.HTTPError as e:
+                server[name] = {'error': repr(e)}
+
+    return {
+        'config': {'clients': clients, 'mix': mix, 'duration': duration, 'protocol': protocol,
+                   'shared_sessions': shared_sessions, 'ramp': ramp, 'seed': seed},
+        'elapsed_s': elapsed,
+        'roles': {role: s.report(duration) for role, s in stats.items() if s.clients},
+        'server': server,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Human-readable summary of a report dict."""
+    config = report['config']
+    print(f"\n{config['clients']} clients, {config['protocol']}, "
+          f"{report['elapsed_s']:.1f} s\n")
+    header = (f"{'role':<10} {'conn':>5} {'fail':>5} {'fps/cl':>7} {'KB/s/cl':>8} "
+              f"{'drops':>6} {'lat p50':>8} {'lat p99':>8} {'gap p99':>8} {'reply p90':>9}")
+    print(header)
+    print('-' * len(header))
+    for role, r in report['roles'].items():
+        print(f"{role:<10} {r['connected']:>5} {r['failed']:>5} "
+              f"{r['frames_per_client_per_sec']:>7.1f} "
+              f"{r['bytes_per_client_per_sec'] / 1024:>8.2f} {r['dropped_frames']:>6} "
+              f"{r['frame_latency_ms']['p50']:>8.1f} {r['frame_latency_ms']['p99']:>8.1f} "
+              f"{r['frame_gap_ms']['p99']:>8.1f} {r['command_reply_ms']['p90']:>9.1f}")
+    sessions = report['server'].get('sessions', {})
+    if 'tick_us' in sessions:
+        print(f"\nserver: {sessions['sessions']} sessions, tick p90 "
+              f"{sessions['tick_us']['p90'] / 1000:.2f} ms, lateness p99 "
+              f"{sessions['lateness_ms']['p99']:.2f} ms, skipped ticks "
+              f"{sessions['skipped_ticks']}")
+    broadcast = report['server'].get('broadcast', {})
+    if 'frames_sent' in broadcast:
+        print(f"        {broadcast['frames_sent']} frames sent, "
+              f"{broadcast['frames_dropped']} dropped, "
+              f"{broadcast.get('disconnected_slow', 0)} slow disconnects")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, timeout: float = 60.0) -> subprocess.Popen:
+    """Start backend_server under uvicorn and wait until it answers."""
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'backend_server:app',
+         '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning'],
+        cwd=SERVER_DIR,
+        env=dict(os.environ, SNAKE_LOG_LEVEL=os.environ.get('SNAKE_LOG_LEVEL', 'WARNING')),
+        # Own process group so the evaluation workers go down with it
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            httpx.get(f'http://127.0.0.1:{port}/metrics/sessions', timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.25)
+    stop_server(process)
+    raise RuntimeError("Server did not start in time")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    """Stop the server and any worker processes it spawned."""
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        pass
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds of load')
+    parser.add_argument('--mix', type=parse_mix,
+                        default=parse_mix('spectator=0.7,player=0.25,commander=0.05'))
+    parser.add_argument('--protocol', choices=[PROTOCOL_JSON, PROTOCOL_DELTA, 'mixed'],
+                        default=PROTOCOL_JSON)
+    parser.add_argument('--shared-sessions', type=int, default=4,
+                        help='Games the spectators are spread over')
+    parser.add_argument('--ramp', type=float, default=200.0, help='New connections per second')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--url', help='Target a running server (e.g. http://127.0.0.1:8000)')
+    parser.add_argument('--output', help='Write the full report as JSON')
+    args = parser.parse_args(argv)
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        port = _free_port()
+        server = start_server(port)
+        base_url = f'http://127.0.0.1:{port}'
+    try:
+        report = asyncio.run(run_load_test(
+            base_url.rstrip('/'), args.clients, args.mix, args.duration, args.protocol,
+            args.shared_sessions, args.ramp, args.seed,
+        ))
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+import json
+import struct
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+
+# Protocol names a client can ask for with ``/ws?protocol=...``
+PROTOCOL_JSON = 'json'
+PROTOCOL_DELTA = 'delta1'
+PROTOCOL_VERSION = 1
+
+# Binary delta frame: message type, version, sequence number, field flags
+MSG_DELTA = 2
+HEADER = struct.Struct('<BBIH')
+
+# Field flags, encoded in this order after the header
+F_HEAD = 0x01          # int16 x, int16 y: new head cell (prepend to snake)
+F_TAIL_REMOVED = 0x02  # no payload: drop the last snake cell
+F_FOOD = 0x04          # int16 x, int16 y
+F_COUNTERS = 0x08      # uint32 score, uint32 steps
+F_STATUS = 0x10        # uint8 mode, uint8 bits, uint32 current_episode, uint32 target_episodes
+F_STATS = 0x20         # float32 epsilon, float32 avg, int32 best, int32 last
+F_NEW_SCORES = 0x40    # uint16 n, then n * int32 appended scores
+F_THROUGHPUT = 0x80    # uint8 headless, float32 env_steps_per_sec, float32 updates_per_sec
+
+POINT = struct.Struct('<hh')
+COUNTERS = struct.Struct('<II')
+STATUS = struct.Struct('<BBII')
+STATS = struct.Struct('<ffii')
+COUNT = struct.Struct('<H')
+THROUGHPUT = struct.Struct('<Bff')
+
+MODES = ['manual', 'ai', 'training']
+STATUS_TRAINING = 0x01
+STATUS_GAME_OVER = 0x02
+
+
+def encode_keyframe(state: Dict[str, Any], seq: int) -> str:
+    """Encode a full state as a JSON keyframe message."""
+    return json.dumps({
+        'type': 'keyframe',
+        'protocol': PROTOCOL_DELTA,
+        'version': PROTOCOL_VERSION,
+        'seq': seq,
+        'state': state,
+    })
+
+
+class DeltaEncoder:
+    """
+    Encoder for the ``delta1`` state protocol.
+
+    Each broadcast state becomes either a JSON keyframe (text message) or
+    a compact binary delta against the previous broadcast state. A
+    keyframe is emitted every ``keyframe_interval`` frames and whenever
+    the change cannot be expressed as a delta: a reset, a grid change, or
+    the snake moving more than one cell. Every client receives the same
+    frame, so the encoding cost is paid once per tick.
+    """
+
+    def __init__(self, keyframe_interval: int = 50):
+        """Initialize encoder with the periodic keyframe interval (in frames)."""
+        self.keyframe_interval = keyframe_interval
+        self.seq = 0
+        self._prev: Optional[Dict[str, Any]] = None
+        self._frames_since_keyframe = 0
+
+    def encode(self, state: Dict[str, Any]) -> Tuple[Union[str, bytes], bool]:
+        """Encode the next state; returns (message, is_keyframe)."""
+        self.seq += 1
+        delta = None
+        if (self._prev is not None and
+                self._frames_since_keyframe < self.keyframe_interval):
+            delta = self._encode_delta(self._prev, state)
+
+        self._prev = self._copy(state)
+        if delta is None:
+            self._frames_since_keyframe = 0
+            return encode_keyframe(state, self.seq), True
+        self._frames_since_keyframe += 1
+        return delta, False
+
+    def current_keyframe(self) -> Optional[str]:
+        """Keyframe of the last encoded state, for clients joining mid-stream."""
+        if self._prev is None:
+            return None
+        return encode_keyframe(self._prev, self.seq)
+
+    @staticmethod
+    def _copy(state: Dict[str, Any]) -> Dict[str, Any]:
+        copied = dict(state)
+        copied['snake'] = [tuple(p) for p in state['snake']]
+        copied['stats'] = dict(state['stats'])
+        return copied
+
+    def _encode_delta(self, prev: Dict[str, Any], state: Dict[str, Any]) -> Optional[bytes]:
+        """Build a binary delta, or None when a keyframe is required."""
+        if (state['grid_width'] != prev['grid_width'] or
+                state['grid_height'] != prev['grid_height']):
+            return None
+
+        flags = 0
+        parts: List[bytes] = []
+
+        # Snake: unchanged, or exactly one step (new head, optional tail drop)
+        snake, prev_snake = state['snake'], prev['snake']
+        if [tuple(p) for p in snake] != prev_snake:
+            grew = len(snake) == len(prev_snake) + 1
+            if not (grew or len(snake) == len(prev_snake)) or not snake:
+                return None
+            if [tuple(p) for p in snake[1:]] != prev_snake[:len(snake) - 1]:
+                return None
+            flags |= F_HEAD
+            parts.append(POINT.pack(*snake[0]))
+            if not grew:
+                flags |= F_TAIL_REMOVED
+
+        if tuple(state['food']) != tuple(prev['food']):
+            flags |= F_FOOD
+            parts.append(POINT.pack(*state['food']))
+
+        if state['score'] != prev['score'] or state['steps'] != prev['steps']:
+            flags |= F_COUNTERS
+            parts.append(COUNTERS.pack(state['score'], state['steps']))
+
+        status = (MODES.index(state['mode']),
+                  (STATUS_TRAINING if state['training'] else 0) |
+                  (STATUS_GAME_OVER if state['game_over'] else 0),
+                  state['current_episode'], state['target_episodes'])
+        prev_status = (MODES.index(prev['mode']),
+                       (STATUS_TRAINING if prev['training'] else 0) |
+                       (STATUS_GAME_OVER if prev['game_over'] else 0),
+                       prev['current_episode'], prev['target_episodes'])
+        if status != prev_status:
+            flags |= F_STATUS
+            parts.append(STATUS.pack(*status))
+
+        stats, prev_stats = state['stats'], prev['stats']
+        if any(stats[k] != prev_stats[k] for k in ('epsilon', 'avg', 'best', 'last')):
+            flags |= F_STATS
+            parts.append(STATS.pack(stats['epsilon'], stats['avg'],
+                                    int(stats['best']), int(stats['last'])))
+
+        new_count = stats['score_count'] - prev_stats['score_count']
+        if new_count < 0 or new_count > len(stats['all_scores']):
+            return None
+        if new_count:
+            flags |= F_NEW_SCORES
+            new_scores = stats['all_scores'][-new_count:]
+            parts.append(COUNT.pack(new_count))
+            parts.append(struct.pack(f'<{new_count}i', *(int(s) for s in new_scores)))
+
+        throughput = (int(state['headless']),
+                      state['throughput']['env_steps_per_sec'],
+                      state['throughput']['updates_per_sec'])
+        prev_throughput = (int(prev['headless']),
+                           prev['throughput']['env_steps_per_sec'],
+                           prev['throughput']['updates_per_sec'])
+        if throughput != prev_throughput:
+            flags |= F_THROUGHPUT
+            parts.append(THROUGHPUT.pack(*throughput))
+
+        return HEADER.pack(MSG_DELTA, PROTOCOL_VERSION, self.seq, flags) + b''.join(parts)
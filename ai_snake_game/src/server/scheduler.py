@@ -0,0 +1,76 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional
+
+from ..utils.metrics import REGISTRY
+from ..utils.stats import Histogram, MetricSeries
+
+
+# Bucket bounds (ms) for wake-up and tick lateness histograms
+LATENESS_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000)
+
+TICK_SECONDS = REGISTRY.histogram('snake_tick_duration_seconds', 'Work done per scheduler tick')
+WAKE_LATENESS = REGISTRY.histogram(
+    'snake_tick_wake_lateness_seconds', 'Scheduler wake-up delay past its target')
+
+
+class TickScheduler:
+    """
+    Drift-free driver for a tick function on the monotonic clock.
+
+    ``tick(now)`` does the work that is due at ``now`` and returns the
+    absolute monotonic time of the next deadline (or None when nothing is
+    scheduled). The scheduler sleeps until that deadline instead of for a
+    fixed period, so work time never accumulates into drift. Sleeps are
+    capped at ``max_sleep`` so newly scheduled work is picked up promptly.
+    How late each wake-up is compared to its target is recorded, which is
+    the first sign of the event loop saturating.
+    """
+
+    def __init__(self, tick: Callable[[float], Optional[float]], max_sleep: float = 0.1):
+        """Initialize scheduler with the tick function and sleep cap."""
+        self.tick = tick
+        self.max_sleep = max_sleep
+        self.running = False
+        self.ticks = 0
+
+        # Metrics
+        self.wake_lateness_ms = MetricSeries(window=600, quantiles=(0.5, 0.9, 0.99))
+        self.wake_lateness_hist = Histogram(LATENESS_BUCKETS_MS)
+        self.tick_ms = MetricSeries(window=600)
+
+    async def run(self) -> None:
+        """Run until ``stop`` is called."""
+        self.running = True
+        target: Optional[float] = None
+        while self.running:
+            now = time.monotonic()
+            if target is not None:
+                lateness_ms = max(0.0, now - target) * 1000
+                self.wake_lateness_ms.append(lateness_ms)
+                self.wake_lateness_hist.observe(lateness_ms)
+                WAKE_LATENESS.observe(lateness_ms / 1000)
+
+            next_due = self.tick(now)
+            self.ticks += 1
+            after = time.monotonic()
+            self.tick_ms.append((after - now) * 1000)
+            TICK_SECONDS.observe(after - now)
+
+            target = after + self.max_sleep
+            if next_due is not None and next_due < target:
+                target = max(next_due, after)
+            # sleep(0) still yields, so socket writers run between turbo bursts
+            await asyncio.sleep(target - after)
+
+    def stop(self) -> None:
+        self.running = False
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Return wake-up lateness and tick duration."""
+        return {
+            'ticks': self.ticks,
+            'tick_ms': self.tick_ms.summary(),
+            'wake_lateness_ms': self.wake_lateness_ms.summary(),
+            'wake_lateness_ms_histogram': self.wake_lateness_hist.summary(),
+        }
@@ -0,0 +1,481 @@
+import json
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from ..game.game_engine import GameEngine
+from ..utils.log import get_logger
+from ..utils.metrics import REGISTRY
+from ..utils.stats import Histogram, MetricSeries, RateMeter
+from .broadcast import Broadcaster
+from .headless import HeadlessTrainer
+from .protocol import DeltaEncoder, PROTOCOL_DELTA, PROTOCOL_JSON
+from .scheduler import LATENESS_BUCKETS_MS
+
+
+DIRECTIONS = ['UP', 'DOWN', 'LEFT', 'RIGHT']
+RECENT_SCORES_SENT = 50  # Scores included in each state broadcast
+
+# Named session speeds in ticks per second; 0 means unthrottled (turbo)
+SPEEDS = {'slow': 4.0, 'normal': 10.0, 'turbo': 0.0}
+DEFAULT_SPEED = 'normal'
+MAX_TICK_RATE = 120.0
+TURBO_BROADCAST_INTERVAL = 0.1  # Turbo sessions stream a sampled frame at 10 Hz
+
+log = get_logger('sessions')
+
+ENV_STEPS = REGISTRY.counter('snake_env_steps', 'Environment steps taken', ['runner'])
+TICK_ENV_STEPS = ENV_STEPS.labels('tick')
+EPISODES = REGISTRY.counter('snake_episodes', 'Finished training episodes')
+TICK_LATENESS = REGISTRY.histogram(
+    'snake_session_tick_lateness_seconds', 'How late sessions were stepped vs their deadline')
+SERIALIZE_SECONDS = REGISTRY.histogram(
+    'snake_state_serialize_seconds', 'Time to encode one state broadcast', ['protocol'])
+SERIALIZE_JSON = SERIALIZE_SECONDS.labels(PROTOCOL_JSON)
+SERIALIZE_DELTA = SERIALIZE_SECONDS.labels(PROTOCOL_DELTA)
+
+
+class GameSession:
+    """
+    One isolated game: engine, mode flags, score history and spectators.
+
+    Every WebSocket either creates its own session or joins an existing
+    one by id; all clients of a session see and control the same game.
+    """
+
+    def __init__(self, session_id: str, grid_width: int, grid_height: int,
+                 cell_size: int, target_episodes: int):
+        self.id = session_id
+        self.cell_size = cell_size
+        self.game_engine = GameEngine(grid_width, grid_height, cell_size)
+        self.ai_mode = False
+        self.training_mode = False
+        self.target_episodes = target_episodes
+        self.current_episode = 0
+        self.episode_scores: List[int] = []
+        self.score_stats = MetricSeries(window=1000)
+        self.manual_direction = 'RIGHT'
+        self.broadcaster = Broadcaster(max_queue=8, max_lag=5.0)
+        self.delta_encoder = DeltaEncoder(keyframe_interval=50)
+        self.last_active = time.monotonic()
+
+        # Scheduling: absolute monotonic deadline of the next step
+        self.speed = DEFAULT_SPEED
+        self.tick_interval = 1.0 / SPEEDS[DEFAULT_SPEED]
+        self.next_due = time.monotonic()
+        self.next_broadcast = 0.0
+
+        # Headless training worker (None in step-per-tick mode)
+        self.headless: Optional[HeadlessTrainer] = None
+        self.env_steps = RateMeter()
+        self.updates = RateMeter()
+
+    def set_speed(self, speed=None, tick_rate: Optional[float] = None) -> bool:
+        """
+        Change how often this session steps.
+
+        Args:
+            speed: One of SPEEDS ('slow', 'normal', 'turbo')
+            tick_rate: Explicit ticks per second (0 for turbo), overrides speed
+
+        Returns:
+            bool: False if the request was invalid
+        """
+        if tick_rate is None:
+            if speed not in SPEEDS:
+                return False
+            tick_rate = SPEEDS[speed]
+        else:
+            tick_rate = float(tick_rate)
+            if tick_rate < 0 or tick_rate > MAX_TICK_RATE:
+                return False
+            speed = next((name for name, rate in SPEEDS.items() if rate == tick_rate),
+                         'custom')
+        self.speed = speed
+        self.tick_interval = 1.0 / tick_rate if tick_rate else 0.0
+        # Re-anchor so a slow -> fast switch does not count as lateness
+        self.next_due = time.monotonic()
+        return True
+
+    @property
+    def turbo(self) -> bool:
+        return self.tick_interval == 0.0
+
+    @property
+    def mode(self) -> str:
+        return 'training' if self.training_mode else ('ai' if self.ai_mode else 'manual')
+
+    def wants_ai_step(self) -> bool:
+        """Training always steps (auto-restart); AI mode steps until game over."""
+        if self.headless is not None:
+            return False
+        return self.training_mode or (self.ai_mode and not self.game_engine.is_game_over())
+
+    def wants_manual_step(self) -> bool:
+        return (self.headless is None and not self.ai_mode and not self.training_mode and
+                not self.game_engine.is_game_over())
+
+    def start_headless(self, agent) -> None:
+        """Start training this session's episodes on a background worker."""
+        self.stop_headless()
+        self.training_mode = True
+        self.ai_mode = True
+        self.current_episode = 0
+        self.episode_scores = []
+        engine = self.game_engine
+        self.headless = HeadlessTrainer(agent, engine.grid_width, engine.grid_height,
+                                        self.cell_size, self.target_episodes)
+        self.headless.start()
+
+    def stop_headless(self) -> None:
+        """Stop the headless worker, keeping the scores it has finished."""
+        if self.headless is None:
+            return
+        self.headless.stop()
+        self.poll_headless()
+        self.headless = None
+
+    def poll_headless(self) -> List[int]:
+        """
+        Collect episodes finished by the headless worker.
+
+        Returns:
+            List[int]: Scores of newly finished episodes
+        """
+        worker = self.headless
+        if worker is None:
+            return []
+        scores = worker.drain_scores()
+        for score in scores:
+            self.score_stats.append(score)
+            self.episode_scores.append(score)
+            self.current_episode += 1
+        EPISODES.inc(len(scores))
+        if not worker.running and not worker.scores:
+            self.headless = None
+            self.training_mode = False
+            self.ai_mode = False
+            self.game_engine.game_over = True
+            log.info("headless training completed", extra={'session': self.id})
+        return scores
+
+    def step_manual(self) -> None:
+        """Advance one step in the direction chosen by the player."""
+        engine = self.game_engine
+        engine.change_direction(self.manual_direction)
+        engine.move_snake()
+        self.env_steps.add()
+        TICK_ENV_STEPS.inc()
+        if engine.check_food_collision():
+            engine.eat_food()
+            engine.spawn_food()
+        if engine.is_game_over():
+            # Do NOT reset in manual mode - let game stay over until
+            # user clicks start
+            self.score_stats.append(engine.score)
+
+    def step_ai(self, agent, state: list, action: int,
+                learn: Optional[Callable[[], Any]] = None) -> bool:
+        """
+        Apply the agent's action and store the transition.
+
+        ``learn`` runs the end-of-episode update (``agent.replay`` inline
+        when not given).
+
+        Returns:
+            bool: True when a training episode finished on this step
+        """
+        engine = self.game_engine
+        engine.change_direction(DIRECTIONS[action])
+        engine.move_snake()
+        self.env_steps.add()
+        TICK_ENV_STEPS.inc()
+        if engine.check_food_collision():
+            engine.eat_food()
+            engine.spawn_food()
+
+        if not engine.is_game_over():
+            reward = 1 if engine.check_food_collision() else 0
+            agent.remember(state, action, reward, engine.get_state_for_ai(), False)
+            return False
+
+        agent.remember(state, action, -10, engine.get_state_for_ai(), True)
+        if len(agent.memory) > 32:
+            (learn or agent.replay)()
+            self.updates.add()
+        self.score_stats.append(engine.score)
+        if not self.training_mode:
+            # In AI mode, do NOT reset - let game stay over until
+            # user clicks start
+            return False
+
+        self.episode_scores.append(engine.score)
+        self.current_episode += 1
+        EPISODES.inc()
+        if self.current_episode >= self.target_episodes:
+            self.training_mode = False
+            self.ai_mode = False
+            log.info("training completed", extra={'session': self.id})
+        else:
+            # Auto-restart in training mode
+            engine.reset()
+        return True
+
+    def get_state(self, epsilon: float) -> Dict[str, Any]:
+        """Serialize the session for broadcast."""
+        engine = self.game_engine
+        stats = self.score_stats
+        frame = self.headless.frame if self.headless is not None else None
+        if frame is None:
+            frame = {
+                'snake': engine.snake.get_body_positions(),
+                'food': engine.food.get_position(),
+                'score': engine.score,
+                'steps': engine.steps,
+                'game_over': engine.is_game_over(),
+            }
+        return {
+            'snake': frame['snake'],
+            'food': frame['food'],
+            'score': frame['score'],
+            'steps': frame['steps'],
+            'grid_width': engine.grid_width,
+            'grid_height': engine.grid_height,
+            'mode': self.mode,
+            'training': self.training_mode,
+            'current_episode': self.current_episode,
+            'target_episodes': self.target_episodes,
+            'game_over': frame['game_over'],
+            'headless': self.headless is not None,
+            'throughput': self.get_throughput(),
+            # Wall clock at serialization, for client-side latency measurement
+            'server_time': time.time(),
+            'stats': {
+                'all_scores': stats.recent(RECENT_SCORES_SENT),
+                'best': stats.max or 0,
+                'avg': stats.mean,
+                'last': stats.last or 0,
+                'score_count': stats.count,
+                'epsilon': epsilon
+            }
+        }
+
+    def get_throughput(self) -> Dict[str, float]:
+        """Environment steps and replay updates per second for this session."""
+        if self.headless is not None:
+            metrics = self.headless.get_metrics()
+            steps, updates = metrics['env_steps_per_sec'], metrics['updates_per_sec']
+        else:
+            steps, updates = self.env_steps.rate(), self.updates.rate()
+        # Rounded so the delta stream only carries meaningful changes
+        return {'env_steps_per_sec': round(steps, 1), 'updates_per_sec': round(updates, 1)}
+
+    def broadcast(self, epsilon: float) -> None:
+        """Encode this tick's state once per protocol and queue it for clients."""
+        protocols = self.broadcaster.protocols()
+        if not protocols:
+            return
+        self.last_active = time.monotonic()
+        state = self.get_state(epsilon)
+        frames = {}
+        if PROTOCOL_JSON in protocols:
+            start = time.perf_counter()
+            frames[PROTOCOL_JSON] = json.dumps(state)
+            SERIALIZE_JSON.observe(time.perf_counter() - start)
+        if PROTOCOL_DELTA in protocols:
+            start = time.perf_counter()
+            frames[PROTOCOL_DELTA] = self.delta_encoder.encode(state)[0]
+            SERIALIZE_DELTA.observe(time.perf_counter() - start)
+        self.broadcaster.publish(frames, self.delta_encoder.current_keyframe)
+
+
+class SessionManager:
+    """
+    Owns all sessions and advances them with a single tick.
+
+    Each session steps on its own monotonic deadline (see ``SPEEDS``).
+    A tick steps every session that is due, running one batched forward
+    pass for all due AI sessions, then spends up to ``turbo_budget``
+    seconds stepping turbo sessions in further batches. A session that
+    has fallen more than one period behind is stepped once and its
+    missed ticks are skipped rather than replayed, so overload shows up
+    as lateness and skipped ticks instead of an ever-growing backlog.
+    Sessions with no clients for ``idle_timeout`` seconds are evicted.
+    """
+
+    def __init__(self, agent, grid_width: int, grid_height: int, cell_size: int,
+                 target_episodes: int, idle_timeout: float = 60.0,
+                 max_sessions: int = 5000, turbo_budget: float = 0.005,
+                 on_episode_complete: Optional[Callable[[GameSession], None]] = None,
+                 learn: Optional[Callable[[], Any]] = None):
+        """
+        Initialize manager with the shared agent and new-session defaults.
+
+        ``learn`` replaces the inline ``agent.replay()`` at episode end,
+        e.g. ``ComputeExecutor.request_update`` to train off the event loop.
+        """
+        self.agent = agent
+        self.defaults = (grid_width, grid_height, cell_size, target_episodes)
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.turbo_budget = turbo_budget
+        self.on_episode_complete = on_episode_complete
+        self.learn = learn
+        self.sessions: Dict[str, GameSession] = {}
+        self.evicted = 0
+
+        # Metrics
+        self.tick_us = MetricSeries(window=600)
+        self.tick_us_per_session = MetricSeries(window=600)
+        self.batch_size = MetricSeries(window=600)
+        self.lateness_ms = MetricSeries(window=600, quantiles=(0.5, 0.9, 0.99))
+        self.lateness_hist = Histogram(LATENESS_BUCKETS_MS)
+        self.skipped_ticks = 0
+        self.turbo_steps = 0
+
+    def create(self) -> Optional[GameSession]:
+        """Create a new session, or None when at capacity."""
+        if len(self.sessions) >= self.max_sessions:
+            return None
+        session = GameSession(uuid.uuid4().hex[:12], *self.defaults)
+        self.sessions[session.id] = session
+        return session
+
+    def get(self, session_id: Optional[str]) -> Optional[GameSession]:
+        return self.sessions.get(session_id) if session_id else None
+
+    def tick(self, now: Optional[float] = None) -> Optional[float]:
+        """
+        Step every session that is due at ``now``.
+
+        Returns:
+            Optional[float]: Monotonic time of the next deadline, or None
+            when there are no sessions
+        """
+        if now is None:
+            now = time.monotonic()
+        start = time.perf_counter()
+        epsilon = self.agent.epsilon
+
+        due = []
+        turbo = []
+        for session in self.sessions.values():
+            if session.turbo:
+                turbo.append(session)
+                continue
+            if now < session.next_due:
+                continue
+            interval = session.tick_interval
+            lateness = now - session.next_due
+            # Coalesce: step once, skip the ticks we are too late for
+            missed = int(lateness // interval)
+            self.skipped_ticks += missed
+            session.next_due += (missed + 1) * interval
+            lateness_ms = lateness * 1000
+            self.lateness_ms.append(lateness_ms)
+            self.lateness_hist.observe(lateness_ms)
+            TICK_LATENESS.observe(lateness)
+            due.append(session)
+
+        self._step(due)
+        for session in due:
+            self._poll_headless(session)
+            session.broadcast(epsilon)
+
+        if turbo:
+            deadline = start + self.turbo_budget
+            while True:
+                active = [s for s in turbo if s.wants_ai_step() or s.wants_manual_step()]
+                if not active:
+                    break
+                self._step(active)
+                self.turbo_steps += len(active)
+                if time.perf_counter() >= deadline:
+                    break
+            for session in turbo:
+                if now >= session.next_broadcast:
+                    session.next_broadcast = now + TURBO_BROADCAST_INTERVAL
+                    self._poll_headless(session)
+                    session.broadcast(epsilon)
+
+        self.evict_idle()
+
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        self.tick_us.append(elapsed_us)
+        if self.sessions:
+            self.tick_us_per_session.append(elapsed_us / len(self.sessions))
+        return self.next_deadline()
+
+    def _step(self, sessions: List[GameSession]) -> None:
+        """Advance sessions by one step (one batched forward pass for AI)."""
+        agent = self.agent
+        ai_sessions = []
+        for session in sessions:
+            if session.wants_ai_step():
+                ai_sessions.append(session)
+            elif session.wants_manual_step():
+                session.step_manual()
+
+        if ai_sessions:
+            states = [s.game_engine.get_state_for_ai() for s in ai_sessions]
+            actions = agent.act_batch(np.asarray(states, dtype=np.float32))
+            for session, state, action in zip(ai_sessions, states, actions):
+                if session.step_ai(agent, state, int(action), self.learn) and self.on_episode_complete:
+                    self.on_episode_complete(session)
+            self.batch_size.append(len(ai_sessions))
+
+    def _poll_headless(self, session: GameSession) -> None:
+        """Account for episodes a headless worker finished since the last tick."""
+        if session.headless is None:
+            return
+        first = session.current_episode
+        session.poll_headless()
+        last = session.current_episode
+        if self.on_episode_complete:
+            # Callbacks see the episode number they would in step-per-tick mode
+            for episode in range(first + 1, last + 1):
+                session.current_episode = episode
+                self.on_episode_complete(session)
+            session.current_episode = last
+
+    def next_deadline(self) -> Optional[float]:
+        """Earliest deadline across sessions (now for active turbo sessions)."""
+        deadlines = []
+        for session in self.sessions.values():
+            if not session.turbo:
+                deadlines.append(session.next_due)
+            elif session.wants_ai_step() or session.wants_manual_step():
+                return time.monotonic()
+            else:
+                deadlines.append(session.next_broadcast)
+        return min(deadlines) if deadlines else None
+
+    def evict_idle(self) -> None:
+        """Drop sessions that have had no clients for idle_timeout seconds."""
+        now = time.monotonic()
+        for session_id, session in list(self.sessions.items()):
+            if (not session.broadcaster.channels and
+                    now - session.last_active > self.idle_timeout):
+                session.stop_headless()
+                del self.sessions[session_id]
+                self.evicted += 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Return session counts, per-tick cost and tick lateness."""
+        speeds: Dict[str, int] = {}
+        for session in self.sessions.values():
+            speeds[session.speed] = speeds.get(session.speed, 0) + 1
+        return {
+            'sessions': len(self.sessions),
+            'sessions_by_speed': speeds,
+            'ai_sessions_per_tick': self.batch_size.summary(),
+            'evicted': self.evicted,
+            'tick_us': self.tick_us.summary(),
+            'tick_us_per_session': self.tick_us_per_session.summary(),
+            'lateness_ms': self.lateness_ms.summary(),
+            'lateness_ms_histogram': self.lateness_hist.summary(),
+            'skipped_ticks': self.skipped_ticks,
+            'turbo_steps': self.turbo_steps,
+        }
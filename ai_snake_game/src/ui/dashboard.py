@@ -1,5 +1,8 @@
 import pygame
-from typing import Dict, Any, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.stats import MetricSeries
+from .text_cache import TextCache
 
 
 class Dashboard:
@@ -37,7 +40,12 @@ class Dashboard:
             'best_score': 0,
             'epsilon': 1.0
         }
-        self.all_scores = []
+        self.all_scores = MetricSeries(window=100)
+
+        # Simulation/render rate readout
+        self.steps_per_sec = 0.0
+        self.fps = 0.0
+        self.sim_speed = ''
         
         # Grid size input
         self.grid_width = 15
@@ -53,169 +61,177 @@ class Dashboard:
         # UI element rects (for mouse interaction)
         self.rects = {}
 
-    def render(self, game_state: Dict[str, Any], mode: str):
-        """Render the dashboard."""
-        # Create dashboard surface
-        dashboard_surface = pygame.Surface((self.width, self.height))
-        dashboard_surface.fill(self.bg_color)
-        
+        # Retained rendering
+        self.text_cache = TextCache()
+        self.surface: Optional[pygame.Surface] = None
+        self._sections: Dict[str, Tuple[pygame.Rect, Any]] = {}
+
+    def render(self, game_state: Dict[str, Any], mode: str) -> List[pygame.Rect]:
+        """
+        Render the dashboard and return the screen rects that changed.
+
+        The dashboard surface is retained between frames. Each section is
+        redrawn only when the values it shows (or its position) change, and
+        only those regions are blitted to the screen, so a frame with
+        static values costs a few tuple comparisons.
+        """
+        full_redraw = self.surface is None
+        if full_redraw:
+            self.surface = pygame.Surface((self.width, self.height))
+            self.surface.fill(self.bg_color)
+            self._sections = {}
+
+        changed = []
         y_offset = 20
-        
-        # Title
-        title = self.font_large.render(
-            "AI Snake Dashboard", True, self.accent_color
-        )
-        dashboard_surface.blit(title, (20, y_offset))
-        y_offset += 50
-        
+        for name, key, height, draw in self._layout(mode):
+            rect = pygame.Rect(0, y_offset, self.width, height)
+            previous = self._sections.get(name)
+            if previous != (rect, key):
+                changed.append((name, key, rect, draw, previous))
+            y_offset += height
+
+        # Clear moved sections first so they cannot erase a neighbour's new content
+        dirty = []
+        for _, _, rect, _, previous in changed:
+            if previous is not None and previous[0] != rect:
+                self.surface.fill(self.bg_color, previous[0])
+                dirty.append(previous[0])
+        for name, key, rect, draw, _ in changed:
+            self.surface.fill(self.bg_color, rect)
+            draw(rect.y)
+            self._sections[name] = (rect, key)
+            dirty.append(rect)
+
+        if full_redraw:
+            dirty = [self.surface.get_rect()]
+        screen_rects = []
+        for rect in dirty:
+            self.screen.blit(self.surface, (self.x + rect.x, self.y + rect.y), rect)
+            screen_rects.append(rect.move(self.x, self.y))
+        return screen_rects
+
+    def invalidate(self):
+        """Force a full redraw on the next render (e.g. after the window was exposed)."""
+        self.surface = None
+
+    def _layout(self, mode: str) -> List[Tuple[str, Any, int, Callable[[int], None]]]:
+        """Sections top to bottom as (name, key of shown values, height, draw)."""
+        recent_scores = tuple(self.all_scores.recent(8)[::-1])
+        stats_text = None
+        if self.all_scores.count:
+            stats_text = (f"Best: {self.all_scores.max}  Avg: {self.all_scores.mean:.1f}  "
+                          f"Last: {self.all_scores.last}")
+        if self.training_mode:
+            status = (f"Training: {self.current_episode}/{self.target_episodes}",
+                      self.accent_color)
+        else:
+            status = ("Training: Inactive", self.text_color)
+        performance = (f"Sim: {self.steps_per_sec:.0f} steps/s ({self.sim_speed})  "
+                       f"FPS: {self.fps:.0f}")
+        return [
+            ('title', None, 50, self._draw_title),
+            ('mode', mode, 40, lambda y: self._draw_mode(y, mode)),
+            ('grid', (self.grid_width_input, self.grid_height_input, self.grid_input_active),
+             70, self._draw_grid),
+            ('training', (self.training_input, self.training_input_active),
+             70, self._draw_training),
+            ('scores', (recent_scores, stats_text),
+             30 + 22 * len(recent_scores) + (25 if stats_text else 0),
+             lambda y: self._draw_scores(y, recent_scores, stats_text)),
+            ('status', status, 40, lambda y: self._draw_status(y, *status)),
+            ('performance', performance, 30, lambda y: self._draw_performance(y, performance)),
+        ]
+
+    def _text(self, font: pygame.font.Font, text: str, color, pos: Tuple[int, int]):
+        self.surface.blit(self.text_cache.render(font, text, color), pos)
+
+    def _draw_title(self, y_offset: int):
+        self._text(self.font_large, "AI Snake Dashboard", self.accent_color, (20, y_offset))
+
+    def _draw_mode(self, y_offset: int, mode: str):
         # Mode toggle button
-        mode_label = self.font_medium.render(f"Mode: {mode}", True, self.text_color)
-        dashboard_surface.blit(mode_label, (20, y_offset))
+        self._text(self.font_medium, f"Mode: {mode}", self.text_color, (20, y_offset))
         mode_btn_rect = pygame.Rect(180, y_offset, 80, 30)
-        pygame.draw.rect(
-            dashboard_surface, self.button_bg, mode_btn_rect
-        )
-        btn_text = self.font_small.render(
-            "Toggle", True, self.button_fg)
-        dashboard_surface.blit(
-            btn_text, (mode_btn_rect.x + 10, mode_btn_rect.y + 5)
-        )
+        pygame.draw.rect(self.surface, self.button_bg, mode_btn_rect)
+        self._text(self.font_small, "Toggle", self.button_fg,
+                   (mode_btn_rect.x + 10, mode_btn_rect.y + 5))
         self.rects['mode_toggle'] = mode_btn_rect.move(self.x, 0)
-        y_offset += 40
+
+    def _draw_grid(self, y_offset: int):
         # Grid size input
-        grid_label = self.font_medium.render(
-            "Grid Size:", True, self.accent_color
-        )
-        dashboard_surface.blit(grid_label, (20, y_offset))
+        self._text(self.font_medium, "Grid Size:", self.accent_color, (20, y_offset))
         y_offset += 30
-        
+
         # Width input
-        width_label = self.font_small.render("W:", True, self.text_color)
-        dashboard_surface.blit(width_label, (20, y_offset))
+        self._text(self.font_small, "W:", self.text_color, (20, y_offset))
         width_rect = pygame.Rect(45, y_offset, 40, 28)
         pygame.draw.rect(
-            dashboard_surface,
+            self.surface,
             self.input_active_bg if self.grid_input_active == 'width' else self.input_bg,
             width_rect
         )
-        width_text = self.font_small.render(
-            self.grid_width_input, True, self.text_color
-        )
-        dashboard_surface.blit(
-            width_text, (width_rect.x + 5, width_rect.y + 4)
-        )
+        self._text(self.font_small, self.grid_width_input, self.text_color,
+                   (width_rect.x + 5, width_rect.y + 4))
         self.rects['grid_width'] = width_rect.move(self.x, 0)
-        
+
         # Height input
-        height_label = self.font_small.render("H:", True, self.text_color)
-        dashboard_surface.blit(height_label, (95, y_offset))
+        self._text(self.font_small, "H:", self.text_color, (95, y_offset))
         height_rect = pygame.Rect(120, y_offset, 40, 28)
         pygame.draw.rect(
-            dashboard_surface,
+            self.surface,
             self.input_active_bg if self.grid_input_active == 'height' else self.input_bg,
             height_rect
         )
-        height_text = self.font_small.render(
-            self.grid_height_input, True, self.text_color
-        )
-        dashboard_surface.blit(
-            height_text, (height_rect.x + 5, height_rect.y + 4)
-        )
+        self._text(self.font_small, self.grid_height_input, self.text_color,
+                   (height_rect.x + 5, height_rect.y + 4))
         self.rects['grid_height'] = height_rect.move(self.x, 0)
-        
+
         # Apply button
         apply_rect = pygame.Rect(180, y_offset, 80, 28)
-        pygame.draw.rect(
-            dashboard_surface, self.button_bg, apply_rect
-        )
-        apply_text = self.font_small.render("Apply", True, self.button_fg)
-        dashboard_surface.blit(
-            apply_text, (apply_rect.x + 15, apply_rect.y + 4)
-        )
+        pygame.draw.rect(self.surface, self.button_bg, apply_rect)
+        self._text(self.font_small, "Apply", self.button_fg,
+                   (apply_rect.x + 15, apply_rect.y + 4))
         self.rects['apply_grid'] = apply_rect.move(self.x, 0)
-        y_offset += 40
-        
+
+    def _draw_training(self, y_offset: int):
         # Training rounds input
-        train_label = self.font_medium.render(
-            "Training Rounds:", True, self.accent_color
-        )
-        dashboard_surface.blit(train_label, (20, y_offset))
+        self._text(self.font_medium, "Training Rounds:", self.accent_color, (20, y_offset))
         y_offset += 30
         train_rect = pygame.Rect(20, y_offset, 80, 28)
         pygame.draw.rect(
-            dashboard_surface,
+            self.surface,
             self.input_active_bg if self.training_input_active else self.input_bg,
             train_rect)
-        train_text = self.font_small.render(
-            self.training_input, True, self.text_color
-        )
-        dashboard_surface.blit(
-            train_text, (train_rect.x + 5, train_rect.y + 4)
-        )
+        self._text(self.font_small, self.training_input, self.text_color,
+                   (train_rect.x + 5, train_rect.y + 4))
         self.rects['train_input'] = train_rect.move(self.x, 0)
-        
+
         # Set button
         set_rect = pygame.Rect(120, y_offset, 60, 28)
-        pygame.draw.rect(
-            dashboard_surface, self.button_bg, set_rect
-        )
-        set_text = self.font_small.render("Set", True, self.button_fg)
-        dashboard_surface.blit(
-            set_text, (set_rect.x + 10, set_rect.y + 4)
-        )
+        pygame.draw.rect(self.surface, self.button_bg, set_rect)
+        self._text(self.font_small, "Set", self.button_fg, (set_rect.x + 10, set_rect.y + 4))
         self.rects['set_train'] = set_rect.move(self.x, 0)
-        y_offset += 40
-        
+
+    def _draw_scores(self, y_offset: int, recent_scores: Tuple, stats_text: Optional[str]):
         # Score tracking
-        scores_label = self.font_medium.render(
-            "Scores:", True, self.accent_color
-        )
-        dashboard_surface.blit(scores_label, (20, y_offset))
+        self._text(self.font_medium, "Scores:", self.accent_color, (20, y_offset))
         y_offset += 30
-        
-        # Show all scores (scrollable if needed)
-        max_scores = 8
-        for i, score in enumerate(self.all_scores[-max_scores:][::-1]):
-            score_text = self.font_small.render(
-                f"{score}", True, self.text_color
-            )
-            dashboard_surface.blit(
-                score_text, (30, y_offset)
-            )
+
+        # Most recent first
+        for score in recent_scores:
+            self._text(self.font_small, f"{score}", self.text_color, (30, y_offset))
             y_offset += 22
-        
+
         # Best/Avg/Recent
-        if self.all_scores:
-            best = max(self.all_scores)
-            avg = sum(self.all_scores) / len(self.all_scores)
-            recent = self.all_scores[-1]
-            stats_text = self.font_small.render(
-                f"Best: {best}  Avg: {avg:.1f}  Last: {recent}",
-                True, self.text_color
-            )
-            dashboard_surface.blit(
-                stats_text, (20, y_offset)
-            )
-            y_offset += 25
-        
+        if stats_text:
+            self._text(self.font_small, stats_text, self.text_color, (20, y_offset))
+
+    def _draw_status(self, y_offset: int, status_text: str, status_color):
         # Training status
-        y_offset += 10
-        if self.training_mode:
-            status_color = self.accent_color
-            status_text = (
-                f"Training: {self.current_episode}/{self.target_episodes}"
-            )
-        else:
-            status_color = self.text_color
-            status_text = "Training: Inactive"
-            
-        status = self.font_medium.render(
-            status_text, True, status_color
-        )
-        dashboard_surface.blit(status, (20, y_offset))
-        
-        # Blit dashboard to main screen
-        self.screen.blit(dashboard_surface, (self.x, self.y))
+        self._text(self.font_medium, status_text, status_color, (20, y_offset + 10))
+
+    def _draw_performance(self, y_offset: int, text: str):
+        self._text(self.font_small, text, self.text_color, (20, y_offset + 5))
 
     def handle_event(self, event: pygame.event.Event) -> Tuple[str, Any]:
         """Handle mouse/keyboard events for dashboard UI. Returns (action, value) or (None, None)."""
@@ -266,11 +282,14 @@ class Dashboard:
     def update_training_stats(self, stats: Dict[str, Any]):
         """Update training statistics."""
         self.training_stats = stats
-        if stats.get('scores'):
-            self.training_stats['avg_score'] = (
-                sum(stats['scores']) / len(stats['scores'])
-            )
-            self.training_stats['best_score'] = max(stats['scores'])
+        scores = stats.get('scores')
+        if isinstance(scores, MetricSeries):
+            if scores.count:
+                self.training_stats['avg_score'] = scores.mean
+                self.training_stats['best_score'] = scores.max
+        elif scores:
+            self.training_stats['avg_score'] = sum(scores) / len(scores)
+            self.training_stats['best_score'] = max(scores)
 
     def set_training_mode(self, active: bool, target_episodes: int = 0):
         """Set training mode and target episodes."""
@@ -278,6 +297,12 @@ class Dashboard:
         self.target_episodes = target_episodes
         self.current_episode = 0
 
+    def update_performance(self, steps_per_sec: float, fps: float, sim_speed: str):
+        """Update the simulation steps/sec and frames/sec readout."""
+        self.steps_per_sec = steps_per_sec
+        self.fps = fps
+        self.sim_speed = sim_speed
+
     def update_episode(self, episode: int):
         """Update current episode number."""
         self.current_episode = episode
@@ -0,0 +1,45 @@
+from collections import OrderedDict
+from typing import Tuple
+
+import pygame
+
+
+Color = Tuple[int, int, int]
+
+
+class TextCache:
+    """
+    LRU cache of rendered text surfaces keyed by (font, text, color).
+
+    ``font.render`` rasterizes every glyph on each call; labels and
+    numbers that repeat frame after frame are rendered once and reused.
+    Surfaces are shared, so callers must blit them and never draw on them.
+    """
+
+    def __init__(self, capacity: int = 256):
+        """Initialize cache holding at most ``capacity`` surfaces."""
+        self.capacity = capacity
+        self._surfaces: 'OrderedDict[Tuple[pygame.font.Font, str, Color], pygame.Surface]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font: pygame.font.Font, text: str, color: Color) -> pygame.Surface:
+        """Return the antialiased surface for ``text``, rendering it on a miss."""
+        key = (font, text, tuple(color))
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.capacity:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self) -> None:
+        self._surfaces.clear()
+
+    def __len__(self) -> int:
+        return len(self._surfaces)
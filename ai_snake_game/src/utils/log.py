@@ -0,0 +1,57 @@
+import json
+import logging
+import sys
+import time
+from typing import Optional
+
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg plus any ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 6),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(log_format: str = 'text', level: str = 'INFO',
+                      stream=None) -> None:
+    """
+    Configure the ``snake`` logger hierarchy.
+
+    Args:
+        log_format: 'text' for human-readable lines, 'json' for structured
+            one-object-per-line output
+        level: Minimum level; per-command and per-episode messages are
+            logged at DEBUG so they stay off the hot path by default
+        stream: Output stream (stderr by default)
+    """
+    handler = logging.StreamHandler(stream or sys.stderr)
+    if log_format == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        formatter = logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s')
+        formatter.converter = time.gmtime
+        handler.setFormatter(formatter)
+    logger = logging.getLogger('snake')
+    logger.handlers[:] = [handler]
+    logger.setLevel(level.upper())
+    logger.propagate = False
+
+
+def get_logger(name: Optional[str] = None) -> logging.Logger:
+    """Return a logger under the ``snake`` hierarchy."""
+    return logging.getLogger(f'snake.{name}' if name else 'snake')
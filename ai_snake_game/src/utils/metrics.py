@@ -0,0 +1,205 @@
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .stats import Histogram
+
+
+# Default latency buckets in seconds (100 us .. 10 s)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value != value:
+        return 'NaN'
+    if value in (float('inf'), float('-inf')):
+        return '+Inf' if value > 0 else '-Inf'
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base for registry metrics; labelled children share the parent's name."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], '_Metric'] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> '_Metric':
+        """Return the child for a label value combination (created on first use)."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    self._children[key] = child
+        return child
+
+    def _new_child(self) -> '_Metric':
+        return type(self)(self.name, self.help)
+
+    def samples(self) -> List[Sample]:
+        if not self.labelnames:
+            return self._own_samples({})
+        samples = []
+        for key, child in list(self._children.items()):
+            samples.extend(child._own_samples(dict(zip(self.labelnames, key))))
+        return samples
+
+    def _own_samples(self, labels: Dict[str, str]) -> List[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count. ``inc`` is a single float add."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def _own_samples(self, labels: Dict[str, str]) -> List[Sample]:
+        return [(self.name + '_total', labels, self.value)]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, set directly or read from ``fn`` at scrape time."""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                 fn: Optional[Callable[[], float]] = None):
+        super().__init__(name, help_text, labelnames)
+        self.value = 0.0
+        self.fn = fn
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def _own_samples(self, labels: Dict[str, str]) -> List[Sample]:
+        value = self.value
+        if self.fn is not None:
+            try:
+                value = self.fn()
+            except Exception:
+                return []
+        return [(self.name, labels, float(value))]
+
+
+class HistogramMetric(_Metric):
+    """Bucketed distribution (see utils.stats.Histogram)."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+        self.histogram = Histogram(self.buckets)
+
+    def _new_child(self) -> '_Metric':
+        return HistogramMetric(self.name, self.help, buckets=self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.histogram.observe(value)
+
+    def _own_samples(self, labels: Dict[str, str]) -> List[Sample]:
+        samples = []
+        for bound, count in self.histogram.cumulative():
+            samples.append((self.name + '_bucket', dict(labels, le=_format_value(bound)), count))
+        samples.append((self.name + '_sum', labels, self.histogram.sum))
+        samples.append((self.name + '_count', labels, self.histogram.count))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Process-wide collection of metrics rendered in Prometheus text format.
+
+    Metrics are created once (usually at import time, next to the code
+    they measure) and updated with plain attribute arithmetic on the hot
+    path; all formatting happens at scrape time in ``render``. Creating a
+    metric that already exists returns the existing one, so modules can
+    be reloaded and components instantiated several times.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, *args, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+              fn: Optional[Callable[[], float]] = None) -> Gauge:
+        gauge = self._get_or_create(Gauge, name, help_text, labelnames)
+        if fn is not None:
+            gauge.fn = fn
+        return gauge
+
+    def histogram(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> HistogramMetric:
+        return self._get_or_create(HistogramMetric, name, help_text, labelnames, buckets)
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# Learner metrics, shared by every code path that calls DQNAgent.replay
+LEARNER_UPDATES = REGISTRY.counter('snake_learner_updates', 'Replay updates (optimizer steps)')
+LEARNER_LOSS = REGISTRY.gauge('snake_learner_loss', 'Loss of the latest replay update')
+LEARNER_UPDATE_SECONDS = REGISTRY.histogram('snake_learner_update_seconds',
+                                            'Time per replay update')
+
+
+def observe_update(seconds: float, loss: Optional[float]) -> None:
+    """Record one ``DQNAgent.replay`` call."""
+    LEARNER_UPDATE_SECONDS.observe(seconds)
+    if loss is not None:
+        LEARNER_UPDATES.inc()
+        LEARNER_LOSS.set(loss)
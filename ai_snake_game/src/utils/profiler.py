@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Any, Deque, Dict, Optional
+
+from .stats import P2Quantile
+
+
+_NULL_SECTION = nullcontext()
+
+
+class PhaseStats:
+    """Call count, total time and streaming p50/p99 for one profiled phase."""
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.p50 = P2Quantile(0.5)
+        self.p99 = P2Quantile(0.99)
+
+    def add(self, duration_ns: int) -> None:
+        """Record one timed call."""
+        self.calls += 1
+        self.total_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+        self.p50.add(duration_ns)
+        self.p99.add(duration_ns)
+
+    def summary(self, wall_ns: int) -> Dict[str, Any]:
+        """Return timings in microseconds plus share of wall time."""
+        return {
+            'calls': self.calls,
+            'total_us': self.total_ns / 1e3,
+            'mean_us': self.total_ns / self.calls / 1e3 if self.calls else 0.0,
+            'p50_us': self.p50.value / 1e3,
+            'p99_us': self.p99.value / 1e3,
+            'max_us': self.max_ns / 1e3,
+            'share': self.total_ns / wall_ns if wall_ns else 0.0,
+        }
+
+
+class _Section:
+    """Context manager timing a single phase."""
+
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler: 'Profiler', name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter_ns() - self.start)
+        return False
+
+
+class Profiler:
+    """
+    Low-overhead hot-path profiler for the training loop.
+
+    Wrap phases with ``with profiler.section('name'):``. When disabled,
+    ``section`` returns a shared no-op context so the instrumented code
+    pays only for one attribute check. Timings are aggregated per episode
+    and cumulatively, and recent spans are kept for Chrome trace export.
+    """
+
+    def __init__(self, enabled: bool = False, max_trace_events: int = 100000):
+        """Initialize profiler; disabled profilers record nothing."""
+        self.enabled = enabled
+        self.max_trace_events = max_trace_events
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop all recorded timings, counters and trace events."""
+        self.origin_ns = time.perf_counter_ns()
+        self.phases: Dict[str, PhaseStats] = {}
+        self.counters: Dict[str, int] = {}
+        self.wall_ns = 0
+        self.episodes = 0
+        self.trace_events: Deque[Dict[str, Any]] = deque(maxlen=self.max_trace_events)
+        self._episode_phases: Dict[str, PhaseStats] = {}
+        self._episode_counters: Dict[str, int] = {}
+        self._episode_start: Optional[int] = None
+
+    def section(self, name: str):
+        """Return a context manager timing the named phase."""
+        if not self.enabled:
+            return _NULL_SECTION
+        return _Section(self, name)
+
+    def record(self, name: str, start_ns: int, duration_ns: int) -> None:
+        """Record a completed span for a phase."""
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = PhaseStats()
+        phase.add(duration_ns)
+        if self._episode_start is not None:
+            phase = self._episode_phases.get(name)
+            if phase is None:
+                phase = self._episode_phases[name] = PhaseStats()
+            phase.add(duration_ns)
+        if self.max_trace_events:
+            self.trace_events.append({
+                'name': name,
+                'ph': 'X',
+                'ts': (start_ns - self.origin_ns) / 1e3,
+                'dur': duration_ns / 1e3,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+            })
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Increment a named counter."""
+        if not self.enabled:
+            return
+        self.counters[name] = self.counters.get(name, 0) + n
+        if self._episode_start is not None:
+            self._episode_counters[name] = self._episode_counters.get(name, 0) + n
+
+    def begin_episode(self) -> None:
+        """Start collecting a per-episode breakdown."""
+        if not self.enabled:
+            return
+        self._episode_phases = {}
+        self._episode_counters = {}
+        self._episode_start = time.perf_counter_ns()
+
+    def end_episode(self) -> Dict[str, Any]:
+        """Finish the current episode and return its breakdown."""
+        if not self.enabled or self._episode_start is None:
+            return {}
+        wall_ns = time.perf_counter_ns() - self._episode_start
+        self._episode_start = None
+        self.wall_ns += wall_ns
+        self.episodes += 1
+        return self._breakdown(self._episode_phases, self._episode_counters, wall_ns)
+
+    def summary(self) -> Dict[str, Any]:
+        """Return the cumulative breakdown across all episodes."""
+        summary = self._breakdown(self.phases, self.counters, self.wall_ns)
+        summary['episodes'] = self.episodes
+        return summary
+
+    @staticmethod
+    def _breakdown(phases: Dict[str, PhaseStats], counters: Dict[str, int],
+                   wall_ns: int) -> Dict[str, Any]:
+        return {
+            'wall_us': wall_ns / 1e3,
+            'phases': {name: stats.summary(wall_ns) for name, stats in phases.items()},
+            'counters': dict(counters),
+        }
+
+    def export_json(self, filepath: str) -> None:
+        """Write the cumulative breakdown as JSON."""
+        with open(filepath, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def export_chrome_trace(self, filepath: str) -> None:
+        """Write recorded spans in Chrome trace event format (chrome://tracing)."""
+        with open(filepath, 'w') as f:
+            json.dump({'traceEvents': list(self.trace_events),
+                       'displayTimeUnit': 'ms'}, f)
+
+
+# Shared disabled profiler used as the default by instrumented components
+NULL_PROFILER = Profiler(enabled=False, max_trace_events=0)
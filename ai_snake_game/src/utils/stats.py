@@ -0,0 +1,318 @@
+import time
+from bisect import bisect_left
+from collections import deque
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+
+class P2Quantile:
+    """
+    Streaming quantile estimate using the P-squared algorithm.
+
+    Keeps five markers regardless of how many values are observed, so
+    both memory and update cost are constant.
+    """
+
+    def __init__(self, quantile: float):
+        """Initialize estimator for a quantile in (0, 1)."""
+        if not 0.0 < quantile < 1.0:
+            raise ValueError(f"Quantile must be in (0, 1), got {quantile}")
+        self.quantile = quantile
+        self.count = 0
+        self._heights: List[float] = []
+        self._positions = [0, 1, 2, 3, 4]
+        self._desired = [0.0, 2 * quantile, 4 * quantile, 2 + 2 * quantile, 4.0]
+        self._increments = [0.0, quantile / 2, quantile, (1 + quantile) / 2, 1.0]
+
+    def add(self, value: float) -> None:
+        """Observe a new value."""
+        self.count += 1
+        heights = self._heights
+        if len(heights) < 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        # Locate the cell containing the value, stretching the extremes
+        if value < heights[0]:
+            heights[0] = value
+            k = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            k = 3
+        else:
+            k = 0
+            while value >= heights[k + 1]:
+                k += 1
+
+        positions = self._positions
+        for i in range(k + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # Nudge the three middle markers towards their desired positions
+        for i in range(1, 4):
+            d = self._desired[i] - positions[i]
+            if ((d >= 1 and positions[i + 1] - positions[i] > 1) or
+                    (d <= -1 and positions[i - 1] - positions[i] < -1)):
+                step = 1 if d > 0 else -1
+                candidate = self._parabolic(i, step)
+                if not heights[i - 1] < candidate < heights[i + 1]:
+                    candidate = self._linear(i, step)
+                heights[i] = candidate
+                positions[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        q, n = self._heights, self._positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i: int, step: int) -> float:
+        q, n = self._heights, self._positions
+        return q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+
+    @property
+    def value(self) -> float:
+        """Current quantile estimate (0.0 before any values)."""
+        if not self._heights:
+            return 0.0
+        if len(self._heights) < 5:
+            index = int(round(self.quantile * (len(self._heights) - 1)))
+            return self._heights[index]
+        return self._heights[2]
+
+
+class DownsampledHistory:
+    """
+    Multi-resolution history of a metric.
+
+    Level 0 keeps the most recent raw values; each further level keeps
+    means over ``factor`` times as many samples as the level below, so
+    long runs can be plotted at coarse resolution in bounded memory.
+    """
+
+    def __init__(self, capacity: int = 500, levels: int = 3, factor: int = 10):
+        """Initialize history with per-level capacity and downsampling factor."""
+        self.capacity = capacity
+        self.factor = factor
+        self.levels: List[Deque[float]] = [deque(maxlen=capacity) for _ in range(levels)]
+        self._sums = [0.0] * levels
+        self._counts = [0] * levels
+
+    def add(self, value: float) -> None:
+        """Add a raw value, rolling it up into coarser levels as buckets fill."""
+        self.levels[0].append(value)
+        for level in range(1, len(self.levels)):
+            self._sums[level] += value
+            self._counts[level] += 1
+            if self._counts[level] == self.factor ** level:
+                self.levels[level].append(self._sums[level] / self._counts[level])
+                self._sums[level] = 0.0
+                self._counts[level] = 0
+
+    def get(self, level: int = 0) -> List[float]:
+        """Return the retained values at a resolution level."""
+        return list(self.levels[level])
+
+    def clear(self) -> None:
+        """Drop all history."""
+        for level in self.levels:
+            level.clear()
+        self._sums = [0.0] * len(self.levels)
+        self._counts = [0] * len(self.levels)
+
+
+class MetricSeries:
+    """
+    Bounded-memory series of a scalar metric with O(1) aggregates.
+
+    Keeps a fixed-size ring buffer of recent values, running all-time
+    count/mean/min/max, an exponential moving average, rolling window
+    mean/max, streaming quantile sketches and a downsampled history.
+    ``append`` mirrors the list API so existing call sites keep working.
+    """
+
+    def __init__(self, window: int = 100, ema_alpha: float = 0.05,
+                 quantiles: Iterable[float] = (0.5, 0.9),
+                 history_capacity: int = 500, history_levels: int = 3,
+                 history_factor: int = 10):
+        """Initialize series with window size and aggregate settings."""
+        self.window = window
+        self.ema_alpha = ema_alpha
+        self._quantile_levels = tuple(quantiles)
+        self._history_args = (history_capacity, history_levels, history_factor)
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear all values and aggregates."""
+        self.recent_values: Deque[float] = deque(maxlen=self.window)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.ema: Optional[float] = None
+        self.last: Optional[float] = None
+        self._window_sum = 0.0
+        self._window_max: Deque[Tuple[int, float]] = deque()
+        self.quantiles = {q: P2Quantile(q) for q in self._quantile_levels}
+        self.history = DownsampledHistory(*self._history_args)
+
+    def append(self, value: float) -> None:
+        """Record a new value."""
+        if len(self.recent_values) == self.window:
+            self._window_sum -= self.recent_values[0]
+        self.recent_values.append(value)
+        self._window_sum += value
+
+        # Monotonic deque keeps the rolling max at the front
+        while self._window_max and self._window_max[-1][1] <= value:
+            self._window_max.pop()
+        self._window_max.append((self.count, value))
+        while self._window_max[0][0] <= self.count - self.window:
+            self._window_max.popleft()
+
+        self.count += 1
+        self.total += value
+        self.last = value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if self.ema is None:
+            self.ema = float(value)
+        else:
+            self.ema += self.ema_alpha * (value - self.ema)
+
+        for sketch in self.quantiles.values():
+            sketch.add(value)
+        self.history.add(value)
+
+    @property
+    def mean(self) -> float:
+        """All-time mean (0.0 when empty)."""
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def window_mean(self) -> float:
+        """Mean of the values in the ring buffer."""
+        return self._window_sum / len(self.recent_values) if self.recent_values else 0.0
+
+    @property
+    def window_max(self) -> float:
+        """Max of the values in the ring buffer."""
+        return self._window_max[0][1] if self._window_max else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Return a tracked quantile estimate."""
+        return self.quantiles[q].value
+
+    def recent(self, n: Optional[int] = None) -> List[float]:
+        """Return up to ``n`` most recent values, oldest first."""
+        if n is None:
+            return list(self.recent_values)
+        if n <= 0:
+            return []
+        # Walk from the right so only ``n`` values are copied
+        return list(islice(reversed(self.recent_values), n))[::-1]
+
+    def summary(self) -> Dict[str, Any]:
+        """Return all aggregates as a plain dict."""
+        summary = {
+            'count': self.count,
+            'last': self.last if self.last is not None else 0,
+            'mean': self.mean,
+            'min': self.min if self.min is not None else 0,
+            'max': self.max if self.max is not None else 0,
+            'ema': self.ema if self.ema is not None else 0.0,
+            'window_mean': self.window_mean,
+            'window_max': self.window_max,
+        }
+        for q, sketch in self.quantiles.items():
+            summary[f'p{int(round(q * 100))}'] = sketch.value
+        return summary
+
+    def __len__(self) -> int:
+        """Return number of values currently held in the ring buffer."""
+        return len(self.recent_values)
+
+    def __iter__(self):
+        return iter(self.recent_values)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram with cumulative (Prometheus-style) buckets.
+
+    ``observe`` is a binary search plus two additions, so it is cheap
+    enough for per-tick hot paths.
+    """
+
+    def __init__(self, buckets: Iterable[float]):
+        """Initialize histogram with ascending upper bounds (+Inf is implicit)."""
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one value."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """Return (upper_bound, count <= bound) pairs ending with +Inf."""
+        result = []
+        running = 0
+        for bound, count in zip(self.buckets + [float('inf')], self.counts):
+            running += count
+            result.append((bound, running))
+        return result
+
+    def summary(self) -> Dict[str, Any]:
+        """Return count, sum and cumulative bucket counts keyed by bound."""
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': {('+Inf' if bound == float('inf') else str(bound)): count
+                        for bound, count in self.cumulative()},
+        }
+
+
+class RateMeter:
+    """
+    Events per second over a sliding time window.
+
+    Counts are accumulated into fixed time buckets, so ``add`` is O(1)
+    and the rate reflects roughly the last ``window`` seconds.
+    """
+
+    def __init__(self, window: float = 2.0, buckets: int = 10):
+        """Initialize meter with window length (seconds) and bucket count."""
+        self.bucket_span = window / buckets
+        self._buckets: Deque[List[float]] = deque(maxlen=buckets)
+        self.total = 0
+
+    def add(self, count: int = 1, now: Optional[float] = None) -> None:
+        """Record ``count`` events."""
+        if now is None:
+            now = time.monotonic()
+        self.total += count
+        if self._buckets and now - self._buckets[-1][0] < self.bucket_span:
+            self._buckets[-1][1] += count
+        else:
+            self._buckets.append([now, count])
+
+    def rate(self, now: Optional[float] = None) -> float:
+        """Events per second over the retained buckets."""
+        if now is None:
+            now = time.monotonic()
+        horizon = now - self.bucket_span * self._buckets.maxlen
+        count = sum(n for start, n in self._buckets if start >= horizon)
+        if not count:
+            return 0.0
+        oldest = next(start for start, _ in self._buckets if start >= horizon)
+        return count / max(now - oldest, self.bucket_span)